@@ -1,162 +1,1045 @@
 import os
-import streamlit as st
-import google.generativeai as genai
+import re
+import copy
+import json
+import time
+import queue
+import random
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
+from metrics import CallRecord, error_reason, get_metrics, usage_tokens
+from milestone_parser import MilestoneStreamParser, parse_milestones
+from models import Milestone, Priority
+from prompts import NOTE_SECTIONS, PROMPT_VERSION, Prompt, get_prompt_set
+from scheduler import rebalance_days
+from similar_plans import get_similar_index, rescale_days
 
 # Load environment variables
 load_dotenv()
 
-class AITaskPlanner:
+logger = logging.getLogger(__name__)
+
+# Notice levels a planner reports through its notify callback
+NOTICE_LEVELS = {'info': logging.INFO, 'success': logging.INFO, 'warning': logging.WARNING, 'error': logging.ERROR}
+
+# Gemini model and client transport
+MODEL_NAME = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+GEMINI_TRANSPORT = os.getenv('GEMINI_TRANSPORT') or None
+
+# Alternative API endpoint, e.g. http://127.0.0.1:8089 for benchmarks/fake_server.py (with GEMINI_TRANSPORT=rest)
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT') or None
+
+# Cheaper/faster models tried in order when the primary model fails or its circuit is open
+FALLBACK_MODELS = [name.strip() for name in os.getenv('GEMINI_FALLBACK_MODELS', 'gemini-1.5-flash-8b').split(',') if name.strip()]
+
+# Per-call deadline (seconds) for a single Gemini request
+MODEL_CALL_TIMEOUT = float(os.getenv('GEMINI_CALL_TIMEOUT', '60'))
+
+# Budget (seconds) for one logical call across its retries and fallback models
+CALL_BUDGET = float(os.getenv('GEMINI_CALL_BUDGET', '90'))
+
+# Retries per model for interactive plans on 429/5xx; bulk import sets its own (see with_limits)
+INTERACTIVE_RETRIES = int(os.getenv('GEMINI_INTERACTIVE_RETRIES', '1'))
+
+# Circuit breaker: consecutive failures that open a model's circuit, and seconds until a trial call
+BREAKER_FAILURES = int(os.getenv('GEMINI_BREAKER_FAILURES', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('GEMINI_BREAKER_RESET', '30'))
+
+# Bounded pool shared by all sessions so both prompts can be in flight at once
+_generation_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gemini")
+
+# Upper bound on milestones kept per task
+MAX_MILESTONES = 5
+
+# 'structured' asks for one JSON plan; 'two_prompt' is the original milestones + analysis pair
+GENERATION_MODE = os.getenv('PLANNER_GENERATION_MODE', 'structured')
+
+# "milestones" sorts before "notes", so milestones stream first even when keys come out alphabetically
+PLAN_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'milestones': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string'},
+                    'description': {'type': 'string'},
+                    'estimated_days': {'type': 'integer'},
+                },
+                'required': ['name', 'estimated_days'],
+            },
+        },
+        'notes': {
+            'type': 'object',
+            'properties': {key: {'type': 'array', 'items': {'type': 'string'}} for key, _ in NOTE_SECTIONS},
+        },
+    },
+    'required': ['milestones', 'notes'],
+}
+
+STRUCTURED_GENERATION_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': PLAN_SCHEMA,
+}
+
+# Rate limits and retries for bulk generation (see AITaskPlanner.with_limits)
+REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '15'))
+TOKENS_PER_MINUTE = int(os.getenv('GEMINI_TOKENS_PER_MINUTE', '1000000'))
+MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', '4'))
+
+# Token cost charged for a response before the real count is known
+RESPONSE_TOKEN_ESTIMATE = 1500
+
+# HTTP statuses worth retrying: rate limited or a transient server error
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# On-disk response cache settings
+CACHE_PATH = os.getenv('PLANNER_CACHE_PATH', 'ai_response_cache.sqlite3')
+CACHE_TTL_SECONDS = int(os.getenv('PLANNER_CACHE_TTL', str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv('PLANNER_CACHE_MAX_ENTRIES', '500'))
+
+
+class ResponseCache:
+    """SQLite-backed cache of generated plans with TTL expiry and LRU eviction"""
+    
+    def __init__(self, path: str = CACHE_PATH, ttl_seconds: int = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, milestones TEXT NOT NULL, analysis TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+    
+    @staticmethod
+    def make_key(task_name: str, category: str, duration_days: int, additional_context: str = "", mode: str = "",
+                 prompt_version: str = PROMPT_VERSION):
+        """Build a cache key from the normalized task fields, the prompt version and generation mode"""
+        def normalize(value):
+            return " ".join(str(value or "").lower().split())
+        
+        payload = json.dumps([
+            prompt_version,
+            mode,
+            normalize(task_name),
+            normalize(category),
+            int(duration_days),
+            normalize(additional_context),
+        ])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str):
+        """Return (milestones, analysis) for a fresh entry, or None on a miss"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT milestones, analysis, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'misses'")
+                return None
+            
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'hits'")
+        return [Milestone.from_dict(milestone) for milestone in json.loads(row[0])], row[1]
+    
+    def put(self, key: str, milestones, analysis: str):
+        """Store a generated plan and evict the least recently used entries beyond the size limit"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps([milestone.to_dict() for milestone in milestones]), analysis, now, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+    
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {'hits': counters.get('hits', 0), 'misses': counters.get('misses', 0), 'entries': entries}
+    
+    def clear(self):
+        """Drop every cached plan and reset the counters"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("UPDATE counters SET value = 0")
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide response cache, opened on first use"""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
+
+
+def _load_json_lenient(text: str):
+    """json.loads with light repair: code fences, surrounding prose and trailing commas"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    
+    fenced = re.search(r'```(?:json)?\s*(.*?)```', text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end <= start:
+        raise ValueError("no JSON object in response")
+    text = re.sub(r',\s*([}\]])', r'\1', text[start:end + 1])
+    return json.loads(text)
+
+
+def _milestone_from_json(item, milestone_id: int):
+    """Convert one structured milestone into a Milestone, or None if invalid"""
+    if not isinstance(item, dict):
+        return None
+    
+    name = str(item.get('name') or '').strip()
+    if len(name) < 3:
+        return None
+    
+    try:
+        estimated_days = max(1, int(float(item.get('estimated_days', 1))))
+    except (TypeError, ValueError):
+        estimated_days = 1
+    
+    return Milestone(
+        milestone_id, name, Priority.MEDIUM,
+        estimated_days=estimated_days,
+        description=str(item.get('description') or '').strip()
+    )
+
+
+def _render_notes(notes: dict):
+    """Render structured analysis sections in the same layout as the text analysis"""
+    sections = []
+    for key, title in NOTE_SECTIONS:
+        items = notes.get(key)
+        if isinstance(items, str):
+            items = [items]
+        items = [str(item).strip() for item in items or [] if str(item).strip()]
+        if items:
+            sections.append(f"{title}:\n" + "\n".join(f"• {item}" for item in items))
+    return "\n\n".join(sections)
+
+
+class StructuredPlanStreamParser:
+    """Incremental scanner for a streamed structured plan.
+    
+    Tracks JSON nesting and string state so each object in the top-level
+    "milestones" array can be emitted as soon as its closing brace arrives.
+    """
+    
     def __init__(self):
+        self.text = ""
+        self._count = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._item_start = None
+    
+    def feed(self, chunk: str):
+        """Consume a chunk of JSON text and return the milestones completed by it"""
+        start = len(self.text)
+        self.text += chunk
+        parsed = []
+        
+        for index in range(start, len(self.text)):
+            char = self.text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = self.text[self._string_start + 1:index]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char in '{[':
+                if char == '{' and self._stack == [('{', None), ('[', 'milestones')]:
+                    self._item_start = index
+                self._stack.append((char, self._last_string if char == '[' else None))
+            elif char in '}]' and self._stack:
+                self._stack.pop()
+                if char == '}' and self._item_start is not None and len(self._stack) == 2:
+                    milestone = self._parse_item(self.text[self._item_start:index + 1])
+                    self._item_start = None
+                    if milestone is not None:
+                        parsed.append(milestone)
+        return parsed
+    
+    def _parse_item(self, text: str):
+        if self._count >= MAX_MILESTONES:
+            return None
+        try:
+            milestone = _milestone_from_json(json.loads(text), self._count + 1)
+        except ValueError:
+            return None
+        if milestone is not None:
+            self._count += 1
+        return milestone
+
+
+class PlanGenerationError(Exception):
+    """The model was unavailable or returned nothing usable"""
+
+
+class CircuitOpenError(Exception):
+    """Every model in the chain has an open circuit, so no request was sent"""
+
+
+class CircuitBreaker:
+    """Stops sending requests to a failing model for a while.
+    
+    Closed until failure_threshold consecutive failures, then open: calls
+    are refused until reset_seconds have passed, when one trial call is let
+    through (half open). Its success closes the circuit; its failure opens
+    it again. Every allowed call must end in record_success(),
+    record_failure() or release().
+    """
+    
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+    
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._trial or self._clock() - self._opened_at >= self.reset_seconds:
+                return 'half_open'
+            return 'open'
+    
+    def allow(self):
+        """True if a request may be sent now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._trial and self._clock() - self._opened_at >= self.reset_seconds:
+                self._trial = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                self._trial = False
+    
+    def release(self):
+        """End an allowed call that says nothing about the model's health (cancelled, out of budget, bad request)"""
+        with self._lock:
+            self._trial = False
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per model name, created on first use"""
+    
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._breakers = {}
+    
+    def get(self, model_name: str):
+        with self._lock:
+            breaker = self._breakers.get(model_name)
+            if breaker is None:
+                breaker = self._breakers[model_name] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+            return breaker
+    
+    def states(self):
+        """{model name: 'closed' | 'open' | 'half_open'}"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {model_name: breaker.state for model_name, breaker in sorted(breakers.items())}
+
+
+# Shared by every planner in the process, so all sessions see the same model health
+circuit_breakers = CircuitBreakers()
+
+
+class RateLimiter:
+    """Sliding one-minute window over requests and tokens, shared by all threads using it.
+
+    acquire() blocks until a request fits both budgets and returns a handle;
+    settle() corrects the token charge once the response reports its usage.
+    """
+
+    def __init__(self, requests_per_minute: int = REQUESTS_PER_MINUTE, tokens_per_minute: int = TOKENS_PER_MINUTE,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._window = deque()  # [sent_at, tokens] per request in the last minute
+        self._tokens = 0
+
+    def acquire(self, tokens: int):
+        while True:
+            with self._lock:
+                now = self._clock()
+                while self._window and self._window[0][0] <= now - 60:
+                    self._tokens -= self._window.popleft()[1]
+                # An empty window always admits one request, even one larger than the token budget
+                if not self._window or (len(self._window) < self.requests_per_minute
+                                        and self._tokens + tokens <= self.tokens_per_minute):
+                    entry = [now, tokens]
+                    self._window.append(entry)
+                    self._tokens += tokens
+                    return entry
+                wait = self._window[0][0] + 60 - now
+            self._sleep(max(wait, 0.01))
+
+    def settle(self, entry, actual_tokens: int):
+        with self._lock:
+            if any(queued is entry for queued in self._window):
+                self._tokens += actual_tokens - entry[1]
+            entry[1] = actual_tokens
+
+
+def _status_code(error):
+    """HTTP status of an API client error, or None"""
+    code = getattr(error, 'code', None)
+    if code is None or callable(code):
+        code = getattr(error, 'status_code', None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error):
+    """True for rate limiting (429) and transient server errors (5xx) from the API client"""
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def _moves_to_next_model(error):
+    """True for failures another model may not have: timeouts (incl. 504 DeadlineExceeded), connection errors and unknown models (404)"""
+    return isinstance(error, OSError) or _status_code(error) in (404, 504)
+
+
+def log_notice(level: str, message: str):
+    """Default planner notify callback: send notices to the ai_service logger"""
+    logger.log(NOTICE_LEVELS.get(level, logging.INFO), message)
+
+
+# Planner._model before the Gemini client has been configured
+_NOT_CONNECTED = object()
+
+
+class AITaskPlanner:
+    """Plans milestones and notes for a task; UI-agnostic.
+    
+    Progress and fallback notices go through notify(level, message), with
+    level one of NOTICE_LEVELS. By default they are logged; the Streamlit
+    app passes a callback that shows them in the sidebar.
+    
+    Each request goes to the first model in model_chain whose circuit is
+    closed: 429/5xx are retried with jittered backoff, timeouts and
+    connection errors move straight to the next model, and the whole call
+    is bounded by call_budget seconds. Injected models (fakes) can supply
+    fallbacks as {model name: model}.
+    """
+    
+    def __init__(self, model=None, use_cache: bool = True, api_key: str = None, model_name: str = None, generation_mode: str = None,
+                 notify=None, metrics=None, prompt_version: str = None, fallbacks: dict = None, breakers: CircuitBreakers = None):
+        self.notify = notify or log_notice
+        self.metrics = metrics if metrics is not None else get_metrics()
+        self.prompts = get_prompt_set(prompt_version)
+        self.breakers = breakers if breakers is not None else circuit_breakers
+        self._owns_model = False
+        self._instruction_models = {}
+        # Shared with copies (with_limits, plan job workers) and filled from pool threads
+        self._instruction_models_lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self.cache = get_response_cache() if use_cache else None
+        self.similar = get_similar_index() if use_cache else None
+        self.model_name = model_name or MODEL_NAME
+        self.generation_mode = generation_mode or GENERATION_MODE
+        self.init_error = None
+        self.rate_limiter = None
+        self.max_retries = INTERACTIVE_RETRIES
+        self.call_budget = CALL_BUDGET
+        
+        # Use an injected model (e.g. a local fake for benchmarks) when given
+        if model is not None:
+            self.api_key = None
+            self._model = model
+            self._models = {self.model_name: model, **(fallbacks or {})}
+            self.model_chain = list(self._models)
+            return
+        
+        self.model_chain = [self.model_name] + [name for name in FALLBACK_MODELS if name != self.model_name]
+        
         # Get API key from environment
-        self.api_key = os.getenv('GEMINI_API_KEY')
+        self.api_key = api_key if api_key is not None else os.getenv('GEMINI_API_KEY')
         
         if not self.api_key:
-            st.error("❌ GEMINI_API_KEY not found in environment variables")
-            st.info("Please create a .env file with: GEMINI_API_KEY=your_key_here")
-            self.model = None
+            self.init_error = "GEMINI_API_KEY not found in environment variables"
+            self._model = None
             return
         
-        # Configure the API
-        try:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-            st.sidebar.success("✅ AI Service Ready")
-        except Exception as e:
-            st.sidebar.error(f"❌ AI Service Error: {str(e)}")
-            self.model = None
+        # The client library takes about a second to import, so it is configured on first use
+        self._model = _NOT_CONNECTED
+    
+    @property
+    def model(self):
+        """The Gemini model (or injected fake), None if unavailable; see init_error"""
+        if self._model is _NOT_CONNECTED:
+            self._connect()
+        return self._model
+    
+    def _connect(self):
+        """Import and configure google.generativeai, once per planner"""
+        with self._connect_lock:
+            if self._model is not _NOT_CONNECTED:
+                return
+            try:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key, transport=GEMINI_TRANSPORT,
+                                client_options={'api_endpoint': GEMINI_API_ENDPOINT} if GEMINI_API_ENDPOINT else None)
+                self._model = genai.GenerativeModel(self.model_name)
+                self._owns_model = True
+            except Exception as e:
+                self.init_error = str(e)
+                self._model = None
+    
+    def matches(self, api_key: str, model_name: str):
+        """True if this planner was built for the given key and model"""
+        return self.api_key == api_key and self.model_name == (model_name or MODEL_NAME)
+    
+    def with_limits(self, rate_limiter: RateLimiter, max_retries: int = MAX_RETRIES, notify=None):
+        """Copy of this planner sharing its model and cache whose calls are rate limited and retried"""
+        self.model  # connect first, so the copy shares the client rather than building its own
+        planner = copy.copy(self)
+        planner.rate_limiter = rate_limiter
+        planner.max_retries = max_retries
+        if notify is not None:
+            planner.notify = notify
+        # Waiting for the rate limiter is expected, so only each request's own timeout applies
+        planner.call_budget = None
+        return planner
+    
+    def _send(self, prompt: Prompt, model_name: str, **kwargs):
+        """generate_content for a Prompt on one model of the chain.
+        
+        With our own client the instructions become the system instruction,
+        and the library's built-in retry (up to 600 s on 503) is turned off
+        so _call_model's retries and budget are the only ones.
+        """
+        if self._owns_model:
+            import google.generativeai as genai
+            kwargs['request_options'] = {**kwargs.get('request_options', {}), 'retry': None}
+            key = (model_name, prompt.instruction)
+            with self._instruction_models_lock:
+                model = self._instruction_models.get(key)
+                if model is None:
+                    model = genai.GenerativeModel(model_name, system_instruction=prompt.instruction or None)
+                    self._instruction_models[key] = model
+            return model.generate_content(prompt.content, **kwargs)
+        return self._models[model_name].generate_content(prompt.text, **kwargs)
+    
+    def _remaining(self, deadline):
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Gemini call exceeded its {self.call_budget:g}s budget")
+        return remaining
+    
+    def _call_model(self, prompt: Prompt, timeout: float = MODEL_CALL_TIMEOUT, **kwargs):
+        """One non-streaming generate_content call through the model chain, retries and circuit breakers"""
+        deadline = None if self.call_budget is None else time.monotonic() + self.call_budget
+        last_error = None
+        for model_name in self.model_chain:
+            breaker = self.breakers.get(model_name)
+            for attempt in range(self.max_retries + 1):
+                if not breaker.allow():
+                    break
+                resolved = False
+                try:
+                    entry = None
+                    if self.rate_limiter is not None:
+                        entry = self.rate_limiter.acquire(len(prompt) // 4 + RESPONSE_TOKEN_ESTIMATE)
+                    remaining = self._remaining(deadline)
+                    started = time.perf_counter()
+                    try:
+                        response = self._send(prompt, model_name, request_options={
+                            'timeout': timeout if remaining is None else min(timeout, remaining)
+                        }, **kwargs)
+                    except Exception as e:
+                        self._record_call(prompt.kind, started, model_name, error=e, attempt=attempt)
+                        if not (_is_retryable(e) or _moves_to_next_model(e)):
+                            raise
+                        breaker.record_failure()
+                        resolved = True
+                        last_error = e
+                        if attempt == self.max_retries or _moves_to_next_model(e):
+                            break
+                        # Exponential backoff with jitter, capped at 30 seconds and by the call budget
+                        backoff = min(30, 2 ** attempt) + random.uniform(0, 1)
+                        remaining = self._remaining(deadline)
+                        time.sleep(backoff if remaining is None else min(backoff, remaining))
+                        continue
+                    
+                    breaker.record_success()
+                    resolved = True
+                    self._record_call(prompt.kind, started, model_name, response, attempt=attempt)
+                    usage = getattr(response, 'usage_metadata', None)
+                    if entry is not None and getattr(usage, 'total_token_count', None):
+                        self.rate_limiter.settle(entry, usage.total_token_count)
+                    return response
+                finally:
+                    # A half-open trial that never reached a verdict must not block the model for good
+                    if not resolved:
+                        breaker.release()
+        raise last_error or CircuitOpenError(f"circuit open for {', '.join(self.model_chain)}")
+    
+    def _stream_text(self, prompt: Prompt, timeout: float = MODEL_CALL_TIMEOUT, cancelled: threading.Event = None, **kwargs):
+        """Stream one prompt's text from the first model in the chain that accepts the request.
+        
+        Falling over to the next model is only possible before the first
+        chunk; a stream that breaks later raises to the caller.
+        """
+        last_error = None
+        for model_name in self.model_chain:
+            breaker = self.breakers.get(model_name)
+            if not breaker.allow():
+                continue
+            started = time.perf_counter()
+            streamed = False
+            resolved = False
+            try:
+                try:
+                    response = self._send(prompt, model_name, stream=True, request_options={'timeout': timeout}, **kwargs)
+                    for chunk in response:
+                        if cancelled is not None and cancelled.is_set():
+                            return
+                        if chunk.text:
+                            streamed = True
+                            yield chunk.text
+                except Exception as e:
+                    self._record_call(prompt.kind, started, model_name, error=e, stream=True)
+                    transient = _is_retryable(e) or _moves_to_next_model(e)
+                    if transient:
+                        breaker.record_failure()
+                        resolved = True
+                    if streamed or not transient:
+                        raise
+                    last_error = e
+                    continue
+                breaker.record_success()
+                resolved = True
+                self._record_call(prompt.kind, started, model_name, response, stream=True)
+                return
+            finally:
+                # Cancelled, abandoned by the consumer or a non-transient error: free a half-open trial
+                if not resolved:
+                    breaker.release()
+        raise last_error or CircuitOpenError(f"circuit open for {', '.join(self.model_chain)}")
+    
+    def _record_call(self, kind: str, started: float, model_name: str, response=None, error=None, attempt: int = 0,
+                     stream: bool = False):
+        """Report one finished request (timing, token usage, failure reason) to the metrics collector"""
+        prompt_tokens, response_tokens = usage_tokens(response)
+        self.metrics.record_call(CallRecord(
+            model_name, kind, 'ok' if error is None else 'error', time.perf_counter() - started,
+            prompt_tokens, response_tokens, attempt, stream, None if error is None else error_reason(error),
+        ))
+    
+    def _cached_plan(self, cache_key):
+        """Look a plan up in the response cache, counting the hit or miss"""
+        cached = self.cache.get(cache_key)
+        self.metrics.record_cache(self.model_name, cached is not None)
+        return cached
+    
+    def _similar_plan(self, task_name: str, category: str, duration_days: int, additional_context: str, cache_key):
+        """A past plan for a similar task, rescaled to this duration and cached under this task's key; or None"""
+        if self.similar is None:
+            return None
+        match = self.similar.find(task_name, category, additional_context, self.prompts.version)
+        self.metrics.record_similar(self.model_name, match is not None)
+        if match is None:
+            return None
+        
+        self.notify('info', f"♻️ Reused the plan of a similar task, '{match.task_name}' ({match.score:.0%} match)")
+        milestones = self._finalize_milestones(rescale_days(match.milestones, duration_days), task_name, duration_days)
+        if cache_key is not None:
+            self.cache.put(cache_key, milestones, match.analysis)
+        return milestones, match.analysis
+    
+    def fallback_plan(self, reason: str, task_name: str, category: str, total_days: int = 10):
+        """Template milestones spread over total_days and analysis, counted as a fallback for `reason`"""
+        self.metrics.record_fallback(self.model_name, reason)
+        return self._get_fallback_milestones(task_name, category, total_days), self._get_fallback_analysis(task_name)
+    
+    def _report_failure(self, error):
+        """Log a failed generation instead of dropping it, and tell the user why the fallback was used"""
+        reason = error_reason(error)
+        logger.warning("Plan generation failed (%s)", reason, exc_info=error)
+        self.notify('warning', f"⚠️ AI request failed ({reason}), using fallback")
+        return reason
     
     def generate_milestones(self, task_name: str, category: str, start_date: datetime, end_date: datetime, additional_context: str = ""):
         """Generate AI-powered milestones for a task"""
         
+        # Serve repeat plans straight from the response cache
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(task_name, category, (end_date - start_date).days, additional_context, self.generation_mode, self.prompts.version)
+            cached = self._cached_plan(cache_key)
+            if cached is not None:
+                self.notify('info', "⚡ Plan served from cache")
+                return cached
+        
+        # Calculate task duration
+        duration_days = (end_date - start_date).days
+        
+        similar = self._similar_plan(task_name, category, duration_days, additional_context, cache_key)
+        if similar is not None:
+            return similar
+        
         if not self.model:
-            st.sidebar.warning("⚠️ AI model not available, using fallback milestones")
-            fallback_milestones = self._get_fallback_milestones(task_name, category)
-            fallback_analysis = f"""
-📚 LEARNING RESOURCES & EXAMPLES:
-• Research online guides and tutorials for {task_name}
-• Look for case studies and success stories
-• Join relevant communities and forums
-
-🔗 USEFUL RESOURCES & REFERENCES:
-• Search for official documentation and guides
-• Find online courses or training programs
-• Connect with experts in the field
-
-💡 PRACTICAL TIPS & STRATEGIES:
-• Break down the task into smaller, manageable steps
-• Set realistic daily goals and track progress
-• Stay motivated by celebrating small wins
-
-🛠️ TOOLS & EQUIPMENT:
-• Identify any tools or software needed
-• Research budget-friendly options
-• Plan for necessary purchases or subscriptions
-
-📋 ADDITIONAL CONTEXT & NOTES:
-• Consider prerequisites and background knowledge needed
-• Plan for potential challenges and setbacks
-• Set up a support system or accountability partner
-"""
-            return fallback_milestones, fallback_analysis
+            self.notify('warning', "⚠️ AI model not available, using fallback milestones")
+            return self.fallback_plan('no_model', task_name, category, duration_days)
         
         try:
-            # Calculate task duration
-            duration_days = (end_date - start_date).days
-            
-            # Create the prompt for milestones
-            milestones_prompt = f"""
-            Break down this task into 3-5 specific, actionable steps: "{task_name}"
-            
-            🚨 CRITICAL REQUIREMENT: You have exactly {duration_days} days total to complete this task. You MUST distribute ALL {duration_days} days across your milestones. DO NOT leave any days unallocated.
-            
-            Task Details:
-            - Category: {category}
-            - Total time available: {duration_days} days (MUST USE ALL {duration_days} DAYS)
-            - Additional context: {additional_context}
-            
-            Create specific action steps that someone would actually do to complete this task. Each step should be a concrete action, not a category or date.
-            
-            Format your response EXACTLY like this:
-            
-            1. [Specific action step] - [X days]
-            
-            2. [Specific action step] - [X days]
-            
-            3. [Specific action step] - [X days]
-            
-            4. [Specific action step] - [X days]
-            
-            5. [Specific action step] - [X days]
-            
-            🚨 MANDATORY: The sum of all milestone days MUST equal exactly {duration_days} days. NO EXCEPTIONS.
-            
-            For your {duration_days}-day task, distribute the time appropriately across milestones. The total MUST equal {duration_days} days.
-            """
-            
-            # Create the prompt for enhanced detailed analysis
-            analysis_prompt = f"""
-            Provide a comprehensive, helpful analysis for this task: "{task_name}"
-            
-            Task Details:
-            - Category: {category}
-            - Duration: {duration_days} days
-            - Additional context: {additional_context}
-            
-            Create a detailed analysis that includes:
-            
-            📚 LEARNING RESOURCES & EXAMPLES:
-            - Recommended books, articles, or guides
-            - Real-world examples and case studies
-            - Best practices and success stories
-            
-            🔗 USEFUL RESOURCES & REFERENCES:
-            - Helpful websites and tools
-            - Online courses or tutorials
-            - Professional communities or forums
-            
-            💡 PRACTICAL TIPS & STRATEGIES:
-            - Time management techniques
-            - Productivity hacks
-            - Motivation strategies
-            - Common challenges and solutions
-            
-            🛠️ TOOLS & EQUIPMENT (if applicable):
-            - Software tools needed
-            - Physical equipment required
-            - Budget considerations
-            - Where to buy/access resources
-            
-            📋 ADDITIONAL CONTEXT & NOTES:
-            - Prerequisites and background knowledge
-            - Skill requirements
-            - Timeline considerations
-            - Legal/regulatory requirements (if applicable)
-            
-            Make this analysis practical, actionable, and valuable for someone starting this task. Focus on providing real value beyond just the basic steps.
-            """
-            
-            # Generate milestones response
-            milestones_response = self.model.generate_content(milestones_prompt)
+            return self._plan_from_model(task_name, category, duration_days, additional_context, cache_key)
+        except PlanGenerationError:
+            self.notify('warning', "⚠️ No AI response received, using fallback")
+            return self.fallback_plan('empty_response', task_name, category, duration_days)
+        except Exception as e:
+            return self.fallback_plan(self._report_failure(e), task_name, category, duration_days)
+    
+    def generate_plan(self, task_name: str, category: str, start_date: datetime, end_date: datetime, additional_context: str = ""):
+        """Like generate_milestones, but raises instead of returning fallback milestones.
+        
+        For callers such as bulk import that report failures per task.
+        """
+        duration_days = (end_date - start_date).days
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(task_name, category, duration_days, additional_context, self.generation_mode, self.prompts.version)
+            cached = self._cached_plan(cache_key)
+            if cached is not None:
+                return cached
+        
+        similar = self._similar_plan(task_name, category, duration_days, additional_context, cache_key)
+        if similar is not None:
+            return similar
+        
+        if not self.model:
+            raise PlanGenerationError(self.init_error or "AI model not available")
+        return self._plan_from_model(task_name, category, duration_days, additional_context, cache_key)
+    
+    def _plan_from_model(self, task_name: str, category: str, duration_days: int, additional_context: str, cache_key):
+        """Ask the model for a plan and cache it; raises PlanGenerationError on an empty response"""
+        # One JSON call for milestones and analysis; the two-prompt path is the fallback
+        if self.generation_mode == 'structured':
+            response = self._call_model(
+                self._build_structured_prompt(task_name, category, duration_days, additional_context),
+                generation_config=STRUCTURED_GENERATION_CONFIG
+            )
+            plan = self._parse_structured_response(response.text, task_name, duration_days)
+            if plan is not None:
+                return self._store_plan(cache_key, *plan, task_name, category, duration_days, additional_context)
+            self.notify('warning', "⚠️ Structured AI response invalid, retrying with two prompts")
+        
+        milestones_prompt, analysis_prompt = self._build_prompts(task_name, category, duration_days, additional_context)
+        
+        # Generate milestones and enhanced analysis concurrently
+        milestones_response, analysis_response = self._generate_concurrently(
+            [milestones_prompt, analysis_prompt]
+        )
+        
+        if not (milestones_response.text and analysis_response.text):
+            raise PlanGenerationError("No AI response received")
+        
+        # Parse the milestones response
+        milestones = self._parse_ai_response(milestones_response.text, task_name, duration_days)
+        
+        # Return milestones and enhanced analysis
+        return self._store_plan(cache_key, milestones, analysis_response.text, task_name, category, duration_days,
+                                additional_context)
+    
+    def generate_plan_stream(self, task_name: str, category: str, start_date: datetime, end_date: datetime, additional_context: str = ""):
+        """Streaming variant of generate_plan; raises instead of falling back.
+        
+        Yields ('milestone', Milestone) as soon as each milestone is parsed and
+        ('analysis', str) for analysis text, then a final ('done', (milestones,
+        analysis)) with the validated plan. Streamed milestones are
+        provisional: the final list may rebalance their days or top it up
+        with fallback steps. A ('reset', None) event means the structured
+        response was unusable and the milestones streamed so far should be
+        discarded before the two-prompt fallback streams its own.
+        """
+        duration_days = (end_date - start_date).days
+        
+        # Cache hits and reused similar plans have nothing to stream
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(task_name, category, duration_days, additional_context, self.generation_mode, self.prompts.version)
+            cached = self._cached_plan(cache_key)
+            if cached is not None:
+                yield from self._replay_plan(*cached)
+                return
+        
+        similar = self._similar_plan(task_name, category, duration_days, additional_context, cache_key)
+        if similar is not None:
+            yield from self._replay_plan(*similar)
+            return
+        
+        if not self.model:
+            raise PlanGenerationError(self.init_error or "AI model not available")
+        
+        if self.generation_mode == 'structured':
+            scanner = StructuredPlanStreamParser()
+            for text in self._stream_text(
+                self._build_structured_prompt(task_name, category, duration_days, additional_context),
+                generation_config=STRUCTURED_GENERATION_CONFIG
+            ):
+                for milestone in scanner.feed(text):
+                    yield 'milestone', milestone
             
-            # Generate enhanced analysis response
-            analysis_response = self.model.generate_content(analysis_prompt)
+            plan = self._parse_structured_response(scanner.text, task_name, duration_days)
+            if plan is not None:
+                milestones, analysis = self._store_plan(cache_key, *plan, task_name, category, duration_days,
+                                                        additional_context)
+                yield 'analysis', analysis
+                yield 'done', (milestones, analysis)
+                return
             
-            if milestones_response.text and analysis_response.text:
-                # Parse the milestones response
-                milestones = self._parse_ai_response(milestones_response.text, task_name, duration_days)
-                
-                # Debug: Show total allocated time
-                total_allocated = sum(m.get('estimated_days', 1) for m in milestones)
-                st.sidebar.info(f"📊 Total Allocated: {total_allocated} days (Expected: {duration_days} days)")
-                
-                # Return milestones and enhanced analysis
-                return milestones, analysis_response.text
+            self.notify('warning', "⚠️ Structured AI response invalid, retrying with two prompts")
+            yield 'reset', None
+        
+        milestones_prompt, analysis_prompt = self._build_prompts(task_name, category, duration_days, additional_context)
+        parser = MilestoneStreamParser()
+        analysis_parts = []
+        
+        for kind, text in self._stream_concurrently([milestones_prompt, analysis_prompt]):
+            if kind == 'milestones':
+                for milestone in parser.feed(text):
+                    if milestone.id <= MAX_MILESTONES:
+                        yield 'milestone', milestone
             else:
-                st.sidebar.warning("⚠️ No AI response received, using fallback")
-                fallback_milestones = self._get_fallback_milestones(task_name, category, duration_days)
-                fallback_analysis = f"""
+                analysis_parts.append(text)
+                yield 'analysis', text
+        
+        for milestone in parser.close():
+            if milestone.id <= MAX_MILESTONES:
+                yield 'milestone', milestone
+        
+        analysis = "".join(analysis_parts)
+        if not analysis:
+            raise PlanGenerationError("No AI response received")
+        
+        milestones = self._finalize_milestones(parser.milestones, task_name, duration_days)
+        yield 'done', self._store_plan(cache_key, milestones, analysis, task_name, category, duration_days, additional_context)
+    
+    def _store_plan(self, cache_key, milestones, analysis: str, task_name: str, category: str, duration_days: int,
+                    additional_context: str = ""):
+        """Cache a successfully generated plan and index it for similar tasks"""
+        logger.debug("Plan for %r allocates %d of %d days", task_name,
+                     sum(m.estimated_days for m in milestones), duration_days)
+        if cache_key is not None:
+            self.cache.put(cache_key, milestones, analysis)
+        if self.similar is not None:
+            self.similar.add(task_name, category, duration_days, additional_context, milestones, analysis, self.prompts.version)
+        
+        return milestones, analysis
+    
+    def _replay_plan(self, milestones, analysis: str):
+        """Yield a finished plan in the same event format as generate_plan_stream"""
+        for milestone in milestones:
+            yield 'milestone', milestone
+        yield 'analysis', analysis
+        yield 'done', (milestones, analysis)
+    
+    def _build_prompts(self, task_name: str, category: str, duration_days: int, additional_context: str = ""):
+        """Milestone and analysis prompts for a task"""
+        return (
+            self.prompts.build('milestones', task_name, category, duration_days, additional_context),
+            self.prompts.build('analysis', task_name, category, duration_days, additional_context),
+        )
+    
+    def _build_structured_prompt(self, task_name: str, category: str, duration_days: int, additional_context: str = ""):
+        """Single prompt asking for milestones and analysis as one JSON object"""
+        return self.prompts.build('structured', task_name, category, duration_days, additional_context)
+    
+    def _parse_structured_response(self, response_text: str, task_name: str, expected_total_days: int):
+        """Validate a structured JSON plan, repairing it if needed; None when unusable"""
+        try:
+            data = _load_json_lenient(response_text or "")
+        except ValueError:
+            return None
+        
+        if not isinstance(data, dict) or not isinstance(data.get('milestones'), list):
+            return None
+        
+        milestones = []
+        for item in data['milestones']:
+            milestone = _milestone_from_json(item, len(milestones) + 1)
+            if milestone is not None:
+                milestones.append(milestone)
+        if not milestones:
+            return None
+        
+        notes = data.get('notes')
+        analysis = _render_notes(notes) if isinstance(notes, dict) else ""
+        if not analysis:
+            analysis = self._get_fallback_analysis(task_name)
+        
+        return self._finalize_milestones(milestones, task_name, expected_total_days), analysis
+    
+    def _generate_concurrently(self, prompts, timeout: float = MODEL_CALL_TIMEOUT):
+        """Send all prompts at once and wait for the slowest, cancelling the rest on failure"""
+        futures = [_generation_pool.submit(self._call_model, prompt, timeout) for prompt in prompts]
+        
+        # Retries and fallback models are bounded by the call budget; without one (rate-limited bulk
+        # planning) each attempt is still bounded by its request timeout
+        deadline = None if self.call_budget is None else time.monotonic() + self.call_budget
+        try:
+            return [
+                future.result(timeout=None if deadline is None else max(0, deadline - time.monotonic()))
+                for future in futures
+            ]
+        except Exception:
+            # Drop calls that have not started yet; running ones are bounded by the request timeout
+            for future in futures:
+                future.cancel()
+            raise
+    
+    def _stream_concurrently(self, prompts, timeout: float = MODEL_CALL_TIMEOUT):
+        """Stream several prompts at once, yielding (kind, text_chunk) in arrival order"""
+        deadline = time.monotonic() + (self.call_budget or timeout)
+        chunks = queue.Queue()
+        finished = object()
+        cancelled = threading.Event()
+        
+        def pump(name, prompt):
+            try:
+                for text in self._stream_text(prompt, timeout, cancelled):
+                    chunks.put((name, text))
+                chunks.put((name, finished))
+            except Exception as e:
+                chunks.put((name, e))
+        
+        futures = [_generation_pool.submit(pump, prompt.kind, prompt) for prompt in prompts]
+        remaining = len(futures)
+        
+        try:
+            while remaining:
+                name, item = chunks.get(timeout=max(0, deadline - time.monotonic()))
+                if item is finished:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield name, item
+        except queue.Empty:
+            raise TimeoutError(f"Gemini streaming exceeded {self.call_budget or timeout:g}s")
+        finally:
+            # Stop the other streams if the consumer bailed out or one of them failed
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+    
+    def _parse_ai_response(self, response_text: str, task_name: str, expected_total_days: int):
+        """Parse AI response into milestone format with time allocation"""
+        return self._finalize_milestones(parse_milestones(response_text), task_name, expected_total_days)
+    
+    def _finalize_milestones(self, milestones, task_name: str, expected_total_days: int):
+        """Validate parsed milestones: fallback when empty, fix the total days, keep 3-5 steps"""
+        # If we didn't get any milestones, use fallback
+        if len(milestones) == 0:
+            self.notify('warning', "⚠️ No milestones parsed from AI response, using fallback")
+            return self._get_fallback_milestones(task_name, "General", expected_total_days)
+        
+        # Validate total time allocation
+        total_allocated = sum(milestone.estimated_days for milestone in milestones)
+        
+        # If total doesn't match expected, scale every milestone rather than absorbing the difference in the last one
+        if total_allocated != expected_total_days:
+            for milestone, days in zip(milestones, rebalance_days([m.estimated_days for m in milestones], expected_total_days)):
+                milestone.estimated_days = days
+            self.notify('info', f"🔧 Rebalanced milestones: {total_allocated} → {sum(m.estimated_days for m in milestones)} days")
+        
+        # Ensure we have at least 3 milestones
+        if len(milestones) < 3:
+            fallback_milestones = self._get_fallback_milestones(task_name, "General", expected_total_days)
+            milestones.extend(fallback_milestones[:3-len(milestones)])
+        
+        return milestones[:MAX_MILESTONES]
+    
+    def _get_fallback_milestones(self, task_name: str, category: str, total_days: int = 10):
+        """Fallback milestones when AI fails"""
+        # Distribute days across milestones
+        milestone1_days = max(1, total_days // 4)
+        milestone2_days = max(1, total_days // 2)
+        milestone3_days = max(1, total_days - milestone1_days - milestone2_days)
+        
+        return [
+            Milestone(1, f'Research and Planning for {task_name}', Priority.HIGH, estimated_days=milestone1_days,
+                      description=f'Initial research and planning phase for {task_name}'),
+            Milestone(2, f'Implementation of {task_name}', Priority.HIGH, estimated_days=milestone2_days,
+                      description=f'Main implementation work for {task_name}'),
+            Milestone(3, f'Review and Finalize {task_name}', Priority.MEDIUM, estimated_days=milestone3_days,
+                      description=f'Final review and completion of {task_name}'),
+        ]
+
+    def _get_fallback_analysis(self, task_name: str):
+        """Fallback analysis when AI fails"""
+        return f"""
 📚 LEARNING RESOURCES & EXAMPLES:
 • Research online guides and tutorials for {task_name}
 • Look for case studies and success stories
@@ -182,159 +1065,35 @@ class AITaskPlanner:
 • Plan for potential challenges and setbacks
 • Set up a support system or accountability partner
 """
-                return fallback_milestones, fallback_analysis
-                
-        except Exception as e:
-            fallback_milestones = self._get_fallback_milestones(task_name, category)
-            fallback_analysis = f"""
-📚 LEARNING RESOURCES & EXAMPLES:
-• Research online guides and tutorials for {task_name}
-• Look for case studies and success stories
-• Join relevant communities and forums
 
-🔗 USEFUL RESOURCES & REFERENCES:
-• Search for official documentation and guides
-• Find online courses or training programs
-• Connect with experts in the field
 
-💡 PRACTICAL TIPS & STRATEGIES:
-• Break down the task into smaller, manageable steps
-• Set realistic daily goals and track progress
-• Stay motivated by celebrating small wins
+_shared_planner = None
+_shared_planner_lock = threading.Lock()
 
-🛠️ TOOLS & EQUIPMENT:
-• Identify any tools or software needed
-• Research budget-friendly options
-• Plan for necessary purchases or subscriptions
 
-📋 ADDITIONAL CONTEXT & NOTES:
-• Consider prerequisites and background knowledge needed
-• Plan for potential challenges and setbacks
-• Set up a support system or accountability partner
-"""
-            return fallback_milestones, fallback_analysis
+def get_shared_planner(api_key: str = None, model_name: str = None):
+    """Process-wide planner reused across reruns and sessions.
     
-    def _parse_ai_response(self, response_text: str, task_name: str, expected_total_days: int):
-        """Parse AI response into milestone format with time allocation"""
-        import re
-        milestones = []
-        lines = response_text.strip().split('\n')
-        
-        milestone_id = 1
-        for line in lines:
-            line = line.strip()
-            
-            # Skip empty lines and headers
-            if not line or line.startswith('#'):
-                continue
-            
-            # Skip lines that are just asterisks or formatting
-            if line.strip() in ['*', '**', '***'] or line.strip().startswith('*') and len(line.strip()) <= 3:
-                continue
-            
-            # Skip lines that are clearly not milestones
-            if any(skip_word in line.lower() for skip_word in ['example', 'total:', 'requirements', 'important:', 'format', 'critical', 'for your', 'distribute the time', 'break down', 'task details', 'additional context']):
-                continue
-            
-            # Look for numbered list items (1., 2., 3., etc.)
-            if re.match(r'^\d+\.', line):
-                # Extract milestone name and time
-                milestone_name = line
-                estimated_days = 1  # Default to 1 day
-                
-                # Remove the number prefix (1., 2., etc.)
-                milestone_name = re.sub(r'^\d+\.\s*', '', milestone_name)
-                
-                # Look for time pattern: " - X days" or " - X day"
-                time_match = re.search(r'-\s*(\d+)\s*days?', line.lower())
-                if time_match:
-                    estimated_days = int(time_match.group(1))
-                    # Remove the time part from the name
-                    milestone_name = re.sub(r'\s*-\s*\d+\s*days?', '', milestone_name, flags=re.IGNORECASE)
-                
-                # Clean up the milestone name
-                milestone_name = milestone_name.strip()
-                
-                # Skip if it's still empty or too short
-                if len(milestone_name) < 3:
-                    continue
-                
-                # Filter out bad milestone names
-                bad_names = ['category', 'total duration', 'start date', 'end date', 'additional context', 'task details', 'requirements', 'examples', 'important', 'format', 'critical']
-                if milestone_name.lower().strip() in bad_names:
-                    continue
-                
-                # Skip if it contains metadata keywords
-                if any(keyword in milestone_name.lower() for keyword in ['category:', 'duration:', 'date:', 'context:', 'details:', 'example', 'total:', 'requirements']):
-                    continue
-                
-                milestones.append({
-                    'id': milestone_id,
-                    'name': milestone_name,
-                    'priority': 'Medium',
-                    'progress': 0,
-                    'completed': False,
-                    'estimated_days': estimated_days,
-                    'description': line.strip()
-                })
-                milestone_id += 1
-        
-        # If we didn't get any milestones, use fallback
-        if len(milestones) == 0:
-            st.sidebar.warning("⚠️ No milestones parsed from AI response, using fallback")
-            return self._get_fallback_milestones(task_name, "General", expected_total_days)
-        
-        # Validate total time allocation
-        total_allocated = sum(milestone.get('estimated_days', 1) for milestone in milestones)
-        
-        # If total doesn't match expected, adjust the last milestone
-        if total_allocated != expected_total_days and len(milestones) > 0:
-            difference = expected_total_days - total_allocated
-            old_days = milestones[-1]['estimated_days']
-            milestones[-1]['estimated_days'] = max(1, milestones[-1]['estimated_days'] + difference)
-            milestones[-1]['description'] = f"AI-generated milestone for {task_name} (Estimated: {milestones[-1]['estimated_days']} day{'s' if milestones[-1]['estimated_days'] > 1 else ''})"
-            st.sidebar.info(f"🔧 Adjusted last milestone: {old_days} → {milestones[-1]['estimated_days']} days (diff: {difference})")
-        
-        # Ensure we have at least 3 milestones
-        if len(milestones) < 3:
-            fallback_milestones = self._get_fallback_milestones(task_name, "General", expected_total_days)
-            milestones.extend(fallback_milestones[:3-len(milestones)])
-        
-        return milestones[:5]  # Max 5 milestones
+    genai.configure() resets the library's cached client, so building a new
+    planner per rerun also throws away the pooled connection. The shared
+    planner is rebuilt only when the API key or model name changes. Its
+    notices are only logged, as every session and worker thread uses it;
+    callers that show notices pass their own notify to a copy (see
+    with_limits()).
+    """
+    global _shared_planner
+    if api_key is None:
+        api_key = os.getenv('GEMINI_API_KEY')
+    model_name = model_name or MODEL_NAME
     
-    def _get_fallback_milestones(self, task_name: str, category: str, total_days: int = 10):
-        """Fallback milestones when AI fails"""
-        # Distribute days across milestones
-        milestone1_days = max(1, total_days // 4)
-        milestone2_days = max(1, total_days // 2)
-        milestone3_days = max(1, total_days - milestone1_days - milestone2_days)
-        
-        return [
-            {
-                'id': 1,
-                'name': f'Research and Planning for {task_name}',
-                'priority': 'High',
-                'progress': 0,
-                'completed': False,
-                'estimated_days': milestone1_days,
-                'description': f'Initial research and planning phase for {task_name} (Estimated: {milestone1_days} day{"s" if milestone1_days > 1 else ""})'
-            },
-            {
-                'id': 2,
-                'name': f'Implementation of {task_name}',
-                'priority': 'High',
-                'progress': 0,
-                'completed': False,
-                'estimated_days': milestone2_days,
-                'description': f'Main implementation work for {task_name} (Estimated: {milestone2_days} day{"s" if milestone2_days > 1 else ""})'
-            },
-            {
-                'id': 3,
-                'name': f'Review and Finalize {task_name}',
-                'priority': 'Medium',
-                'progress': 0,
-                'completed': False,
-                'estimated_days': milestone3_days,
-                'description': f'Final review and completion of {task_name} (Estimated: {milestone3_days} day{"s" if milestone3_days > 1 else ""})'
-            }
-        ]
+    with _shared_planner_lock:
+        if _shared_planner is None or not _shared_planner.matches(api_key, model_name):
+            _shared_planner = AITaskPlanner(api_key=api_key, model_name=model_name)
+        return _shared_planner
+
+
+def invalidate_shared_planner():
+    """Drop the shared planner so the next call rebuilds the client"""
+    global _shared_planner
+    with _shared_planner_lock:
+        _shared_planner = None
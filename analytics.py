@@ -0,0 +1,120 @@
+"""Columnar views of a user's tasks for the Analytics page.
+
+task_frames() flattens Task/Milestone objects into two pandas frames once
+per store revision (TaskStore.load_frames() caches them); every analytic
+below is a vectorized operation over those frames. Plain counts and totals
+come from the store's TaskStats counters instead.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from models import Priority, TaskStatus
+
+# date.toordinal() of 1970-01-01, to turn ordinals into datetime64 days
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Categorical codes, looked up per row instead of letting pandas hash the enum members
+_STATUS_CODES = {status.value: code for code, status in enumerate(TaskStatus)}
+_PRIORITY_CODES = {priority.value: code for code, priority in enumerate(Priority)}
+
+
+def _dates(values):
+    ordinals = np.fromiter((value.toordinal() for value in values), dtype=np.int64, count=len(values))
+    return pd.Series((ordinals - _EPOCH_ORDINAL).astype('datetime64[D]')).astype('datetime64[s]')
+
+
+def task_frames(tasks):
+    """(tasks, milestones) frames; milestones are ordered by task_id, position"""
+    task_frame = pd.DataFrame({
+        'id': np.fromiter((task.id for task in tasks), dtype=np.int64, count=len(tasks)),
+        'name': [task.name for task in tasks],
+        'category': pd.Categorical([task.category for task in tasks]),
+        'status': pd.Categorical.from_codes(
+            np.fromiter((_STATUS_CODES[task.status] for task in tasks), dtype=np.int8, count=len(tasks)),
+            categories=list(_STATUS_CODES),
+        ),
+        'start_date': _dates([task.start_date for task in tasks]),
+        'end_date': _dates([task.end_date for task in tasks]),
+        'created_at': pd.to_datetime([task.created_at for task in tasks], format='%Y-%m-%d %H:%M:%S', errors='coerce'),
+    })
+    task_frame['duration_days'] = (task_frame['end_date'] - task_frame['start_date']).dt.days
+
+    # Column by column: per-milestone tuples would create enough tracked objects to trigger full GC passes
+    counts = np.fromiter((len(task.milestones) for task in tasks), dtype=np.int64, count=len(tasks))
+    total = int(counts.sum())
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    milestone_frame = pd.DataFrame({
+        'task_id': np.repeat(task_frame['id'].to_numpy(), counts),
+        'position': np.arange(total, dtype=np.int64) - starts,
+        'priority': pd.Categorical.from_codes(
+            np.fromiter((_PRIORITY_CODES[milestone.priority] for task in tasks for milestone in task.milestones),
+                        dtype=np.int8, count=total),
+            categories=list(_PRIORITY_CODES),
+        ),
+        'completed': np.fromiter((milestone.completed for task in tasks for milestone in task.milestones),
+                                 dtype=bool, count=total),
+        'estimated_days': np.fromiter((milestone.estimated_days for task in tasks for milestone in task.milestones),
+                                      dtype=np.int64, count=total),
+    })
+    return task_frame, milestone_frame
+
+
+def overdue_by_category(tasks: pd.DataFrame, today: date = None):
+    """Per category: tasks past their end date, how many of those are not completed, and the rate in percent"""
+    today = pd.Timestamp(today or date.today())
+    due = tasks['end_date'] < today
+    frame = pd.DataFrame({
+        'category': tasks['category'],
+        'due': due,
+        'overdue': due & (tasks['status'] != TaskStatus.COMPLETED.value),
+    })
+    result = frame.groupby('category', observed=True)[['due', 'overdue']].sum()
+    result['rate'] = (result['overdue'] / result['due'].where(result['due'] > 0) * 100).fillna(0.0)
+    return result
+
+
+def overdue_rate(tasks: pd.DataFrame, today: date = None):
+    """Share of tasks past their end date that are still open, in percent"""
+    today = pd.Timestamp(today or date.today())
+    due = tasks['end_date'] < today
+    if not due.any():
+        return 0.0
+    return float((tasks.loc[due, 'status'] != TaskStatus.COMPLETED.value).mean() * 100)
+
+
+def burndown(tasks: pd.DataFrame, milestones: pd.DataFrame):
+    """Estimated milestone days still to do on each date if every task follows its plan.
+
+    A milestone is planned to finish when the estimates of it and the
+    milestones before it have elapsed since its task's start date.
+    """
+    if milestones.empty:
+        return pd.Series(dtype=np.int64, name='remaining_days')
+
+    starts = tasks.set_index('id')['start_date']
+    offsets = milestones.groupby('task_id', sort=False)['estimated_days'].cumsum()
+    planned = milestones['task_id'].map(starts) + pd.to_timedelta(offsets, unit='D')
+    finished = milestones['estimated_days'].groupby(planned.values).sum().sort_index().cumsum()
+    remaining = int(milestones['estimated_days'].sum()) - finished
+    remaining.index.name = 'date'
+    return remaining.rename('remaining_days')
+
+
+def open_milestone_days(milestones: pd.DataFrame):
+    """Estimated days of milestones not yet completed, the actual point to compare with burndown()"""
+    return int(milestones.loc[~milestones['completed'], 'estimated_days'].sum())
+
+
+def estimate_error_by_category(tasks: pd.DataFrame, milestones: pd.DataFrame):
+    """Per category: mean of (estimated milestone days - scheduled days) and mean absolute error in percent"""
+    estimated = milestones.groupby('task_id', sort=False)['estimated_days'].sum()
+    error = tasks['id'].map(estimated).fillna(0) - tasks['duration_days']
+    scheduled = tasks['duration_days'].where(tasks['duration_days'] > 0)
+    frame = pd.DataFrame({
+        'category': tasks['category'],
+        'mean_error_days': error,
+        'mean_abs_error_pct': (error.abs() / scheduled * 100),
+    })
+    return frame.groupby('category', observed=True).mean()
@@ -1,10 +1,19 @@
 import streamlit as st
-import json
 import os
+import time
+from collections import deque
 from datetime import datetime, timedelta
-import pandas as pd
-import plotly.express as px
-from ai_service import AITaskPlanner
+from ai_service import MAX_RETRIES, REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, get_shared_planner
+from bulk_import import BULK_WORKERS, BulkImporter, parse_task_list
+from card_html import RenderCache, milestone_card_html, milestone_preview_html, task_card_html
+from metrics import serve_metrics
+from models import TaskStatus
+from plan_jobs import PLAN_JOB_POLL_SECONDS, get_plan_queue
+from scheduler import UserSchedule
+from task_store import ConcurrentModificationError, get_task_store
+
+# Start of this script run, for the interaction timings in the sidebar
+run_started = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -14,7 +23,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
+# Custom CSS. Streamlit drops any element a full rerun does not emit again, so the style
+# block is re-sent once per full run; fragment reruns (task cards, job polling) skip it.
 st.markdown("""
 <style>
     .main-header {
@@ -89,64 +99,221 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state with user-specific data
-if 'tasks' not in st.session_state:
-    st.session_state.tasks = []
+# Identify the user: "session" gives every browser its own ID (kept in the page URL so
+# a bookmark or reload returns to the same tasks); "machine" keeps the old per-host ID
+IDENTITY_MODE = os.getenv('TASK_PLANNER_IDENTITY', 'session')
 
-# Generate a persistent user ID based on browser/machine
-if 'user_id' not in st.session_state:
+# The per-host ID every session used before "session" became the default
+def machine_user_id():
     import hashlib
     import platform
     import getpass
-    import os
     
     try:
         # Create a persistent user ID based on machine info
         machine_info = f"{platform.node()}{getpass.getuser()}{platform.system()}"
-        st.session_state.user_id = hashlib.md5(machine_info.encode()).hexdigest()[:8]
+        return hashlib.md5(machine_info.encode()).hexdigest()[:8]
     except:
-        # Fallback: use environment variables or create a file-based ID
-        try:
-            fallback_info = f"{os.environ.get('USER', 'user')}{os.environ.get('HOSTNAME', 'host')}"
-            st.session_state.user_id = hashlib.md5(fallback_info.encode()).hexdigest()[:8]
-        except:
-            # Last resort: use a fixed ID for this deployment
-            st.session_state.user_id = "default01"
+        # Last resort: use a fixed ID for this deployment
+        return "default01"
+
+if 'user_id' not in st.session_state:
+    if IDENTITY_MODE == 'machine':
+        st.session_state.user_id = machine_user_id()
+    else:
+        import uuid
+        
+        user_id = st.query_params.get('uid', '')
+        if not (user_id.isalnum() and 8 <= len(user_id) <= 32):
+            # One-time upgrade path: while tasks_data_<machine id>.json from the per-host days is still
+            # waiting to be imported, the first new session takes over that ID (and keeps it in its URL);
+            # the import renames the file, so later sessions get IDs of their own. Tasks already imported
+            # under the machine ID stay reachable with ?uid=<machine id>.
+            user_id = machine_user_id()
+            if not os.path.exists(f"tasks_data_{user_id}.json"):
+                user_id = uuid.uuid4().hex[:12]
+        st.session_state.user_id = user_id
+
+if IDENTITY_MODE != 'machine':
+    st.query_params['uid'] = st.session_state.user_id
 
-# User-specific file path
+# Task categories offered when creating a task
+CATEGORIES = ["Personal", "Work", "Health", "Learning", "Finance", "Other"]
+
+# Shared task store; each mutation below writes only the rows it changes
+task_store = get_task_store()
+
+# Legacy user-specific JSON file, imported into the store on first load
 def get_user_file_path():
     return f"tasks_data_{st.session_state.user_id}.json"
 
-# Load tasks from user-specific file
-def load_tasks():
-    file_path = get_user_file_path()
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r') as f:
-                st.session_state.tasks = json.load(f)
-        except:
-            st.session_state.tasks = []
-    else:
-        st.session_state.tasks = []
+# Import any legacy file, then read the counters the store maintains; pages query
+# only the tasks they show instead of loading the whole list on every rerun
+def load_stats():
+    task_store.migrate_json(st.session_state.user_id, get_user_file_path())
+    st.session_state.stats = task_store.load_stats(st.session_state.user_id)
+
+# Render milestone cards of a new plan, final or still streaming in
+def render_milestone_cards(milestones):
+    for milestone in milestones:
+        st.markdown(milestone_preview_html(milestone), unsafe_allow_html=True)
+
+# Recent interaction latencies, newest last, shown in the sidebar
+if 'timings' not in st.session_state:
+    st.session_state.timings = deque(maxlen=10)
+
+# Card HTML of recently shown tasks, re-rendered only when a task's version changes
+if 'render_cache' not in st.session_state:
+    st.session_state.render_cache = RenderCache()
 
-# Save tasks to user-specific file
-def save_tasks():
-    file_path = get_user_file_path()
-    with open(file_path, 'w') as f:
-        json.dump(st.session_state.tasks, f, indent=2, default=str)
+# Milestone dates and projected finishes of the user's tasks, rescheduled per changed task
+if 'schedule' not in st.session_state:
+    st.session_state.schedule = UserSchedule()
 
-# Load tasks on startup
-load_tasks()
+def record_timing(label, started):
+    st.session_state.timings.append((label, (time.perf_counter() - started) * 1000))
+
+# Task card mutations: one single-row store write, mirrored onto the task object so the
+# card's fragment can rerender on its own. They run as button callbacks, before the rerun.
+def complete_task(task):
+    st.session_state.interaction = (task.id, "Mark Complete", time.perf_counter())
+    try:
+        task.version = task_store.update_task_status(
+            st.session_state.user_id, task.id, TaskStatus.COMPLETED, task.version
+        )
+        task.status = TaskStatus.COMPLETED
+        st.session_state.render_cache.discard(task.id)
+        st.session_state.schedule.update_task(task)
+    except ConcurrentModificationError:
+        st.session_state.store_conflict = True
+
+def toggle_milestone(task, position):
+    st.session_state.interaction = (task.id, "Toggle milestone", time.perf_counter())
+    milestone = task.milestones[position]
+    try:
+        task.version = task_store.set_milestone_completed(
+            st.session_state.user_id, task.id, position, not milestone.completed, task.version
+        )
+        milestone.completed = not milestone.completed
+        st.session_state.render_cache.discard(task.id)
+        st.session_state.schedule.update_task(task)
+    except ConcurrentModificationError:
+        st.session_state.store_conflict = True
+
+# One task on the My Tasks page. As a fragment, clicks inside it rerun only this card;
+# the sidebar and dashboard counters catch up on the next full rerun.
+@st.fragment
+def render_task_card(task):
+    if st.session_state.get('store_conflict'):
+        # Someone else changed the task: reload the whole page to show the latest version
+        st.rerun()
+    
+    with st.container(border=True):
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            done = sum(milestone.completed for milestone in task.milestones)
+            st.markdown(f"**{task.name}** · {task.category} · {task.status.title()}")
+            st.caption(f"{task.start_date} → {task.end_date} · {done}/{len(task.milestones)} milestones done")
+            schedule = st.session_state.schedule.get(task.id)
+            if schedule is not None and schedule.projected_finish is not None:
+                if schedule.late_days > 0:
+                    st.caption(f"⚠️ Projected to finish {schedule.projected_finish}, "
+                               f"{schedule.late_days} working day{'s' if schedule.late_days != 1 else ''} late")
+                else:
+                    st.caption(f"🏁 Projected to finish {schedule.projected_finish}")
+        
+        with col2:
+            # Planning tasks get their milestones (and status) from the background job first
+            st.button("Mark Complete", key=f"complete_{task.id}", on_click=complete_task, args=(task,),
+                      disabled=task.status == TaskStatus.PLANNING)
+        
+        # Milestone widgets are only built for tasks the user has opened
+        if task.milestones and st.toggle("🎯 Show milestones", key=f"expand_{task.id}"):
+            render_cache = st.session_state.render_cache
+            for position, milestone in enumerate(task.milestones):
+                col_milestone, col_button = st.columns([4, 1])
+                
+                with col_milestone:
+                    # Scheduled dates move with today's date, not only with the task's version
+                    slot = schedule.slots[position] if schedule is not None else None
+                    key = ('milestone', position) + ((slot.start, slot.end, slot.critical) if slot else ())
+                    st.markdown(render_cache.get(task, key, lambda: milestone_card_html(milestone, slot)),
+                                unsafe_allow_html=True)
+                
+                with col_button:
+                    st.button("Toggle", key=f"milestone_{task.id}_{position}", type="secondary",
+                              on_click=toggle_milestone, args=(task, position))
+        
+        # Click-to-rendered latency of the interaction that reran this card
+        interaction = st.session_state.get('interaction')
+        if interaction is not None and interaction[0] == task.id:
+            del st.session_state.interaction
+            record_timing(interaction[1], interaction[2])
+            st.caption(f"⏱️ {interaction[1]}: {st.session_state.timings[-1][1]:.1f} ms")
 
-# Initialize AI service (no caching to ensure updates are deployed)
-ai_service = AITaskPlanner()
+# Load stats on startup
+load_stats()
+
+# A write lost an optimistic-concurrency race on the previous run
+if st.session_state.pop('store_conflict', None):
+    st.warning("⚠️ That task was changed in another session, so your last change was not applied. Showing the latest version.")
+
+# Planner notices arrive on worker threads, which have no ScriptRunContext: they are queued
+# and shown in the sidebar (st.info, st.warning, ...) from the script thread
+def show_notices(notices):
+    while notices:
+        level, message = notices.popleft()
+        getattr(st.sidebar, level)(message)
+
+# Shared AI service, rebuilt only when GEMINI_API_KEY or GEMINI_MODEL changes; shared by
+# every session, so its own notices only go to the log
+ai_service = get_shared_planner(os.getenv('GEMINI_API_KEY'), os.getenv('GEMINI_MODEL'))
+
+# Background plan generation; jobs survive reruns, navigation and server restarts
+plan_queue = get_plan_queue()
+
+# Re-queue tasks a crash left in 'planning' without a job, once per session
+if 'planning_recovered' not in st.session_state:
+    plan_queue.recover(st.session_state.user_id)
+    st.session_state.planning_recovered = True
+
+# Optional Prometheus scrape endpoint; Streamlit itself cannot serve /metrics
+if os.getenv('PLANNER_METRICS_PORT'):
+    serve_metrics(int(os.getenv('PLANNER_METRICS_PORT')))
+
+if not ai_service.api_key:
+    st.error("❌ GEMINI_API_KEY not found in environment variables")
+    st.info("Please create a .env file with: GEMINI_API_KEY=your_key_here")
+elif ai_service.init_error:
+    # Set once the client has been configured, on the first page that needs the model
+    st.sidebar.error(f"❌ AI Service Error: {ai_service.init_error}")
+else:
+    st.sidebar.success("✅ AI Service Ready")
 
 # Main header
 st.markdown('<h1 class="main-header">🤖 AI Task Planner by Pushp Chehal</h1>', unsafe_allow_html=True)
 
+# Tasks still being planned, with the milestones of the task submitted last as they stream in.
+# Only this fragment polls; once the last job finishes it reruns the whole page so counters,
+# task lists and the new plan show up.
+def render_planning_jobs():
+    active_jobs = plan_queue.jobs(st.session_state.user_id, active_only=True)
+    if not active_jobs:
+        st.rerun()
+    names = ", ".join(f"'{job.task_name}'" for job in active_jobs[:3]) + (" ..." if len(active_jobs) > 3 else "")
+    st.info(f"🧠 Generating milestones for {len(active_jobs)} task{'s' if len(active_jobs) != 1 else ''}: {names}")
+    for job in active_jobs:
+        if job.task_id == st.session_state.get('last_planned_task') and job.milestones:
+            st.caption(f"Milestones of '{job.task_name}' so far (provisional):")
+            render_milestone_cards(job.milestones)
+
+if plan_queue.jobs(st.session_state.user_id, active_only=True, limit=1):
+    st.fragment(render_planning_jobs, run_every=PLAN_JOB_POLL_SECONDS)()
+
 # Sidebar navigation
 st.sidebar.markdown("## 🧭 Navigation")
-page = st.sidebar.selectbox("Choose a page", ["Dashboard", "Create Task", "My Tasks", "Analytics"])
+page = st.sidebar.selectbox("Choose a page", ["Dashboard", "Create Task", "Bulk Import", "My Tasks", "Analytics", "Diagnostics"])
 
 # Add some spacing
 st.sidebar.markdown("---")
@@ -154,7 +321,10 @@ st.sidebar.markdown("---")
 # User indicator
 st.sidebar.markdown("### 👤 Your Account")
 st.sidebar.info(f"User ID: `{st.session_state.user_id}`")
-st.sidebar.caption("Your tasks are saved permanently to this machine")
+if IDENTITY_MODE == 'machine':
+    st.sidebar.caption("Your tasks are saved permanently to this machine")
+else:
+    st.sidebar.caption("Bookmark this page's URL to come back to your tasks")
 
 # Add some spacing
 st.sidebar.markdown("---")
@@ -162,27 +332,48 @@ st.sidebar.markdown("---")
 # Data management
 st.sidebar.markdown("### 🗂️ Data Management")
 if st.sidebar.button("🗑️ Clear All Tasks", type="secondary"):
-    st.session_state.tasks = []
-    save_tasks()
+    task_store.clear_tasks(st.session_state.user_id)
     st.sidebar.success("All tasks cleared!")
     st.rerun()
 
 st.sidebar.markdown("---")
 
-# Quick stats in sidebar
-if st.session_state.tasks:
+# AI response cache counters
+if ai_service.cache is not None:
+    st.sidebar.markdown("### ⚡ AI Response Cache")
+    cache_stats = ai_service.cache.stats()
+    
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        st.metric("Hits", cache_stats['hits'])
+    with col2:
+        st.metric("Misses", cache_stats['misses'])
+    st.sidebar.caption(f"{cache_stats['entries']} cached plans"
+                       + (f" · {len(ai_service.similar)} reusable for similar tasks" if ai_service.similar is not None else ""))
+    
+    st.sidebar.markdown("---")
+
+# Latency of recent interactions (recorded at the end of each run, so this shows earlier ones)
+if st.session_state.timings:
+    with st.sidebar.expander("⏱️ Interaction Timing"):
+        for label, elapsed_ms in reversed(st.session_state.timings):
+            st.caption(f"{label}: {elapsed_ms:.1f} ms")
+    
+    st.sidebar.markdown("---")
+
+# Quick stats in sidebar, read from the store's counters instead of scanning the tasks
+stats = st.session_state.stats
+if stats.total:
     st.sidebar.markdown("### 📊 Quick Stats")
-    total_tasks = len(st.session_state.tasks)
-    completed_tasks = len([t for t in st.session_state.tasks if t.get('status') == 'completed'])
     
     col1, col2 = st.sidebar.columns(2)
     with col1:
-        st.metric("Total", total_tasks)
+        st.metric("Total", stats.total)
     with col2:
-        st.metric("Done", completed_tasks)
+        st.metric("Done", stats.completed)
     
-    if total_tasks > 0:
-        completion_rate = (completed_tasks / total_tasks * 100)
+    if stats.total > 0:
+        completion_rate = stats.completion_rate
         st.sidebar.progress(completion_rate / 100)
         st.sidebar.caption(f"{completion_rate:.1f}% Complete")
     
@@ -195,10 +386,11 @@ if page == "Dashboard":
     # Quick stats
     col1, col2, col3, col4 = st.columns(4)
     
-    total_tasks = len(st.session_state.tasks)
-    completed_tasks = len([t for t in st.session_state.tasks if t.get('status') == 'completed'])
-    in_progress_tasks = len([t for t in st.session_state.tasks if t.get('status') == 'in_progress'])
-    pending_tasks = total_tasks - completed_tasks - in_progress_tasks
+    total_tasks = stats.total
+    completed_tasks = stats.completed
+    in_progress_tasks = stats.in_progress
+    # Tasks still being planned are not started either; counted here so the cards add up to Total
+    pending_tasks = stats.pending + stats.planning
     
     with col1:
         st.markdown(f"""
@@ -225,27 +417,18 @@ if page == "Dashboard":
         st.markdown(f"""
         <div class="stats-card">
             <div class="stats-number">{pending_tasks}</div>
-            <div class="stats-label">Pending</div>
+            <div class="stats-label">Pending{f" ({stats.planning} planning)" if stats.planning else ""}</div>
         </div>
         """, unsafe_allow_html=True)
     
     # Recent tasks
     st.subheader("📋 Recent Tasks")
-    if st.session_state.tasks:
-        recent_tasks = st.session_state.tasks[-5:]  # Last 5 tasks
-        for task in reversed(recent_tasks):
-            category_class = f"category-{task['category'].lower()}"
-            status_emoji = {"completed": "✅", "in_progress": "🔄", "pending": "⏳"}.get(task.get('status', 'pending'), "⏳")
-            
+    if stats.total:
+        recent_tasks, _ = task_store.query_tasks(st.session_state.user_id, descending=True, limit=5)  # Last 5 tasks
+        for task in recent_tasks:
             with st.container():
-                st.markdown(f"""
-                <div class="task-card">
-                    <h4>{task['name']}</h4>
-                    <p><span class="category-badge {category_class}">{task['category']}</span></p>
-                    <p><strong>Status:</strong> {status_emoji} {task.get('status', 'pending').title()}</p>
-                    <p><strong>Due:</strong> {task['end_date']}</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(st.session_state.render_cache.get(task, ('task',), lambda: task_card_html(task)),
+                            unsafe_allow_html=True)
     else:
         st.info("🎯 No tasks yet. Create your first task to get started!")
 
@@ -258,7 +441,7 @@ elif page == "Create Task":
         
         with col1:
             task_name = st.text_input("Task Name", placeholder="Enter task name...")
-            category = st.selectbox("Category", ["Personal", "Work", "Health", "Learning", "Finance", "Other"])
+            category = st.selectbox("Category", CATEGORIES)
         
         with col2:
             start_date = st.date_input("Start Date", value=datetime.now().date())
@@ -272,73 +455,64 @@ elif page == "Create Task":
         if submitted:
             if task_name and start_date and end_date:
                 if end_date > start_date:
-                    # Generate AI milestones
-                    with st.spinner("🤖 Generating AI-powered milestones..."):
-                        milestones, ai_response = ai_service.generate_milestones(
-                            task_name, category, start_date, end_date, additional_context
-                        )
-                        
-                        # Store AI response in session state for copy button
-                        st.session_state.latest_ai_response = ai_response
-                    
-                    # Create task
-                    new_task = {
-                        'id': len(st.session_state.tasks) + 1,
-                        'name': task_name,
-                        'category': category,
-                        'start_date': start_date.strftime('%Y-%m-%d'),
-                        'end_date': end_date.strftime('%Y-%m-%d'),
-                        'status': 'pending',
-                        'milestones': milestones,
-                        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    
-                    st.session_state.tasks.append(new_task)
-                    save_tasks()
-                    
-                    st.success(f"✅ Task '{task_name}' created successfully with {len(milestones)} AI-generated milestones!")
-                    
-                    # Create two columns for better layout
-                    col1, col2 = st.columns([1, 1])
-                    
-                    with col1:
-                        # Show generated milestones (smaller section)
-                        st.subheader("🎯 AI-Generated Milestones")
-                        
-                        # Calculate total estimated days
-                        total_estimated = sum(milestone.get('estimated_days', 1) for milestone in milestones)
-                        duration_days = (end_date - start_date).days
-                        
-                        st.info(f"📅 **Total Task Duration:** {duration_days} days | **Estimated Milestone Time:** {total_estimated} days")
-                        
-                        for i, milestone in enumerate(milestones, 1):
-                            estimated_days = milestone.get('estimated_days', 1)
-                            time_emoji = "⏰" if estimated_days <= 1 else "📅"
-                            
-                            st.markdown(f"""
-                            <div class="milestone-item">
-                                <h5>📌 {milestone['name']}</h5>
-                                <p><strong>Time:</strong> {time_emoji} {estimated_days} day{'s' if estimated_days > 1 else ''}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    
-                    with col2:
-                        # Show detailed AI response (larger section)
-                        st.subheader("🤖 Detailed AI Analysis")
-                        
-                        # Display the AI response in a text area
-                        st.text_area(
-                            "AI Generated Content:",
-                            value=ai_response,
-                            height=400,
-                            key="ai_response_main",
-                            label_visibility="collapsed"
-                        )
+                    # Saved straight away; a background job fills in the milestones
+                    new_task = plan_queue.submit(st.session_state.user_id, task_name, category, start_date, end_date,
+                                                 additional_context)
+                    st.session_state.last_planned_task = new_task.id
+                    st.session_state.planning_submitted = task_name
+                    # The polling fragment above is only set up when a job is active at that point of the run
+                    st.rerun()
                 else:
                     st.error("End date must be after start date!")
             else:
                 st.error("Please fill in all required fields!")
     
+    submitted_name = st.session_state.pop('planning_submitted', None)
+    if submitted_name is not None:
+        st.success(f"✅ Task '{submitted_name}' saved. Its AI milestones are being generated in the background; "
+                   "you can keep working or leave this page.")
+    
+    # Plan of the task submitted last, once its job has finished
+    last_job = None
+    if st.session_state.get('last_planned_task') is not None:
+        last_job = plan_queue.job_for_task(st.session_state.user_id, st.session_state.last_planned_task)
+    if last_job is not None and last_job.state == 'done':
+        milestones = last_job.milestones
+        ai_response = last_job.analysis
+        
+        # Store AI response in session state for copy button
+        st.session_state.latest_ai_response = ai_response
+        
+        if last_job.fallback:
+            st.warning(f"⚠️ The AI could not plan '{last_job.task_name}' ({last_job.error}); "
+                       f"it was given {len(milestones)} template milestones instead.")
+        else:
+            st.success(f"✅ Task '{last_job.task_name}' planned with {len(milestones)} AI-generated milestones!")
+        
+        # Create two columns for better layout
+        col1, col2 = st.columns([1, 1])
+        
+        with col1:
+            # Show generated milestones (smaller section)
+            st.subheader("📋 Template Milestones" if last_job.fallback else "🎯 AI-Generated Milestones")
+            duration_days = (last_job.end_date - last_job.start_date).days
+            total_estimated = sum(milestone.estimated_days for milestone in milestones)
+            st.info(f"📅 **Total Task Duration:** {duration_days} days | **Estimated Milestone Time:** {total_estimated} days")
+            render_milestone_cards(milestones)
+        
+        with col2:
+            # Show detailed AI response (larger section)
+            st.subheader("🤖 Detailed AI Analysis")
+            st.text_area(
+                "AI Generated Content:",
+                value=ai_response,
+                height=400,
+                key="ai_response_main",
+                label_visibility="collapsed"
+            )
+    elif last_job is not None and last_job.state == 'failed':
+        st.error(f"❌ Planning '{last_job.task_name}' failed: {last_job.error}")
+    
     # Add copy button outside the form (only show if we have AI response)
     if hasattr(st.session_state, 'latest_ai_response') and st.session_state.latest_ai_response:
         st.markdown("---")
@@ -349,98 +523,161 @@ elif page == "Create Task":
                 # Note: In a real implementation, you'd use JavaScript to copy to clipboard
                 # For now, we'll just show a success message
 
+# Bulk Import Page
+elif page == "Bulk Import":
+    st.header("📥 Bulk Import")
+    st.write("Create many tasks at once from a CSV or JSON list. Each task gets its own AI plan.")
+    st.caption("Columns: `name` (required), `category`, `start_date`, `end_date` or `duration_days`, `context`. Dates as YYYY-MM-DD.")
+    
+    uploaded = st.file_uploader("Upload a CSV or JSON file", type=["csv", "json"])
+    pasted = st.text_area("...or paste the list", height=150,
+                          placeholder="name,category,duration_days\nLearn Rust,Learning,30\nPlan offsite,Work,14")
+    
+    with st.expander("⚙️ Generation limits"):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            workers = st.number_input("Parallel plans", 1, 32, BULK_WORKERS)
+        with col2:
+            requests_per_minute = st.number_input("Requests / minute", 1, 10000, REQUESTS_PER_MINUTE)
+        with col3:
+            tokens_per_minute = st.number_input("Tokens / minute", 1000, 100_000_000, TOKENS_PER_MINUTE, step=1000)
+        with col4:
+            max_retries = st.number_input("Retries on 429/5xx", 0, 10, MAX_RETRIES)
+    
+    if st.button("🚀 Generate Plans", type="primary"):
+        text = uploaded.getvalue().decode('utf-8-sig') if uploaded is not None else pasted
+        try:
+            specs, rejected = parse_task_list(text)
+        except ValueError as e:
+            specs, rejected = [], [f"could not read the list: {e}"]
+        
+        for message in rejected:
+            st.warning(f"⚠️ Skipped {message}")
+        
+        if not specs:
+            st.error("❌ No tasks to import")
+        elif ai_service.model is None:
+            st.error("❌ Bulk import needs the AI service; check GEMINI_API_KEY")
+        else:
+            notices = deque()
+            importer = BulkImporter(ai_service, task_store, int(workers), int(requests_per_minute),
+                                    int(tokens_per_minute), int(max_retries),
+                                    notify=lambda level, message: notices.append((level, message)))
+            progress = st.progress(0.0, text=f"Planning {len(specs)} tasks...")
+            log = st.container()
+            results = []
+            for result in importer.plan(specs):
+                results.append(result)
+                show_notices(notices)
+                progress.progress(len(results) / len(specs), text=f"Planned {len(results)} of {len(specs)} tasks")
+                if result.error:
+                    log.error(f"❌ Row {result.spec.row} ({result.spec.name}): {result.error}")
+                else:
+                    log.write(f"✅ {result.spec.name}: {len(result.task.milestones)} milestones")
+            
+            saved = importer.save(st.session_state.user_id, results)
+            failed = len(results) - len(saved)
+            st.success(f"✅ Imported {len(saved)} task{'s' if len(saved) != 1 else ''}"
+                       + (f", {failed} failed" if failed else ""))
+
 # My Tasks Page
 elif page == "My Tasks":
     st.header("📋 My Tasks")
     
-    if st.session_state.tasks:
-        for task in st.session_state.tasks:
-            with st.expander(f"{task['name']} - {task['category']} ({task.get('status', 'pending').title()})"):
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    st.write(f"**Start Date:** {task['start_date']}")
-                    st.write(f"**End Date:** {task['end_date']}")
-                    st.write(f"**Status:** {task.get('status', 'pending').title()}")
-                
-                with col2:
-                    if st.button(f"Mark Complete", key=f"complete_{task['id']}"):
-                        task['status'] = 'completed'
-                        save_tasks()
-                        st.rerun()
-                
-                # Show milestones
-                if 'milestones' in task:
-                    st.subheader("🎯 Milestones")
-                    for milestone in task['milestones']:
-                        milestone_status = "✅ Completed" if milestone.get('completed', False) else "⏳ Pending"
-                        milestone_class = "completed" if milestone.get('completed', False) else ""
-                        priority_emoji = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}.get(milestone['priority'], "🟡")
-                        
-                        col_milestone, col_button = st.columns([4, 1])
-                        
-                        with col_milestone:
-                            estimated_days = milestone.get('estimated_days', 1)
-                            time_emoji = "⏰" if estimated_days <= 1 else "📅"
-                            
-                            st.markdown(f"""
-                            <div class="milestone-item {milestone_class}">
-                                <h6>📌 {milestone['name']}</h6>
-                                <p><strong>Priority:</strong> {priority_emoji} {milestone['priority']} | <strong>Time:</strong> {time_emoji} {estimated_days} day{'s' if estimated_days > 1 else ''} | <strong>Status:</strong> {milestone_status}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        with col_button:
-                            if st.button("Toggle", key=f"milestone_{task['id']}_{milestone['id']}", type="secondary"):
-                                milestone['completed'] = not milestone.get('completed', False)
-                                save_tasks()
-                                st.rerun()
+    if stats.total:
+        # Reloaded only when the store changed since the last sync, and then only changed tasks are rescheduled
+        schedule = st.session_state.schedule
+        schedule.sync(task_store, st.session_state.user_id)
+        last = schedule.last_to_finish()
+        if last is not None:
+            with st.expander("🗓️ Schedule"):
+                chain = " → ".join(last.milestone_names[position] for position in last.chain)
+                st.write(f"**Critical path:** {last.task_name} finishes last, on {last.projected_finish}: {chain}")
+                late = schedule.late_tasks()
+                for task_schedule in late:
+                    st.warning(f"⚠️ {task_schedule.task_name}: {task_schedule.late_days} working day"
+                               f"{'s' if task_schedule.late_days != 1 else ''} past its end date")
+                if not late:
+                    st.success("✅ Every task is on track to finish by its end date")
+        
+        # Filters and sorting run in the store, which returns only the current page
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            status_filter = st.multiselect("Status", [status.value for status in TaskStatus],
+                                           format_func=lambda value: value.replace('_', ' ').title())
+        with col2:
+            category_filter = st.multiselect("Category", sorted(set(CATEGORIES) | set(stats.by_category)))
+        with col3:
+            date_range = st.date_input("Scheduled between", value=(), help="Tasks whose schedule overlaps this range")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_keys = {"Created": 'created', "Due Date": 'due', "Start Date": 'start', "Name": 'name', "Status": 'status'}
+            sort = sort_keys[st.selectbox("Sort by", list(sort_keys))]
+        with col2:
+            descending = st.toggle("Descending", value=sort == 'created')
+        with col3:
+            page_size = st.selectbox("Tasks per page", [10, 20, 50], index=1)
+        
+        date_from = date_range[0] if len(date_range) > 0 else None
+        date_to = date_range[1] if len(date_range) > 1 else None
+        page_number = st.session_state.get('my_tasks_page', 1)
+        
+        tasks, matching = task_store.query_tasks(
+            st.session_state.user_id, status_filter, category_filter, date_from, date_to,
+            sort, descending, (page_number - 1) * page_size, page_size
+        )
+        page_count = max(1, -(-matching // page_size))
+        if page_number > page_count:
+            # The filters left fewer pages than the one being shown
+            st.session_state.my_tasks_page = page_count
+            st.rerun()
+        
+        st.caption(f"{matching} matching task{'s' if matching != 1 else ''} · page {page_number} of {page_count}")
+        
+        for task in tasks:
+            render_task_card(task)
+        
+        # Page navigation
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("⬅️ Previous", disabled=page_number <= 1):
+                st.session_state.my_tasks_page = page_number - 1
+                st.rerun()
+        with col3:
+            if st.button("Next ➡️", disabled=page_number >= page_count):
+                st.session_state.my_tasks_page = page_number + 1
+                st.rerun()
     else:
         st.info("No tasks created yet. Go to 'Create Task' to get started!")
 
 # Analytics Page
 elif page == "Analytics":
+    # pandas and plotly take most of a cold start; only the chart pages import them
+    import pandas as pd
+    import plotly.express as px
+    import analytics
+    
     st.header("📈 Analytics")
     
-    if st.session_state.tasks:
-        # Task completion rate
-        completed = len([t for t in st.session_state.tasks if t.get('status') == 'completed'])
-        total = len(st.session_state.tasks)
-        completion_rate = (completed / total * 100) if total > 0 else 0
-        
-        # Time allocation analysis
-        total_estimated_days = 0
-        total_actual_days = 0
-        
-        for task in st.session_state.tasks:
-            if 'milestones' in task:
-                for milestone in task['milestones']:
-                    total_estimated_days += milestone.get('estimated_days', 1)
-            
-            # Calculate actual task duration
-            try:
-                start_date = datetime.strptime(task['start_date'], '%Y-%m-%d')
-                end_date = datetime.strptime(task['end_date'], '%Y-%m-%d')
-                total_actual_days += (end_date - start_date).days
-            except:
-                pass
-        
-        col1, col2, col3 = st.columns(3)
+    if stats.total:
+        # Completion and time allocation, all from the maintained counters
+        col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Task Completion Rate", f"{completion_rate:.1f}%")
+            st.metric("Task Completion Rate", f"{stats.completion_rate:.1f}%")
         
         with col2:
-            st.metric("Total Estimated Days", f"{total_estimated_days}")
+            st.metric("Milestones Done", f"{stats.milestones_completed}/{stats.milestones}")
         
         with col3:
-            st.metric("Total Actual Days", f"{total_actual_days}")
+            st.metric("Total Estimated Days", f"{stats.estimated_days}")
+        
+        with col4:
+            st.metric("Total Actual Days", f"{stats.actual_days}")
         
         # Category breakdown
-        categories = {}
-        for task in st.session_state.tasks:
-            cat = task['category']
-            categories[cat] = categories.get(cat, 0) + 1
+        categories = stats.by_category
         
         if categories:
             df = pd.DataFrame(list(categories.items()), columns=['Category', 'Count'])
@@ -448,18 +685,125 @@ elif page == "Analytics":
             st.plotly_chart(fig, use_container_width=True)
         
         # Status breakdown
-        statuses = {}
-        for task in st.session_state.tasks:
-            status = task.get('status', 'pending')
-            statuses[status] = statuses.get(status, 0) + 1
+        statuses = stats.by_status
         
         if statuses:
             df_status = pd.DataFrame(list(statuses.items()), columns=['Status', 'Count'])
             fig_status = px.bar(df_status, x='Status', y='Count', title="Tasks by Status")
             st.plotly_chart(fig_status, use_container_width=True)
+
+        # Schedule analytics, vectorized over the store's cached columnar frames
+        task_frame, milestone_frame = task_store.load_frames(st.session_state.user_id)
+
+        st.subheader("⏰ Overdue Tasks")
+        st.metric("Overdue Rate", f"{analytics.overdue_rate(task_frame):.1f}%",
+                  help="Share of tasks past their end date that are not completed")
+        overdue = analytics.overdue_by_category(task_frame)
+        if overdue['due'].any():
+            fig_overdue = px.bar(overdue.reset_index(), x='category', y='rate',
+                                 labels={'category': 'Category', 'rate': 'Overdue %'}, title="Overdue Rate by Category")
+            st.plotly_chart(fig_overdue, use_container_width=True)
+
+        st.subheader("📉 Burndown")
+        remaining = analytics.burndown(task_frame, milestone_frame)
+        if not remaining.empty:
+            fig_burndown = px.line(remaining.reset_index(), x='date', y='remaining_days',
+                                   labels={'date': 'Date', 'remaining_days': 'Remaining Days'},
+                                   title="Planned Remaining Milestone Days")
+            st.plotly_chart(fig_burndown, use_container_width=True)
+            st.caption(f"Actually open today: {analytics.open_milestone_days(milestone_frame)} estimated days of milestones")
+
+        st.subheader("🎯 Estimate Accuracy")
+        estimate_error = analytics.estimate_error_by_category(task_frame, milestone_frame)
+        if not estimate_error.empty:
+            fig_error = px.bar(estimate_error.reset_index(), x='category', y='mean_error_days',
+                               hover_data=['mean_abs_error_pct'],
+                               labels={'category': 'Category', 'mean_error_days': 'Estimated - Scheduled (days)',
+                                       'mean_abs_error_pct': 'Mean Abs. Error %'},
+                               title="Milestone Estimate Error by Category")
+            st.plotly_chart(fig_error, use_container_width=True)
     else:
         st.info("No data available yet. Create some tasks to see analytics!")
 
+# Diagnostics Page
+elif page == "Diagnostics":
+    import pandas as pd
+    import plotly.express as px
+    
+    st.header("🩺 Diagnostics")
+    st.write("Gemini calls made by this server process. Daily token spend is kept across restarts.")
+    
+    model_metrics = ai_service.metrics
+    totals = model_metrics.totals()
+    lookups = totals['cache_hits'] + totals['cache_misses']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Model Calls", totals['calls'])
+    with col2:
+        st.metric("Failed Calls", totals['errors'], help=f"{totals['retries']} calls were retries")
+    with col3:
+        st.metric("Tokens", f"{totals['prompt_tokens'] + totals['response_tokens']:,}",
+                  help=f"{totals['prompt_tokens']:,} prompt / {totals['response_tokens']:,} response")
+    with col4:
+        st.metric("Cache Hit Rate", f"{totals['cache_hits'] / lookups * 100:.1f}%" if lookups else "n/a",
+                  help=f"Exact matches; {totals['similar_hits']} more misses reused a similar task's plan")
+    
+    if totals['fallbacks']:
+        st.warning("⚠️ Fallback plans: " + ", ".join(f"{reason} × {count}" for reason, count in totals['fallbacks'].items()))
+    if totals['errors_by_reason']:
+        st.caption("Recent failures: " + ", ".join(f"{reason} × {count}" for reason, count in totals['errors_by_reason'].items()))
+
+    breaker_states = ai_service.breakers.states()
+    st.caption("Model chain: " + " → ".join(
+        f"{name} ({breaker_states.get(name, 'closed').replace('_', ' ')})" for name in ai_service.model_chain
+    ))
+
+    st.subheader("⏱️ Latency")
+    percentiles = model_metrics.latency_percentiles()
+    if percentiles:
+        st.dataframe(pd.DataFrame([
+            {'Call': kind, 'Calls': summary['calls'], 'p50 (s)': round(summary['p50'], 2), 'p95 (s)': round(summary['p95'], 2)}
+            for kind, summary in percentiles.items()
+        ]), hide_index=True, use_container_width=True)
+    else:
+        st.info("No successful model calls recorded since the server started.")
+    
+    st.subheader("🪙 Token Spend per Day")
+    usage = pd.DataFrame(model_metrics.daily_usage())
+    if not usage.empty:
+        tokens = usage.melt(id_vars=['day', 'model'], value_vars=['prompt_tokens', 'response_tokens'],
+                            var_name='direction', value_name='tokens')
+        fig_tokens = px.bar(tokens, x='day', y='tokens', color='direction',
+                            labels={'day': 'Day', 'tokens': 'Tokens', 'direction': 'Direction'}, title="Tokens per Day")
+        st.plotly_chart(fig_tokens, use_container_width=True)
+        st.dataframe(usage[['day', 'model', 'calls', 'errors', 'cache_hits', 'fallbacks']], hide_index=True,
+                     use_container_width=True)
+    else:
+        st.info("No usage recorded yet.")
+    
+    recent = model_metrics.recent_calls()[-50:]
+    if recent:
+        st.subheader("🧾 Recent Calls")
+        st.dataframe(pd.DataFrame([{
+            'Time': datetime.fromtimestamp(record.timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+            'Call': record.kind + (' (stream)' if record.stream else ''),
+            'Outcome': record.error or record.outcome,
+            'Latency (s)': round(record.latency, 2),
+            'Prompt Tokens': record.prompt_tokens,
+            'Response Tokens': record.response_tokens,
+            'Retry': record.attempt,
+        } for record in reversed(recent)]), hide_index=True, use_container_width=True)
+    
+    with st.expander("📈 Prometheus Metrics"):
+        prometheus_text = model_metrics.prometheus_text()
+        st.code(prometheus_text, language="text")
+        st.download_button("Download", prometheus_text, file_name="planner_metrics.prom", mime="text/plain")
+        st.caption("Set PLANNER_METRICS_PORT to serve these at http://<host>:<port>/metrics for scraping.")
+
 # Footer
 st.markdown("---")
 st.markdown("🤖 **AI Task Planner** - Powered by Google Gemini AI")
+
+# Full script run time, for comparison with the fragment reruns above
+record_timing(f"Full rerun ({page})", run_started)
@@ -0,0 +1,94 @@
+"""Analytics page cost: the old per-task Python loop vs vectorized work on cached frames
+
+Run from the repository root:
+
+    python benchmarks/bench_analytics.py --sizes 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import analytics  # noqa: E402
+from models import Task  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+
+def legacy_analytics(tasks):
+    """The Analytics page before: loops, strptime per task, dicts converted to pandas"""
+    completed = len([t for t in tasks if t.get('status') == 'completed'])
+    total = len(tasks)
+    completion_rate = (completed / total * 100) if total > 0 else 0
+
+    total_estimated_days = 0
+    total_actual_days = 0
+    for task in tasks:
+        if 'milestones' in task:
+            for milestone in task['milestones']:
+                total_estimated_days += milestone.get('estimated_days', 1)
+        try:
+            start_date = datetime.strptime(task['start_date'], '%Y-%m-%d')
+            end_date = datetime.strptime(task['end_date'], '%Y-%m-%d')
+            total_actual_days += (end_date - start_date).days
+        except ValueError:
+            pass
+
+    categories = {}
+    for task in tasks:
+        categories[task['category']] = categories.get(task['category'], 0) + 1
+    statuses = {}
+    for task in tasks:
+        status = task.get('status', 'pending')
+        statuses[status] = statuses.get(status, 0) + 1
+    return (
+        completion_rate, total_estimated_days, total_actual_days,
+        pd.DataFrame(list(categories.items()), columns=['Category', 'Count']),
+        pd.DataFrame(list(statuses.items()), columns=['Status', 'Count']),
+    )
+
+
+def frame_analytics(task_frame, milestone_frame):
+    """Everything the Analytics page now derives from the frames, including the new views"""
+    return (
+        analytics.overdue_rate(task_frame),
+        analytics.overdue_by_category(task_frame),
+        analytics.burndown(task_frame, milestone_frame),
+        analytics.open_milestone_days(milestone_frame),
+        analytics.estimate_error_by_category(task_frame, milestone_frame),
+    )
+
+
+def timed(fn, repeats):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'tasks':>7} {'legacy loop':>13} {'frame build':>13} {'frame analytics':>17}")
+    for size in args.sizes:
+        dicts = make_tasks(size)
+        tasks = [Task.from_dict(task) for task in dicts]
+        task_frame, milestone_frame = analytics.task_frames(tasks)
+
+        legacy_ms = timed(lambda: legacy_analytics(dicts), args.repeats)
+        build_ms = timed(lambda: analytics.task_frames(tasks), args.repeats)
+        frame_ms = timed(lambda: frame_analytics(task_frame, milestone_frame), args.repeats)
+        print(f"{size:>7} {legacy_ms:>10.1f} ms {build_ms:>10.1f} ms {frame_ms:>14.1f} ms")
+    print("frame build runs once per store revision (TaskStore.load_frames); analytics run on every rerun")
+
+
+if __name__ == "__main__":
+    main()
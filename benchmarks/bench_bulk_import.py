@@ -0,0 +1,63 @@
+"""Bulk import wall time: one task at a time vs the bounded, rate-limited worker pool
+
+The fake model fails a share of calls with HTTP 429 so the retry/backoff
+path is exercised; every task should still end up planned.
+
+Run from the repository root:
+
+    python benchmarks/bench_bulk_import.py --tasks 40 --latency 0.3 --error-rate 0.1
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service import AITaskPlanner  # noqa: E402
+from bulk_import import BulkImporter, parse_task_list  # noqa: E402
+from task_store import SQLiteTaskStore  # noqa: E402
+from benchmarks.fake_model import FakeGenerativeModel  # noqa: E402
+
+
+def run(specs, args, workers, store):
+    model = FakeGenerativeModel(args.latency, error_rate=args.error_rate)
+    planner = AITaskPlanner(model=model, use_cache=False, generation_mode="structured")
+    importer = BulkImporter(planner, store, workers=workers, requests_per_minute=args.rpm,
+                            tokens_per_minute=args.tpm, max_retries=args.retries)
+    started = time.perf_counter()
+    results = list(importer.plan(specs))
+    saved = importer.save(f"bench-{workers}", results)
+    elapsed = time.perf_counter() - started
+    failed = [result for result in results if result.error]
+    return elapsed, len(saved), len(failed), model.calls, model.errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=1000)
+    parser.add_argument("--tpm", type=int, default=10_000_000)
+    parser.add_argument("--retries", type=int, default=4)
+    args = parser.parse_args()
+
+    csv_text = "name,category,duration_days\n" + "\n".join(
+        f"Imported task {i},{'Work' if i % 2 else 'Learning'},{7 + i % 20}" for i in range(args.tasks)
+    )
+    specs, errors = parse_task_list(csv_text)
+    assert not errors, errors
+
+    store = SQLiteTaskStore(os.path.join(tempfile.mkdtemp(), "bulk.sqlite3"))
+    print(f"{args.tasks} tasks, {args.latency}s per call, {args.error_rate:.0%} of calls fail with 429")
+    print(f"{'workers':>8} {'wall time':>10} {'saved':>6} {'failed':>7} {'calls':>6} {'429s':>5}")
+    for workers in (1, args.workers):
+        elapsed, saved, failed, calls, rate_limited = run(specs, args, workers, store)
+        print(f"{workers:>8} {elapsed:>8.2f} s {saved:>6} {failed:>7} {calls:>6} {rate_limited:>5}")
+
+
+if __name__ == "__main__":
+    main()
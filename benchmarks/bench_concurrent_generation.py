@@ -0,0 +1,66 @@
+"""Wall-clock comparison of sequential vs concurrent milestone/analysis generation
+
+Run from the repository root:
+
+    python benchmarks/bench_concurrent_generation.py --latency 0.5 --runs 5
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service import AITaskPlanner  # noqa: E402
+from benchmarks.fake_model import FakeGenerativeModel  # noqa: E402
+
+
+def run_sequential(model, runs):
+    """Baseline: the two prompts issued one after the other"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        model.generate_content("Break down this task into 3-5 specific, actionable steps")
+        model.generate_content("Provide a comprehensive, helpful analysis")
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run_concurrent(planner, runs):
+    """generate_milestones with both prompts in flight at once"""
+    start_date = datetime(2025, 1, 1)
+    end_date = start_date + timedelta(days=7)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        planner.generate_milestones("Learn to make Biryani", "Personal", start_date, end_date)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="fake per-call latency in seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    model = FakeGenerativeModel(latency=args.latency)
+    planner = AITaskPlanner(model=model, use_cache=False, generation_mode="two_prompt")
+
+    # Warm-up call so one-off import/initialisation cost is not attributed to either path
+    run_concurrent(planner, 1)
+
+    sequential = run_sequential(model, args.runs)
+    concurrent = run_concurrent(planner, args.runs)
+
+    seq_avg = sum(sequential) / len(sequential)
+    con_avg = sum(concurrent) / len(concurrent)
+    print(f"per-call latency : {args.latency:.3f}s")
+    print(f"sequential (avg) : {seq_avg:.3f}s")
+    print(f"concurrent (avg) : {con_avg:.3f}s")
+    print(f"speedup          : {seq_avg / con_avg:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
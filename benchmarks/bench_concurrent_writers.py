@@ -0,0 +1,86 @@
+"""Many simultaneous writers against one store: throughput and lost-write check
+
+Each worker repeatedly reloads a shared task and flips one of its
+milestones with an optimistic version check, retrying on conflict. With
+no lost writes the task's final version equals 1 + successful writes.
+
+Run from the repository root (the Postgres run needs a local server and
+psycopg installed):
+
+    python benchmarks/bench_concurrent_writers.py --workers 16 --writes 50
+    python benchmarks/bench_concurrent_writers.py --url postgresql://localhost/planner_bench
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task  # noqa: E402
+from task_store import ConcurrentModificationError, create_task_store  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+
+def run(url, workers, writes):
+    store = create_task_store(url)
+    user_id = f"bench{int(time.time() * 1000)}"
+    task_id = store.add_task(user_id, Task.from_dict(make_tasks(1)[0])).id
+
+    conflicts = [0] * workers
+    barrier = threading.Barrier(workers)
+
+    def worker(index):
+        barrier.wait()
+        done = 0
+        while done < writes:
+            task = next(t for t in store.load_tasks(user_id) if t.id == task_id)
+            position = index % len(task.milestones)
+            try:
+                store.set_milestone_completed(
+                    user_id, task_id, position, not task.milestones[position].completed, task.version
+                )
+                done += 1
+            except ConcurrentModificationError:
+                conflicts[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    final_version = next(t for t in store.load_tasks(user_id) if t.id == task_id).version
+    successful = workers * writes
+    print(f"store          : {url}")
+    print(f"writes         : {successful} by {workers} workers in {elapsed:.2f}s ({successful / elapsed:.0f}/s)")
+    print(f"conflicts      : {sum(conflicts)} (retried)")
+    print(f"final version  : {final_version} (expected {1 + successful})")
+    print("lost writes    : none" if final_version == 1 + successful else "lost writes    : DETECTED")
+    store.clear_tasks(user_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="TASK_STORE_URL to test; defaults to a temporary SQLite and JSON store")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=50, help="successful writes per worker")
+    args = parser.parse_args()
+
+    if args.url:
+        urls = [args.url]
+    else:
+        workdir = tempfile.mkdtemp()
+        urls = [f"sqlite:///{workdir}/bench.sqlite3", f"file:///{workdir}"]
+
+    for url in urls:
+        run(url, args.workers, args.writes)
+        print()
+
+
+if __name__ == "__main__":
+    main()
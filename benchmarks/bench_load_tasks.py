@@ -0,0 +1,69 @@
+"""Per-rerun load_tasks() cost on a large task list, before and after the load cache
+
+Run from the repository root:
+
+    python benchmarks/bench_load_tasks.py --tasks 5000 --reruns 20
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: E402
+from models import Task  # noqa: E402
+from task_store import JSONFileTaskStore, SQLiteTaskStore  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+
+def per_rerun(load, reruns):
+    load()  # first load populates the cache
+    started = time.perf_counter()
+    for _ in range(reruns):
+        load()
+    return (time.perf_counter() - started) / reruns * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    tasks = make_tasks(args.tasks)
+    json_path = os.path.join(workdir, "tasks_data_bench.json")
+    with open(json_path, 'w') as f:
+        json.dump(tasks, f, indent=2)
+
+    def legacy_load():
+        with open(json_path, 'r') as f:
+            return json.load(f)
+
+    json_store = JSONFileTaskStore(workdir)
+    sqlite_store = SQLiteTaskStore(os.path.join(workdir, "bench.sqlite3"))
+    for task in tasks:
+        sqlite_store.add_task("bench", Task.from_dict(task))
+
+    def sqlite_uncached():
+        return sqlite_store._load_uncached("bench")
+
+    decoder = "orjson" if models.orjson is not None else "json"
+    print(f"{args.tasks} tasks, {os.path.getsize(json_path) / 1e6:.1f} MB JSON, decoder: {decoder}")
+    print(f"before: json.load every rerun       : {per_rerun(legacy_load, args.reruns):9.3f} ms")
+    print(f"        sqlite rows every rerun     : {per_rerun(sqlite_uncached, args.reruns):9.3f} ms")
+    print(f"after : file store, mtime-validated : {per_rerun(lambda: json_store.load_tasks('bench'), args.reruns):9.3f} ms")
+    print(f"        sqlite store, revision check: {per_rerun(lambda: sqlite_store.load_tasks('bench'), args.reruns):9.3f} ms")
+
+    # One write in between forces exactly one reload
+    sqlite_store.update_task_status("bench", 1, "completed")
+    started = time.perf_counter()
+    sqlite_store.load_tasks("bench")
+    print(f"        sqlite reload after a write : {(time.perf_counter() - started) * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
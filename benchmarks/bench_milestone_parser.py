@@ -0,0 +1,211 @@
+"""Milestone parser accuracy and throughput: the previous per-line regex parser vs milestone_parser
+
+Three checks:
+
+- the hand-labelled cases in benchmarks/milestone_corpus.json;
+- generated replies with known answers, mixing numbering styles, bold and
+  bullets, day/week/range durations and noise lines;
+- random garbage fed in random chunks. The parser must not raise, streaming
+  must give the same milestones as parsing the whole text, and names must
+  be clean.
+
+Then lines per second for both parsers, and the cost of streaming one
+very long line in small chunks.
+
+Run from the repository root:
+
+    python benchmarks/bench_milestone_parser.py --replies 2000
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from milestone_parser import MilestoneStreamParser, parse_milestones  # noqa: E402
+from models import Milestone, Priority  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "milestone_corpus.json")
+
+STEP_WORDS = ["Research", "Draft", "Build", "Review", "Practice", "Plan", "Test", "Ship", "Outline", "Polish",
+              "the basics", "a prototype", "user interviews", "the budget", "chapter one", "daily drills", "🚀 launch"]
+NOISE_LINES = ["Here is your plan:", "## Milestones", "**Milestones:**", "", "Total: 20 days", "Category: Work",
+               "Good luck with your task!", "*", "---", "1.5 weeks should be plenty overall"]
+
+
+class LegacyStreamParser:
+    """The parser before milestone_parser: uncompiled patterns and three keyword scans per line"""
+
+    SKIP_WORDS = ['example', 'total:', 'requirements', 'important:', 'format', 'critical', 'for your', 'distribute the time', 'break down', 'task details', 'additional context']
+    BAD_NAMES = ['category', 'total duration', 'start date', 'end date', 'additional context', 'task details', 'requirements', 'examples', 'important', 'format', 'critical']
+    METADATA_KEYWORDS = ['category:', 'duration:', 'date:', 'context:', 'details:', 'example', 'total:', 'requirements']
+
+    def __init__(self):
+        self.milestones = []
+        self._buffer = ""
+
+    def feed(self, chunk: str):
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self._add(line)
+
+    def close(self):
+        self._add(self._buffer)
+        self._buffer = ""
+
+    def _add(self, line):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            return
+        if line in ['*', '**', '***'] or line.startswith('*') and len(line) <= 3:
+            return
+        if any(skip_word in line.lower() for skip_word in self.SKIP_WORDS):
+            return
+        if not re.match(r'^\d+\.', line):
+            return
+        estimated_days = 1
+        milestone_name = re.sub(r'^\d+\.\s*', '', line)
+        time_match = re.search(r'-\s*(\d+)\s*days?', line.lower())
+        if time_match:
+            estimated_days = int(time_match.group(1))
+            milestone_name = re.sub(r'\s*-\s*\d+\s*days?', '', milestone_name, flags=re.IGNORECASE)
+        milestone_name = milestone_name.strip()
+        if len(milestone_name) < 3 or milestone_name.lower().strip() in self.BAD_NAMES:
+            return
+        if any(keyword in milestone_name.lower() for keyword in self.METADATA_KEYWORDS):
+            return
+        self.milestones.append(Milestone(len(self.milestones) + 1, milestone_name, Priority.MEDIUM,
+                                         estimated_days=estimated_days))
+
+
+def legacy_parse(text: str):
+    parser = LegacyStreamParser()
+    parser.feed(text)
+    parser.close()
+    return parser.milestones
+
+
+def generated_reply(rng: random.Random):
+    """(reply text, expected [name, days] pairs) in a random mix of the formats models use"""
+    lines, expected = [], []
+    for number in range(1, rng.randint(3, 6) + 1):
+        name = f"{rng.choice(STEP_WORDS[:10])} {rng.choice(STEP_WORDS[10:])}"
+        low = rng.randint(1, 9)
+        duration, days = rng.choice([
+            (f"- {low} days", low),
+            (f"- {low} day" if low == 1 else f"- {low} days", low),
+            (f"({low} days)", low),
+            (f": {low} days", low),
+            (f"- {low} weeks", low * 7),
+            (f"- {low}-{low + 2} days", low + 1),
+            (f"for {low} to {low + 1} weeks", math.ceil((2 * low + 1) / 2 * 7)),
+        ])
+        numbering = rng.choice([f"{number}. ", f"{number}) ", f"Step {number}: "])
+        line = rng.choice([
+            f"{numbering}{name} {duration}",
+            f"- {numbering}{name} {duration}",
+            f"{numbering}**{name}** {duration}",
+            f"**{numbering}{name}** {duration}",
+            f"**{numbering}{name} {duration}**",
+        ])
+        if rng.random() < 0.3:
+            lines.append(rng.choice(NOISE_LINES))
+        lines.append(line)
+        expected.append([name, days])
+    return rng.choice(["\n", "\r\n"]).join(lines), expected
+
+
+def garbage(rng: random.Random, length: int):
+    alphabet = "*_-#0123456789. ():–\n\r\tdaysweekto 🚀Step"
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def streamed(text: str, rng: random.Random):
+    """Milestones from feeding text in random-sized chunks"""
+    parser = MilestoneStreamParser()
+    start = 0
+    while start < len(text):
+        size = rng.randint(1, 40)
+        parser.feed(text[start:start + size])
+        start += size
+    parser.close()
+    return parser.milestones
+
+
+def pairs(milestones):
+    return [[milestone.name, milestone.estimated_days] for milestone in milestones]
+
+
+def clean_name(name: str):
+    return len(name) >= 3 and name == name.strip() and not name.startswith(('*', '_')) and not name.endswith(('*', '_'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replies", type=int, default=2000, help="generated replies")
+    parser.add_argument("--garbage", type=int, default=2000, help="random garbage inputs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        cases = json.load(f)['cases']
+    print(f"{'labelled cases':<22} {'previous':>10} {'new':>10}")
+    scores = [sum(pairs(parse(case['text'])) == case['expected'] for case in cases) for parse in (legacy_parse, parse_milestones)]
+    print(f"{'exact':<22} {scores[0]:>6}/{len(cases):<3} {scores[1]:>6}/{len(cases):<3}")
+    for case in cases:
+        if pairs(parse_milestones(case['text'])) != case['expected']:
+            print(f"  new parser misses {case['name']}: {pairs(parse_milestones(case['text']))}")
+
+    replies = [generated_reply(rng) for _ in range(args.replies)]
+    print(f"\n{'generated replies':<22} {'previous':>10} {'new':>10}")
+    for label, check in (("exact", lambda got, want: got == want),
+                         ("same step count", lambda got, want: len(got) == len(want)),
+                         ("names without '*'", lambda got, want: all('*' not in name for name, _ in got))):
+        shares = [sum(check(pairs(parse(text)), want) for text, want in replies) / len(replies)
+                  for parse in (legacy_parse, parse_milestones)]
+        print(f"{label:<22} {shares[0]:>10.1%} {shares[1]:>10.1%}")
+
+    failures = 0
+    for text in [garbage(rng, rng.randint(0, 400)) for _ in range(args.garbage)] + [text for text, _ in replies[:200]]:
+        whole = parse_milestones(text)
+        if pairs(streamed(text, rng)) != pairs(whole) or not all(clean_name(m.name) and m.estimated_days >= 1 for m in whole):
+            failures += 1
+            if failures <= 3:
+                print(f"  invariant broken for {text!r}")
+    print(f"\nfuzzed inputs: {args.garbage + min(200, len(replies))}, invariant failures: {failures}")
+
+    # Plain "1. Name - 3 days" lines both parsers read, then the generated mix (which the previous parser mostly drops)
+    plain = "\n".join(f"{index % 6 + 1}. {rng.choice(STEP_WORDS[:10])} {rng.choice(STEP_WORDS[10:])} - {rng.randint(1, 9)} days"
+                      for index in range(len(replies) * 5))
+    mixed = "\n".join(text for text, _ in replies)
+    print(f"\n{'lines/s':<22} {'previous':>10} {'new':>10}")
+    for label, text in (("plain lines", plain), ("generated mix", mixed)):
+        line_count = text.count("\n") + 1
+        rates = []
+        for parse in (legacy_parse, parse_milestones):
+            best = float('inf')
+            for _ in range(3):
+                started = time.perf_counter()
+                parse(text)
+                best = min(best, time.perf_counter() - started)
+            rates.append(line_count / best)
+        print(f"{label:<22} {rates[0]:>10,.0f} {rates[1]:>10,.0f}")
+    long_line = "1. " + "word " * 20000 + "- 3 days"
+    for label, cls in (("previous", LegacyStreamParser), ("new", MilestoneStreamParser)):
+        started = time.perf_counter()
+        stream = cls()
+        for start in range(0, len(long_line), 16):
+            stream.feed(long_line[start:start + 16])
+        stream.close()
+        print(f"100k-char line in 16-char chunks, {label}: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
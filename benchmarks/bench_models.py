@@ -0,0 +1,92 @@
+"""Memory and scan/codec throughput of slotted Task objects vs the old task dicts
+
+Run from the repository root:
+
+    python benchmarks/bench_models.py --tasks 5000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: E402
+from models import TaskStatus, dumps_tasks, loads_tasks  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+
+def measure_memory(build):
+    """Bytes retained by the object graph build() returns"""
+    tracemalloc.start()
+    result = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def per_call(fn, repeats):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def scan_dicts(tasks):
+    """The dashboard/analytics pattern before: .get() with defaults on every row"""
+    completed = len([t for t in tasks if t.get('status') == 'completed'])
+    estimated = 0
+    for task in tasks:
+        if 'milestones' in task:
+            for milestone in task['milestones']:
+                estimated += milestone.get('estimated_days', 1)
+    return completed, estimated
+
+
+def scan_models(tasks):
+    completed = len([t for t in tasks if t.status == TaskStatus.COMPLETED])
+    estimated = 0
+    for task in tasks:
+        for milestone in task.milestones:
+            estimated += milestone.estimated_days
+    return completed, estimated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    # Old on-disk form: every milestone carries a description repeating its name
+    legacy_raw = json.dumps(make_tasks(args.tasks), indent=2)
+    tasks = loads_tasks(legacy_raw)
+    for task in tasks:
+        for milestone in task.milestones:
+            milestone.description = ""
+    dicts = json.loads(legacy_raw)
+    raw = dumps_tasks(tasks)
+
+    codec = "orjson" if models.orjson is not None else "json"
+    print(f"{args.tasks} tasks, codec: {codec}")
+    print(f"file size      dicts: {len(legacy_raw) / 1e6:8.2f} MB   models: {len(raw) / 1e6:8.2f} MB")
+
+    dict_bytes = measure_memory(lambda: json.loads(legacy_raw))
+    model_bytes = measure_memory(lambda: loads_tasks(raw))
+    print(f"memory         dicts: {dict_bytes / 1e6:8.2f} MB   models: {model_bytes / 1e6:8.2f} MB")
+
+    assert scan_dicts(dicts) == scan_models(tasks)
+    print(f"full scan      dicts: {per_call(lambda: scan_dicts(dicts), args.repeats):8.3f} ms   "
+          f"models: {per_call(lambda: scan_models(tasks), args.repeats):8.3f} ms")
+    print(f"decode         dicts: {per_call(lambda: json.loads(legacy_raw), args.repeats):8.3f} ms   "
+          f"models: {per_call(lambda: loads_tasks(raw), args.repeats):8.3f} ms")
+    print(f"encode         dicts: {per_call(lambda: json.dumps(dicts, indent=2), args.repeats):8.3f} ms   "
+          f"models: {per_call(lambda: dumps_tasks(tasks), args.repeats):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
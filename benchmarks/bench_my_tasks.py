@@ -0,0 +1,61 @@
+"""My Tasks data cost per rerun: whole list vs one indexed page from the store
+
+Run from the repository root:
+
+    python benchmarks/bench_my_tasks.py --sizes 1000 10000 100000 --page-size 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task, TaskStats  # noqa: E402
+from task_store import SQLiteTaskStore  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+
+def per_call(fn, repeats):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    print(f"{'tasks':>7} {'full load':>12} {'page':>10} {'filtered page':>15} {'last page':>11}")
+    for size in args.sizes:
+        store = SQLiteTaskStore(os.path.join(workdir, f"bench_{size}.sqlite3"))
+        with store._transaction() as conn:
+            tasks = [Task.from_dict(task) for task in make_tasks(size)]
+            for task in tasks:
+                store._insert_task(conn, "bench", task)
+            store._apply_stats(conn, "bench", TaskStats.from_tasks(tasks).counters())
+            store._bump_revision(conn, "bench")
+        assert store.query_tasks("bench", limit=1)[1] == size
+
+        full_ms = per_call(lambda: store._load_uncached("bench"), max(1, args.repeats // 10))
+        page_ms = per_call(lambda: store.query_tasks("bench", descending=True, limit=args.page_size), args.repeats)
+        filtered_ms = per_call(lambda: store.query_tasks(
+            "bench", ['completed'], ['Work'], date(2025, 3, 1), date(2025, 6, 30), 'due', limit=args.page_size
+        ), args.repeats)
+        last_ms = per_call(lambda: store.query_tasks(
+            "bench", sort='due', offset=size - args.page_size, limit=args.page_size
+        ), args.repeats)
+        print(f"{size:>7} {full_ms:>9.1f} ms {page_ms:>7.2f} ms {filtered_ms:>12.2f} ms {last_ms:>8.2f} ms")
+    print("page widgets: milestones are only rendered for tasks whose 'Show milestones' toggle is on")
+
+
+if __name__ == "__main__":
+    main()
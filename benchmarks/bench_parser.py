@@ -0,0 +1,143 @@
+"""Milestone parser throughput on recorded and adversarial model responses
+
+The corpus is every response recorded in benchmarks/prompt_corpus.json
+plus generated adversarial ones: empty and prose-only replies, bold or
+bracketed numbering, thousands of lines, one very long line, emoji-heavy
+text, broken and oversized JSON. Each response is parsed whole and, for
+the line parser, fed in 16-character chunks as a stream would deliver it.
+
+Run from the repository root:
+
+    python benchmarks/bench_parser.py --repeats 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service import AITaskPlanner  # noqa: E402
+from milestone_parser import MilestoneStreamParser  # noqa: E402
+from metrics import ModelMetrics  # noqa: E402
+from benchmarks.fake_model import FakeGenerativeModel, MILESTONES_TEXT, STRUCTURED_TEXT  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_corpus.json")
+
+# Stream chunk size in characters, roughly what Gemini's SSE chunks carry per event
+CHUNK_SIZE = 16
+
+
+def adversarial_milestones():
+    """Line-format responses a model (or a broken proxy) could plausibly return"""
+    steps = [f"Step number {index} of the plan with a reasonably long description" for index in range(1, 6)]
+    return {
+        'empty': "",
+        'whitespace': " \n\n\t \n" * 50,
+        'prose_only': "Here is how I would approach this task. " * 200,
+        'bold_numbers': "\n".join(f"**{index}. {step}** - {index} days" for index, step in enumerate(steps, 1)),
+        'paren_numbers': "\n".join(f"{index}) {step} - {index} days" for index, step in enumerate(steps, 1)),
+        'day_words': "\n".join(f"{index}. {step} - three days" for index, step in enumerate(steps, 1)),
+        'emoji': "\n".join(f"{index}. 🚀✨ {step} 🎯🔥 - {index} days 📅" for index, step in enumerate(steps, 1)),
+        'many_lines': "\n".join(f"{index}. {steps[index % 5]} - {index % 9 + 1} days" for index in range(1, 5001)),
+        'long_line': "1. " + "word " * 20000 + "- 3 days",
+        'dash_heavy': "1. " + "- " * 5000 + "days",
+        'crlf': "\r\n".join(f"{index}. {step} - {index} days" for index, step in enumerate(steps, 1)),
+    }
+
+
+def adversarial_structured():
+    """Structured-mode responses: valid, fenced, truncated, oversized and wrongly typed JSON"""
+    plan = json.loads(STRUCTURED_TEXT)
+    big = dict(plan, milestones=plan['milestones'] * 400)
+    return {
+        'fenced': f"```json\n{STRUCTURED_TEXT}\n```",
+        'truncated': STRUCTURED_TEXT[:len(STRUCTURED_TEXT) // 2],
+        'trailing_commas': STRUCTURED_TEXT.replace("}", ",}").replace("]", ",]"),
+        'wrong_types': json.dumps({'milestones': "four steps", 'notes': [1, 2, 3]}),
+        'oversized': json.dumps(big),
+        'not_json': MILESTONES_TEXT,
+    }
+
+
+def load_corpus():
+    """(line-format responses, structured responses) as {name: text}"""
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        corpus = json.load(f)
+    lines = {'fake_model': MILESTONES_TEXT}
+    structured = {'fake_model': STRUCTURED_TEXT}
+    for version, responses in corpus['responses'].items():
+        for task_name, kinds in responses.items():
+            lines[f"v{version}:{task_name}"] = kinds['milestones']
+            structured[f"v{version}:{task_name}"] = kinds['structured']
+    lines.update((f"adversarial:{name}", text) for name, text in adversarial_milestones().items())
+    structured.update((f"adversarial:{name}", text) for name, text in adversarial_structured().items())
+    return lines, structured
+
+
+def stream_parse(text: str):
+    parser = MilestoneStreamParser()
+    for start in range(0, len(text), CHUNK_SIZE):
+        parser.feed(text[start:start + CHUNK_SIZE])
+    parser.close()
+    return parser.milestones
+
+
+def per_call(fn, texts, repeats: int):
+    """Mean seconds per call of fn(text) over the texts, and the slowest text.
+
+    Each text's time is the best of `repeats` calls, which is far steadier
+    between runs than the average.
+    """
+    slowest = (0.0, None)
+    total = 0.0
+    for name, text in texts.items():
+        best = float('inf')
+        for _ in range(repeats):
+            started = time.perf_counter()
+            fn(text)
+            best = min(best, time.perf_counter() - started)
+        total += best
+        slowest = max(slowest, (best, name))
+    return total / len(texts), slowest
+
+
+def run(repeats: int = 10):
+    """Benchmark results as dicts (name, value, unit, better, params), see run_suite.py"""
+    planner = AITaskPlanner(model=FakeGenerativeModel(0), use_cache=False, notify=lambda level, message: None,
+                            metrics=ModelMetrics(':memory:'))
+    lines, structured = load_corpus()
+    cases = [
+        ('parse_ai_response', lambda text: planner._parse_ai_response(text, "Task", 10), lines),
+        ('parse_ai_response_streamed', stream_parse, lines),
+        ('parse_structured_response', lambda text: planner._parse_structured_response(text, "Task", 10), structured),
+    ]
+    results = []
+    for name, fn, texts in cases:
+        mean, (slowest, slowest_name) = per_call(fn, texts, repeats)
+        params = {'responses': len(texts), 'characters': sum(len(text) for text in texts.values())}
+        results.append({'name': f"parser.{name}.mean_ms", 'value': mean * 1000, 'unit': 'ms', 'better': 'lower',
+                        'params': params})
+        results.append({'name': f"parser.{name}.slowest_ms", 'value': slowest * 1000, 'unit': 'ms', 'better': 'lower',
+                        'params': dict(params, response=slowest_name)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        note = f"  ({result['params']['response']})" if 'response' in result['params'] else ""
+        print(f"{result['name']:<48} {result['value']:>10.3f} {result['unit']}{note}")
+
+
+if __name__ == "__main__":
+    main()
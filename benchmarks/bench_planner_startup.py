@@ -0,0 +1,65 @@
+"""Cost of building a fresh AITaskPlanner per rerun vs reusing the shared planner
+
+No network traffic is generated. Each rerun also asks the library for its
+default client, which is what the first generate_content() call does; a
+fresh genai.configure() discards that client (and its pooled connection),
+so the TLS handshake it would add on a real request is not included here.
+Planners configure the library on first use of .model, so each
+measurement touches it.
+
+Run from the repository root:
+
+    python benchmarks/bench_planner_startup.py --reruns 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+started = time.perf_counter()
+import ai_service  # noqa: E402
+IMPORT_SECONDS = time.perf_counter() - started
+
+from google.generativeai import client as genai_client  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=200)
+    parser.add_argument("--api-key", default="benchmark-dummy-key")
+    args = parser.parse_args()
+
+    # Startup: first planner construction in this process
+    started = time.perf_counter()
+    ai_service.get_shared_planner(args.api_key).model
+    genai_client.get_default_generative_client()
+    startup = time.perf_counter() - started
+
+    # Per rerun, old behaviour: a new planner (and client) every script execution
+    started = time.perf_counter()
+    for _ in range(args.reruns):
+        ai_service.AITaskPlanner(api_key=args.api_key, use_cache=False).model
+        genai_client.get_default_generative_client()
+    fresh = (time.perf_counter() - started) / args.reruns
+
+    # Per rerun, new behaviour: shared planner lookup
+    ai_service.invalidate_shared_planner()
+    ai_service.get_shared_planner(args.api_key).model
+    genai_client.get_default_generative_client()
+    started = time.perf_counter()
+    for _ in range(args.reruns):
+        ai_service.get_shared_planner(args.api_key).model
+        genai_client.get_default_generative_client()
+    shared = (time.perf_counter() - started) / args.reruns
+
+    print(f"import ai_service       : {IMPORT_SECONDS * 1000:.1f} ms")
+    print(f"first planner (startup) : {startup * 1000:.2f} ms")
+    print(f"fresh planner per rerun : {fresh * 1000:.3f} ms")
+    print(f"shared planner per rerun: {shared * 1000:.4f} ms")
+    print(f"saved per rerun         : {(fresh - shared) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Prompt versions compared: input tokens, parse success and output quality on a fixed task corpus
+
+A stub model replays the responses recorded in benchmarks/prompt_corpus.json
+for each prompt version, so runs are offline and repeatable. The corpus
+still holds the same hand-written stand-ins for every version (no real
+replies have been recorded yet), so offline only the input-token columns
+compare the prompts; the output columns are shown once per mode, as a
+check of the parsers on those stand-ins. --live
+sends each version's prompts to the configured Gemini model and compares
+its replies without saving them; --record also saves them to the corpus.
+--count-tokens asks the API for exact prompt token counts instead of
+estimating four characters per token. All three need GEMINI_API_KEY.
+
+Run from the repository root:
+
+    python benchmarks/bench_prompts.py
+    python benchmarks/bench_prompts.py --live --count-tokens
+    python benchmarks/bench_prompts.py --record
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service import (  # noqa: E402
+    STRUCTURED_GENERATION_CONFIG, AITaskPlanner, MilestoneStreamParser, PlanGenerationError,
+    _load_json_lenient, _milestone_from_json,
+)
+from metrics import ModelMetrics  # noqa: E402
+from prompts import NOTE_SECTIONS, PROMPT_KINDS, PROMPT_SETS  # noqa: E402
+from benchmarks.fake_model import FakeResponse, FakeUsage  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_corpus.json")
+
+
+class RecordedModel:
+    """Replays recorded responses for one prompt version, matched on the quoted task name in the prompt"""
+
+    def __init__(self, responses: dict):
+        self.responses = responses
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None, **kwargs):
+        self.prompts.append(prompt)
+        if (generation_config or {}).get('response_mime_type') == 'application/json':
+            kind = 'structured'
+        elif "Break down" in prompt:
+            kind = 'milestones'
+        else:
+            kind = 'analysis'
+        task_name = next(name for name in self.responses if f'"{name}"' in prompt)
+        text = self.responses[task_name][kind]
+        return FakeResponse(text, FakeUsage(prompt, text))
+
+
+def raw_milestones(kind: str, text: str):
+    """Milestones as the model wrote them, before the planner rebalances days or tops the list up"""
+    if kind == 'structured':
+        try:
+            data = _load_json_lenient(text)
+        except ValueError:
+            return []
+        items = data.get('milestones') if isinstance(data, dict) else None
+        milestones = [_milestone_from_json(item, index) for index, item in enumerate(items or [], start=1)]
+        return [milestone for milestone in milestones if milestone is not None]
+    parser = MilestoneStreamParser()
+    parser.feed(text)
+    parser.close()
+    return parser.milestones
+
+
+def section_coverage(kind: str, text: str):
+    """Share of the analysis sections present: headings in a text analysis, note keys in a structured plan"""
+    if kind == 'structured':
+        return sum(f'"{key}"' in text for key, _ in NOTE_SECTIONS) / len(NOTE_SECTIONS)
+    upper = text.upper()
+    return sum(title.split(' ', 1)[1] in upper for _, title in NOTE_SECTIONS) / len(NOTE_SECTIONS)
+
+
+def evaluate(version: str, mode: str, corpus: dict, count_tokens=None):
+    """Per-plan averages for one prompt version and generation mode"""
+    model = RecordedModel(corpus['responses'][version])
+    planner = AITaskPlanner(model=model, use_cache=False, generation_mode=mode, prompt_version=version,
+                            notify=lambda level, message: None, metrics=ModelMetrics(':memory:'))
+    kinds = ('structured',) if mode == 'structured' else ('milestones', 'analysis')
+    totals = {'input_tokens': 0, 'output_tokens': 0, 'calls': 0, 'planned': 0,
+              'parsed': 0, 'exact_days': 0, 'step_count_ok': 0, 'sections': 0.0}
+
+    start = datetime(2025, 1, 1)
+    for task in corpus['tasks']:
+        model.prompts.clear()
+        try:
+            planner.generate_plan(task['name'], task['category'], start, start + timedelta(days=task['duration_days']),
+                                  task['context'])
+            totals['planned'] += 1
+        except PlanGenerationError:
+            pass
+        totals['calls'] += len(model.prompts)
+        totals['input_tokens'] += sum(count_tokens(prompt) if count_tokens else len(prompt) // 4 for prompt in model.prompts)
+
+        responses = corpus['responses'][version][task['name']]
+        milestones = raw_milestones(kinds[0], responses[kinds[0]])
+        totals['output_tokens'] += sum(len(responses[kind]) // 4 for kind in kinds)
+        totals['parsed'] += len(milestones) >= 3
+        totals['exact_days'] += sum(milestone.estimated_days for milestone in milestones) == task['duration_days']
+        totals['step_count_ok'] += 3 <= len(milestones) <= 5
+        totals['sections'] += section_coverage(kinds[-1], responses[kinds[-1]])
+
+    count = len(corpus['tasks'])
+    return {key: value / count for key, value in totals.items()}
+
+
+def fetch_responses(corpus: dict, option: str):
+    """Replace the corpus responses, in memory, with each prompt version's real replies from Gemini"""
+    planner = AITaskPlanner(use_cache=False, metrics=ModelMetrics(':memory:'))
+    if planner.model is None:
+        raise SystemExit(f"{option} needs the API: {planner.init_error}")
+    for version, prompts in PROMPT_SETS.items():
+        planner.prompts = prompts
+        responses = corpus['responses'][version] = {}
+        for task in corpus['tasks']:
+            for kind in PROMPT_KINDS:
+                prompt = prompts.build(kind, task['name'], task['category'], task['duration_days'], task['context'])
+                config = {'generation_config': STRUCTURED_GENERATION_CONFIG} if kind == 'structured' else {}
+                responses.setdefault(task['name'], {})[kind] = planner._call_model(prompt, **config).text
+                print(f"fetched v{version} {kind:<10} {task['name']}")
+    corpus['note'] = f"Recorded from {planner.model_name} on {datetime.now():%Y-%m-%d}"
+
+
+def record(corpus: dict):
+    """Replace the recorded responses with real ones from Gemini"""
+    fetch_responses(corpus, "--record")
+    with open(CORPUS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(corpus, f, ensure_ascii=False, indent=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--live", action="store_true", help="compare replies from the real API, without saving them")
+    parser.add_argument("--record", action="store_true", help="re-record responses from the real API first")
+    parser.add_argument("--count-tokens", action="store_true", help="exact prompt token counts from the API")
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        corpus = json.load(f)
+    if args.record:
+        record(corpus)
+    elif args.live:
+        fetch_responses(corpus, "--live")
+
+    count_tokens = None
+    if args.count_tokens:
+        import google.generativeai as genai
+        counter = AITaskPlanner(use_cache=False, metrics=ModelMetrics(':memory:'))
+        if counter.model is None:
+            raise SystemExit(f"--count-tokens needs the API: {counter.init_error}")
+        count_tokens = lambda prompt: genai.GenerativeModel(counter.model_name).count_tokens(prompt).total_tokens  # noqa: E731
+
+    print(f"{len(corpus['tasks'])} tasks; responses: {corpus['note']}")
+    print(f"input tokens {'counted by the API' if count_tokens else 'estimated at 4 characters per token'}")
+    # Output columns only say something about a prompt version if its replies were produced from that version
+    responses = [corpus['responses'][version] for version in sorted(PROMPT_SETS)]
+    shared = all(version_responses == responses[0] for version_responses in responses)
+    print()
+    print(f"{'prompts':>8} {'mode':>11} {'in tok/plan':>12} {'out tok/plan':>13} {'calls/plan':>11} "
+          f"{'planned':>8} {'parsed':>7} {'exact days':>11} {'3-5 steps':>10} {'sections':>9}")
+    for mode in ('structured', 'two_prompt'):
+        for index, version in enumerate(sorted(PROMPT_SETS)):
+            result = evaluate(version, mode, corpus, count_tokens)
+            outputs = (f"{result['output_tokens']:>13.0f} {result['calls']:>11.2f} {result['planned']:>8.0%} "
+                       f"{result['parsed']:>7.0%} {result['exact_days']:>11.0%} {result['step_count_ok']:>10.0%} "
+                       f"{result['sections']:>9.0%}")
+            if shared and index:
+                outputs = f"{'(same stand-in responses as v' + sorted(PROMPT_SETS)[0] + ')':>13}"
+            print(f"{'v' + version:>8} {mode:>11} {result['input_tokens']:>12.0f} {outputs}")
+    if shared:
+        print("\nEvery version replays the same hand-written stand-ins, so the output columns check the parsers on"
+              "\nthem and do not compare the prompts. Per-version quality needs real replies: --live or --record.")
+
+if __name__ == "__main__":
+    main()
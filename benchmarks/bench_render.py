@@ -0,0 +1,89 @@
+"""Card HTML per rerun: rendering every card vs card_html.RenderCache
+
+Renders a My Tasks page of expanded task cards (one fragment per
+milestone, with scheduled dates) and the Dashboard's recent-task cards
+the way app.py does on each rerun: once from scratch, once from a warm
+RenderCache, and once after toggling one milestone, which re-renders only
+that task. Also checks that hostile names come out escaped.
+
+Run from the repository root:
+
+    python benchmarks/bench_render.py --tasks 20 --milestones 8
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from card_html import RenderCache, milestone_card_html, task_card_html  # noqa: E402
+from models import Task  # noqa: E402
+from scheduler import WorkCalendar, schedule_task  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+
+def render_page(tasks, schedules, cache=None):
+    """All card fragments of one rerun, through cache when given"""
+    fragments = []
+    for task in tasks:
+        if cache is None:
+            fragments.append(task_card_html(task))
+        else:
+            fragments.append(cache.get(task, ('task',), lambda: task_card_html(task)))
+        for position, milestone in enumerate(task.milestones):
+            slot = schedules[task.id].slots[position]
+            if cache is None:
+                fragments.append(milestone_card_html(milestone, slot))
+            else:
+                key = ('milestone', position, slot.start, slot.end, slot.critical)
+                fragments.append(cache.get(task, key, lambda: milestone_card_html(milestone, slot)))
+    return fragments
+
+
+def best_ms(fn, repeats: int = 20):
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20, help="task cards on the page")
+    parser.add_argument("--milestones", type=int, default=8, help="milestones per task")
+    args = parser.parse_args()
+
+    tasks = [Task.from_dict(task) for task in make_tasks(args.tasks, milestones_per_task=args.milestones)]
+    tasks[0].name = '<script>alert("x")</script> & <b>bold</b>'
+    tasks[0].milestones[0].name = '<img src=x onerror=alert(1)>'
+    calendar = WorkCalendar()
+    schedules = {task.id: schedule_task(task, calendar, date(2025, 6, 1)) for task in tasks}
+
+    page = "".join(render_page(tasks, schedules))
+    assert '<script>' not in page and '<img' not in page and '&lt;script&gt;' in page, "names are not escaped"
+    cache = RenderCache()
+    assert render_page(tasks, schedules, cache) == render_page(tasks, schedules)
+
+    fragments = args.tasks * (args.milestones + 1)
+    uncached = best_ms(lambda: render_page(tasks, schedules))
+    cached = best_ms(lambda: render_page(tasks, schedules, cache))
+
+    def toggle_and_render():
+        tasks[0].milestones[1].completed = not tasks[0].milestones[1].completed
+        tasks[0].version += 1
+        render_page(tasks, schedules, cache)
+
+    toggled = best_ms(toggle_and_render)
+    print(f"{fragments} fragments per rerun ({args.tasks} tasks x {args.milestones + 1})")
+    print(f"{'render everything':<28} {uncached:>8.3f} ms")
+    print(f"{'warm cache':<28} {cached:>8.3f} ms  ({uncached / cached:.1f}x)")
+    print(f"{'after one toggle':<28} {toggled:>8.3f} ms  ({uncached / toggled:.1f}x)")
+    print(f"cache: {cache.hits} hits, {cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
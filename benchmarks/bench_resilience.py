@@ -0,0 +1,178 @@
+"""Plan latency and success with a degraded primary model: primary only vs circuit breaker + fallback chain
+
+Drives the real google-generativeai client (REST transport) against
+benchmarks/fake_server.py, so timeouts, 503s and the library's own retry
+settings behave as they would against Gemini. The primary model hangs on
+some requests and returns 503 on others; the fallback model is healthy.
+
+Both clients still wait out a hung request's --timeout, so the worst
+plan costs about one timeout either way. The resilient client's gain is
+in failures (none, against the primary-only client's share of plans
+that exhaust their retries) and in p95: once --breaker-failures
+consecutive failures open the primary's breaker, plans go straight to
+the fallback until its reset. p95 is nearest-rank, as ModelMetrics
+reports it.
+
+First, check_breaker_paths() asserts, against in-process fakes, that a
+half-open breaker's trial call is always resolved (bad requests, an
+exhausted call budget and cancelled streams used to leave it stuck) and
+that a 504 fails over to the next model instead of being retried.
+
+Run from the repository root:
+
+    python benchmarks/bench_resilience.py --plans 40 --hang-rate 0.2 --error-rate 0.3
+"""
+import argparse
+import logging
+import math
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_model import FakeGenerativeModel  # noqa: E402
+from benchmarks.fake_server import FakeGeminiServer, ModelBehaviour  # noqa: E402
+
+PRIMARY = 'fake-primary'
+FALLBACK = 'fake-fallback'
+
+
+def run(planner, plans: int):
+    """Per-plan latencies, failures and how many plans the fallback model answered"""
+    start = datetime(2025, 1, 1)
+    latencies = []
+    failures = 0
+    for index in range(plans):
+        started = time.perf_counter()
+        try:
+            planner.generate_plan(f"Task {index}", "Work", start, start + timedelta(days=7))
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - started)
+    return latencies, failures
+
+
+def check_breaker_paths():
+    """Assert the breaker and fail-over behaviour of AITaskPlanner's call paths; returns the number of checks"""
+    import threading
+    from ai_service import AITaskPlanner, CircuitBreakers
+    from metrics import ModelMetrics
+
+    def half_open_planner(primary, fallback=None):
+        # Threshold 1 and no cooldown: one recorded failure makes the next call the half-open trial
+        breakers = CircuitBreakers(failure_threshold=1, reset_seconds=0)
+        breakers.get(PRIMARY).record_failure()
+        planner = AITaskPlanner(model=primary, model_name=PRIMARY, use_cache=False, metrics=ModelMetrics(':memory:'),
+                                fallbacks={FALLBACK: fallback} if fallback else None, breakers=breakers,
+                                notify=lambda level, message: None)
+        planner.max_retries = 2
+        return planner, breakers.get(PRIMARY), planner.prompts.build('milestones', "Task", "Work", 7)
+
+    checks = 0
+    # A request error (400) is not the model's fault: the trial is released, not left pending
+    planner, breaker, prompt = half_open_planner(FakeGenerativeModel(0, error_rate=1.0, error_code=400))
+    try:
+        planner._call_model(prompt)
+    except Exception as e:
+        assert getattr(e, 'code', None) == 400, e
+    assert breaker.allow(), "400 left the half-open trial unresolved"
+    checks += 1
+
+    # Out of budget before the request is sent
+    planner, breaker, prompt = half_open_planner(FakeGenerativeModel(0))
+    planner.call_budget = 0
+    try:
+        planner._call_model(prompt)
+    except TimeoutError:
+        pass
+    assert breaker.allow(), "an exhausted call budget left the half-open trial unresolved"
+    checks += 1
+
+    # A stream cancelled mid-way, and one abandoned by its consumer
+    for cancel in (True, False):
+        planner, breaker, prompt = half_open_planner(FakeGenerativeModel(0))
+        cancelled = threading.Event()
+        stream = planner._stream_text(prompt, cancelled=cancelled)
+        next(stream)
+        if cancel:
+            cancelled.set()
+            list(stream)
+        else:
+            stream.close()
+        assert breaker.allow(), f"a {'cancelled' if cancel else 'closed'} stream left the half-open trial unresolved"
+        checks += 1
+
+    # 504 DeadlineExceeded moves to the next model at once rather than retrying the slow one
+    primary, fallback = FakeGenerativeModel(0, error_rate=1.0, error_code=504), FakeGenerativeModel(0)
+    planner, breaker, prompt = half_open_planner(primary, fallback)
+    breaker.record_success()
+    planner._call_model(prompt)
+    assert (primary.calls, fallback.calls) == (1, 1), f"504: primary {primary.calls}, fallback {fallback.calls} calls"
+    checks += 1
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3, help="healthy response latency in seconds")
+    parser.add_argument("--hang-rate", type=float, default=0.2, help="share of primary requests that never answer")
+    parser.add_argument("--error-rate", type=float, default=0.3, help="share of primary requests that get a 503")
+    parser.add_argument("--timeout", type=float, default=5.0, help="per-request timeout in seconds")
+    parser.add_argument("--budget", type=float, default=10.0, help="per-call budget in seconds (resilient client)")
+    parser.add_argument("--breaker-failures", type=int, default=2,
+                        help="consecutive failures that open the primary's breaker (resilient client)")
+    args = parser.parse_args()
+
+    server = FakeGeminiServer({
+        PRIMARY: ModelBehaviour(args.latency, args.error_rate, 503, args.hang_rate, hang_seconds=args.timeout * 4),
+        FALLBACK: ModelBehaviour(args.latency),
+    }).start()
+
+    # One JSON log line per call would drown the table
+    logging.getLogger('planner.metrics').setLevel(logging.ERROR)
+
+    # Read by ai_service at import time
+    os.environ.update({'GEMINI_TRANSPORT': 'rest', 'GEMINI_API_ENDPOINT': server.endpoint,
+                       'GEMINI_CALL_TIMEOUT': str(args.timeout), 'GEMINI_FALLBACK_MODELS': FALLBACK})
+    from ai_service import MAX_RETRIES, AITaskPlanner, CircuitBreakers
+    from metrics import ModelMetrics
+
+    print(f"breaker checks passed: {check_breaker_paths()}\n")
+
+    def planner(breakers, metrics):
+        return AITaskPlanner(api_key='fake-key', model_name=PRIMARY, use_cache=False, generation_mode='structured',
+                             notify=lambda level, message: None, metrics=metrics, breakers=breakers)
+
+    # Before: one model, retried with backoff, no breaker and no overall budget
+    baseline = planner(CircuitBreakers(failure_threshold=10 ** 9), ModelMetrics(':memory:'))
+    baseline.model_chain = [PRIMARY]
+    baseline.max_retries = MAX_RETRIES
+    baseline.call_budget = None
+
+    resilient = planner(CircuitBreakers(failure_threshold=args.breaker_failures), ModelMetrics(':memory:'))
+    resilient.call_budget = args.budget
+
+    print(f"{args.plans} plans; primary: {args.hang_rate:.0%} hang, {args.error_rate:.0%} 503; "
+          f"timeout {args.timeout:g}s; breaker opens after {args.breaker_failures} failures; fallback healthy\n")
+    print(f"{'client':>10} {'p50 s':>8} {'p95 s':>8} {'max s':>8} {'failed':>7} {'fallback':>9} {'requests':>9}")
+    for name, client in (('primary', baseline), ('resilient', resilient)):
+        before = server.requests()
+        latencies, failures = run(client, args.plans)
+        after = server.requests()
+        sent = {model: after.get(model, 0) - before.get(model, 0) for model in after}
+        answered = args.plans - failures
+        fallback_share = min(sent.get(FALLBACK, 0), answered) / args.plans
+        # Nearest-rank, as ModelMetrics reports it: never beyond the slowest plan
+        p95 = sorted(latencies)[max(1, math.ceil(0.95 * len(latencies))) - 1]
+        print(f"{name:>10} {statistics.median(latencies):>8.2f} {p95:>8.2f} {max(latencies):>8.2f} "
+              f"{failures / args.plans:>7.0%} {fallback_share:>9.0%} {sum(sent.values()):>9}")
+    print(f"\nbreakers after the run: {resilient.breakers.states()}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Latency of a cold plan generation vs a repeat plan served from the response cache
+
+Run from the repository root:
+
+    python benchmarks/bench_response_cache.py --latency 0.5 --runs 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service import AITaskPlanner, ResponseCache  # noqa: E402
+from benchmarks.fake_model import FakeGenerativeModel  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="fake per-call latency in seconds")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    model = FakeGenerativeModel(latency=args.latency)
+    planner = AITaskPlanner(model=model, use_cache=False)
+    planner.cache = ResponseCache(os.path.join(tempfile.mkdtemp(), "cache.sqlite3"))
+
+    start_date = datetime(2025, 1, 1)
+    end_date = start_date + timedelta(days=7)
+
+    # Warm-up call so one-off import/initialisation cost is not attributed to the cold path
+    planner.generate_milestones("Warm-up task", "Other", start_date, end_date)
+    model.calls = 0
+
+    started = time.perf_counter()
+    planner.generate_milestones("Learn Generative AI", "Learning", start_date, end_date)
+    cold = time.perf_counter() - started
+
+    warm = []
+    for i in range(args.runs):
+        # Whitespace and case differences normalize to the same key
+        name = "  learn generative AI " if i % 2 else "Learn Generative AI"
+        started = time.perf_counter()
+        planner.generate_milestones(name, "Learning", start_date, end_date)
+        warm.append(time.perf_counter() - started)
+
+    print(f"cold generation  : {cold * 1000:.1f} ms ({model.calls} model calls)")
+    print(f"cached (avg)     : {sum(warm) / len(warm) * 1000:.2f} ms")
+    print(f"model calls total: {model.calls}")
+    print(f"cache stats      : {planner.cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Milestone scheduler: full rescheduling vs the incremental UserSchedule, and calendar arithmetic
+
+Schedules every task of a synthetic user (a mix of chains and branching
+dependencies) on a weekday calendar with holidays, then times what a
+milestone toggle costs: rescheduling all tasks and scanning for the task
+finishing last and the late ones, against UserSchedule.update_task() plus
+its heap reads. Times a My Tasks rerun against a SQLite store, where
+UserSchedule.sync() skips reloading the tasks while the store's revision
+is unchanged, and checks that it picks up a write. Also times the
+calendar's date <-> working-day conversions against walking the days one
+by one.
+
+Run from the repository root:
+
+    python benchmarks/bench_scheduler.py --tasks 1000 --milestones 8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task, TaskStatus  # noqa: E402
+from scheduler import UserSchedule, WorkCalendar, schedule_task  # noqa: E402
+from task_store import SQLiteTaskStore  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+TODAY = date(2025, 6, 1)
+
+
+def make_user_tasks(count: int, milestones: int, seed: int = 0):
+    """Open synthetic tasks; a third get milestones depending on the first step or on two earlier ones"""
+    rng = random.Random(seed)
+    tasks = [Task.from_dict(task) for task in make_tasks(count, seed, milestones)]
+    for task in tasks:
+        if task.status == TaskStatus.COMPLETED:
+            task.status = TaskStatus.IN_PROGRESS
+        if rng.random() < 0.33:
+            for position, milestone in enumerate(task.milestones[2:], 2):
+                milestone.depends_on = sorted({1, rng.randint(1, position)})
+    return tasks
+
+
+def full_reschedule(tasks, calendar):
+    schedules = [schedule_task(task, calendar, TODAY) for task in tasks]
+    open_schedules = [schedule for schedule in schedules if schedule.projected_finish is not None]
+    last = max(open_schedules, key=lambda schedule: schedule.projected_finish, default=None)
+    late = sorted((schedule for schedule in open_schedules if schedule.late_days > 0),
+                  key=lambda schedule: -schedule.late_days)[:5]
+    return last, late
+
+
+def walk_workdays(calendar, start, end):
+    count, day = 0, start
+    while day < end:
+        count += calendar.is_workday(day)
+        day += timedelta(days=1)
+    return count
+
+
+def best_ms(fn, repeats: int):
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--milestones", type=int, default=8, help="milestones per task")
+    parser.add_argument("--toggles", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    holidays = [date(2025, 1, 1) + timedelta(days=rng.randrange(730)) for _ in range(20)]
+    calendar = WorkCalendar(range(5), holidays)
+    tasks = make_user_tasks(args.tasks, args.milestones, args.seed)
+    total = sum(len(task.milestones) for task in tasks)
+
+    schedule = UserSchedule(calendar, TODAY)
+    started = time.perf_counter()
+    schedule.update(tasks)
+    first_build = (time.perf_counter() - started) * 1000
+    print(f"{args.tasks} tasks, {total} milestones, first schedule: {first_build:.1f} ms")
+
+    # Same answers both ways before timing them
+    last, late = full_reschedule(tasks, calendar)
+    assert schedule.last_to_finish().projected_finish == last.projected_finish
+    assert [s.late_days for s in schedule.late_tasks()] == [s.late_days for s in late]
+    # Rescheduling without a version change pushes a second current heap entry; it must not list twice
+    for schedule_entry in late:
+        schedule.update_task(next(task for task in tasks if task.id == schedule_entry.task_id))
+    repeated = schedule.late_tasks()
+    assert len({s.task_id for s in repeated}) == len(repeated)
+    assert [s.late_days for s in repeated] == [s.late_days for s in late]
+
+    def incremental_toggle():
+        task = rng.choice(tasks)
+        milestone = rng.choice(task.milestones)
+        milestone.completed = not milestone.completed
+        task.version += 1
+        schedule.update_task(task)
+        schedule.last_to_finish()
+        schedule.late_tasks()
+
+    def full_toggle():
+        task = rng.choice(tasks)
+        milestone = rng.choice(task.milestones)
+        milestone.completed = not milestone.completed
+        task.version += 1
+        full_reschedule(tasks, calendar)
+
+    incremental = best_ms(lambda: [incremental_toggle() for _ in range(args.toggles)], 3) / args.toggles
+    full = best_ms(lambda: [full_toggle() for _ in range(max(1, args.toggles // 20))], 3) / max(1, args.toggles // 20)
+    unchanged = best_ms(lambda: schedule.update(tasks), 3)
+    print(f"\n{'per toggle':<34} {'ms':>10}")
+    print(f"{'full reschedule + scans':<34} {full:>10.3f}")
+    print(f"{'incremental update_task + heaps':<34} {incremental:>10.3f}  ({full / incremental:,.0f}x)")
+    print(f"{'update() with nothing changed':<34} {unchanged:>10.3f}")
+    print(f"heap entries after {args.toggles * 3} toggles: {len(schedule._finish_heap)} finish, {len(schedule._late_heap)} late")
+
+    # A rerun of My Tasks: reload and diff every task vs one revision read
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteTaskStore(os.path.join(directory, 'tasks.sqlite3'))
+        saved = store.add_tasks('bench', [Task.from_dict(task.to_dict()) for task in tasks])
+        synced = UserSchedule(calendar, TODAY)
+        synced.sync(store, 'bench')
+        assert len(synced) == len(schedule)
+        reload = best_ms(lambda: synced.update(store.load_tasks('bench')), 3)
+        unchanged_sync = best_ms(lambda: synced.sync(store, 'bench'), 3)
+        task = next(task for task in saved if synced.get(task.id) is not None)
+        store.update_task_status('bench', task.id, TaskStatus.COMPLETED)
+        synced.sync(store, 'bench')
+        assert synced.get(task.id) is None, "sync() missed a store write"
+    print(f"\n{'per My Tasks rerun':<34} {'ms':>10}")
+    print(f"{'load_tasks + update()':<34} {reload:>10.3f}")
+    print(f"{'sync() with nothing changed':<34} {unchanged_sync:>10.3f}")
+
+    # Working days over windows of up to two years: rank arithmetic vs a day-by-day walk
+    windows = [(date(2025, 1, 1) + timedelta(days=rng.randrange(365)), rng.randint(1, 730)) for _ in range(500)]
+    windows = [(start, start + timedelta(days=length)) for start, length in windows]
+    assert all(calendar.workdays_between(start, end) == walk_workdays(calendar, start, end) for start, end in windows)
+    ranks = [calendar.rank(start) + rng.randrange(500) for start, _ in windows]
+    print(f"\n{'calendar, per call':<34} {'us':>10}")
+    for label, fn in (
+        ("workdays_between (ranks)", lambda: [calendar.workdays_between(start, end) for start, end in windows]),
+        ("workdays_between (walk)", lambda: [walk_workdays(calendar, start, end) for start, end in windows]),
+        ("day(rank)", lambda: [calendar.day(rank) for rank in ranks]),
+    ):
+        print(f"{label:<34} {best_ms(fn, 3) * 1000 / len(windows):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Similar-plan reuse: share of paraphrased tasks served without a model call, wrong reuses, lookup latency
+
+A labelled set of task pairs is indexed (first task) and queried (second):
+paraphrases should reuse the indexed plan, different tasks should not.
+The reuse rates are printed for several thresholds, then lookup time for
+growing indexes padded with generated task names.
+
+Run from the repository root:
+
+    python benchmarks/bench_similar_plans.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Milestone  # noqa: E402
+from similar_plans import SimilarPlanIndex  # noqa: E402
+
+# (indexed task, new task, same plan wanted)
+PAIRS = [
+    ("Learn Generative AI", "Learn GenAI", True),
+    ("Learn machine learning", "Learn ML", True),
+    ("Write quarterly report", "Write the quarterly report", True),
+    ("Build a personal website", "Build my personal website", True),
+    ("Plan team offsite", "Plan a team offsite", True),
+    ("Learn Generative AI", "learn generative ai basics", True),
+    ("Learn guitar", "Learn to play guitar", True),
+    ("Train for a half marathon", "Run a half marathon", True),
+    ("Learn to make Biryani", "Learn to cook Biryani", True),
+    ("Learn Rust", "Learn Rust programming", True),
+    ("Learn Rust", "Learn Go", False),
+    ("Learn Spanish", "Learn French", False),
+    ("Plan wedding", "Plan birthday party", False),
+    ("Write a blog post", "Write a book", False),
+    ("Renovate kitchen", "Renovate bathroom", False),
+    ("Prepare for AWS certification", "Prepare for GCP certification", False),
+    ("Learn Go programming", "Learn Python", False),
+    ("Save for a house deposit", "Save for a car", False),
+]
+
+VERBS = ["Learn", "Plan", "Build", "Write", "Prepare", "Organize", "Improve", "Research", "Design", "Practice"]
+TOPICS = ["Kubernetes", "tax return", "garden shed", "photography", "public speaking", "budget spreadsheet",
+          "mobile app", "novel chapter", "team retrospective", "home network", "sourdough bread", "chess openings",
+          "interview prep", "wedding speech", "data pipeline", "yoga routine", "podcast episode", "investment plan"]
+
+MILESTONES = [Milestone(1, "Research", estimated_days=2), Milestone(2, "Do it", estimated_days=5),
+              Milestone(3, "Review", estimated_days=3)]
+
+
+def reuse_rates(threshold: float):
+    """(paraphrases reused, different tasks wrongly reused) as shares"""
+    reused = {True: 0, False: 0}
+    for indexed, query, same in PAIRS:
+        index = SimilarPlanIndex(':memory:', threshold)
+        # Unrelated plans alongside, so document frequencies are not degenerate
+        for indexed_other, _, _ in PAIRS:
+            index.add(indexed_other, "Work", 10, "", MILESTONES, "", "3")
+        match = index.find(query, "Work", "", "3")
+        reused[same] += match is not None and match.task_name == indexed
+    positives = sum(1 for pair in PAIRS if pair[2])
+    return reused[True] / positives, reused[False] / (len(PAIRS) - positives)
+
+
+def lookup_latency(size: int, lookups: int = 200):
+    """Mean seconds per find() with `size` indexed plans"""
+    rng = random.Random(size)
+    index = SimilarPlanIndex(':memory:', max_entries=size)
+    for number in range(size):
+        index.add(f"{rng.choice(VERBS)} {rng.choice(TOPICS)} {number}", "Work", 10, "", MILESTONES, "", "3")
+    queries = [f"{rng.choice(VERBS)} the {rng.choice(TOPICS)}" for _ in range(lookups)]
+    started = time.perf_counter()
+    for query in queries:
+        index.find(query, "Work", "", "3")
+    return (time.perf_counter() - started) / lookups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    args = parser.parse_args()
+
+    print(f"{len(PAIRS)} labelled pairs\n")
+    print(f"{'threshold':>10} {'paraphrases reused':>19} {'wrong reuse':>12}")
+    for threshold in (0.6, 0.7, 0.8, 0.9):
+        recall, false_reuse = reuse_rates(threshold)
+        print(f"{threshold:>10.1f} {recall:>19.0%} {false_reuse:>12.0%}")
+
+    print(f"\n{'plans':>10} {'lookup ms':>10}")
+    for size in args.sizes:
+        print(f"{size:>10} {lookup_latency(size) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
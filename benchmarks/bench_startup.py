@@ -0,0 +1,143 @@
+"""Cold start: import-time profile of the app's imports and first paint of each page in a fresh process
+
+The profile runs app.py's top-level imports under `python -X importtime`
+and sums each top-level package's own import time, so a heavy library
+pulled in indirectly (google.generativeai through ai_service) is charged
+to itself. First paint starts a new Python process per page and times
+its first headless AppTest run of that page, imports included, against
+a store seeded with synthetic tasks. With --eager the process first
+imports pandas, plotly.express and google.generativeai inside the timed
+window, as app.py used to at the top of every cold start.
+
+No API key is used; all data files go to a temporary directory.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py --runs 3
+    python benchmarks/bench_startup.py --runs 3 --eager
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+PAGES = ["Dashboard", "My Tasks", "Create Task", "Analytics"]
+
+# What app.py imported at the top before the chart and Gemini libraries were deferred
+EAGER_MODULES = ["pandas", "plotly.express", "google.generativeai"]
+
+
+def app_imports(path: str = APP_PATH):
+    """Source of app.py's module-level import statements, i.e. what every cold start pays for"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def child_env(workdir: str):
+    return dict(os.environ, GEMINI_API_KEY="", PYTHONPATH=ROOT,
+                TASKS_DB_PATH=os.path.join(workdir, "tasks.sqlite3"),
+                PLANNER_CACHE_PATH=os.path.join(workdir, "ai_response_cache.sqlite3"))
+
+
+def import_profile(source: str, workdir: str):
+    """{top-level package: own import ms} for running source under -X importtime"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", source], capture_output=True, text=True,
+                               cwd=workdir, env=child_env(workdir), check=True)
+    totals = defaultdict(float)
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(own) / 1000
+    return totals
+
+
+def seed_store(workdir: str, tasks: int):
+    """Synthetic tasks for the user the page runs open"""
+    env = child_env(workdir)
+    script = ("from task_store import get_task_store; from models import Task; "
+              "from benchmarks.synthetic import make_tasks; "
+              f"get_task_store().add_tasks('bench', [Task.from_dict(task) for task in make_tasks({tasks})])")
+    subprocess.run([sys.executable, "-c", script], cwd=workdir, env=env, check=True)
+
+
+def first_paint(page: str, eager: bool):
+    """Run in a fresh process: ms from before the first import to the page's first completed run"""
+    started = time.perf_counter()
+    if eager:
+        for module in EAGER_MODULES:
+            __import__(module)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.query_params['uid'] = 'bench'
+    if page != "Dashboard":
+        # Start on the page, as a bookmarked or reloaded page would
+        at.run()
+        at.sidebar.selectbox[0].set_value(page)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return (time.perf_counter() - started) * 1000
+
+
+def run(runs: int = 3, tasks: int = 200, eager: bool = False, pages=PAGES):
+    """Import profile total and per-page first paint as results (name, value, unit, better, params), see run_suite.py"""
+    workdir = tempfile.mkdtemp(prefix="planner-startup-")
+    source = app_imports()
+    if eager:
+        source = "\n".join(f"import {module}" for module in EAGER_MODULES) + "\n" + source
+    profile = import_profile(source, workdir)
+    params = {'eager': eager, 'runs': runs}
+    results = [{'name': "startup.app_imports_ms", 'value': sum(profile.values()), 'unit': 'ms', 'better': 'lower',
+                'params': dict(params, top=dict(sorted(profile.items(), key=lambda item: -item[1])[:12]))}]
+
+    seed_store(workdir, tasks)
+    for page in pages:
+        timings = []
+        for _ in range(runs):
+            command = [sys.executable, os.path.abspath(__file__), "--child", page] + (["--eager"] if eager else [])
+            completed = subprocess.run(command, capture_output=True, text=True, cwd=workdir, env=child_env(workdir))
+            if completed.returncode:
+                raise RuntimeError(f"{page}: {completed.stderr.strip().splitlines()[-1]}")
+            timings.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        results.append({'name': f"startup.{page.lower().replace(' ', '_')}.first_paint_ms",
+                        'value': statistics.median(timings), 'unit': 'ms', 'better': 'lower',
+                        'params': dict(params, tasks=tasks)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per page; the median is reported")
+    parser.add_argument("--tasks", type=int, default=200, help="synthetic tasks in the store")
+    parser.add_argument("--eager", action="store_true", help="import pandas, plotly and genai up front, as before")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(first_paint(args.child, args.eager)))
+        return
+
+    results = run(args.runs, args.tasks, args.eager)
+    profile = results[0]
+    print(f"app.py imports{' (eager)' if args.eager else ''}: {profile['value']:.0f} ms")
+    for name, own in profile['params']['top'].items():
+        print(f"  {name:<28} {own:>8.1f} ms")
+    print(f"\n{'first paint, fresh process':<40} {'median ms':>10}")
+    for result in results[1:]:
+        print(f"{result['name']:<40} {result['value']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
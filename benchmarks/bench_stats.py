@@ -0,0 +1,95 @@
+"""Cost of the Quick Stats/Dashboard/Analytics numbers: full scans vs the store's counters
+
+Also replays random mutations against each backend and checks that the
+maintained counters still match a recount from scratch.
+
+Run from the repository root:
+
+    python benchmarks/bench_stats.py --sizes 100 1000 10000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task, TaskStats, TaskStatus  # noqa: E402
+from task_store import JSONFileTaskStore, SQLiteTaskStore  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+
+def scan(tasks):
+    """What the three pages computed on every rerun before"""
+    completed = len([t for t in tasks if t.status == TaskStatus.COMPLETED])
+    in_progress = len([t for t in tasks if t.status == TaskStatus.IN_PROGRESS])
+    estimated = actual = 0
+    categories = {}
+    statuses = {}
+    for task in tasks:
+        for milestone in task.milestones:
+            estimated += milestone.estimated_days
+        actual += task.duration_days
+        categories[task.category] = categories.get(task.category, 0) + 1
+        statuses[task.status.value] = statuses.get(task.status.value, 0) + 1
+    return completed, in_progress, estimated, actual, categories, statuses
+
+
+def per_call(fn, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def check_mutations(store, user_id, rounds, seed=0):
+    """Random status changes, milestone toggles, inserts and a clear; counters must match a recount"""
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        tasks = store.load_tasks(user_id)
+        task = rng.choice(tasks)
+        action = rng.random()
+        if action < 0.4:
+            store.update_task_status(user_id, task.id, rng.choice(list(TaskStatus)).value)
+        elif action < 0.9:
+            position = rng.randrange(len(task.milestones))
+            store.set_milestone_completed(user_id, task.id, position, not task.milestones[position].completed)
+        else:
+            store.add_task(user_id, Task.from_dict(make_tasks(1, seed=rng.randrange(1000))[0]))
+        assert store.load_stats(user_id) == TaskStats.from_tasks(store.load_tasks(user_id)), type(store).__name__
+
+    store.clear_tasks(user_id)
+    assert store.load_stats(user_id) == TaskStats(), type(store).__name__
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    for store in (SQLiteTaskStore(os.path.join(workdir, "check.sqlite3")), JSONFileTaskStore(workdir)):
+        for task in make_tasks(20):
+            store.add_task("check", Task.from_dict(task))
+        check_mutations(store, "check", args.rounds)
+    print(f"counters match a recount after {args.rounds} random mutations (sqlite, json file)")
+
+    print(f"{'tasks':>7} {'full scan':>12} {'stats read':>12} {'stats cached':>14}")
+    for size in args.sizes:
+        store = SQLiteTaskStore(os.path.join(workdir, f"bench_{size}.sqlite3"))
+        for task in make_tasks(size):
+            store.add_task("bench", Task.from_dict(task))
+        tasks = store.load_tasks("bench")
+
+        scan_ms = per_call(lambda: scan(tasks), args.repeats)
+        read_ms = per_call(lambda: store._load_stats_uncached("bench"), args.repeats)
+        cached_ms = per_call(lambda: store.load_stats("bench"), args.repeats)
+        print(f"{size:>7} {scan_ms:>9.3f} ms {read_ms:>9.3f} ms {cached_ms:>11.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Time-to-first-milestone with streaming vs the blocking generate_plan
+
+Also runs one plan job through plan_jobs.PlanQueue and checks that its
+provisional milestones show up on the job row, where the app's polling
+fragment previews them, before the job finishes.
+
+Run from the repository root:
+
+    python benchmarks/bench_streaming.py --latency 2.0
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service import AITaskPlanner, CircuitBreakers  # noqa: E402
+from benchmarks.fake_model import FakeGenerativeModel  # noqa: E402
+from metrics import ModelMetrics  # noqa: E402
+
+
+def job_preview(latency: float, mode: str):
+    """Seconds until a queued job's row first shows milestones, and until it is done"""
+    from plan_jobs import PlanQueue
+    from task_store import SQLiteTaskStore
+
+    planner = AITaskPlanner(model=FakeGenerativeModel(latency=latency), use_cache=False, generation_mode=mode,
+                            metrics=ModelMetrics(':memory:'), breakers=CircuitBreakers())
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteTaskStore(os.path.join(directory, 'tasks.sqlite3'))
+        jobs = PlanQueue(os.path.join(directory, 'plan_jobs.sqlite3'), store=store, planner=planner,
+                         workers=1, poll_seconds=0.01)
+        start_date = datetime(2025, 1, 1).date()
+        started = time.perf_counter()
+        task = jobs.submit('bench', "Learn to make Biryani", "Personal", start_date, start_date + timedelta(days=7))
+        first_preview = None
+        while True:
+            job = jobs.job_for_task('bench', task.id)
+            if job.active and job.milestones and first_preview is None:
+                first_preview = time.perf_counter() - started
+            if not job.active:
+                break
+            time.sleep(0.01)
+        done = time.perf_counter() - started
+        jobs.stop()
+    assert job.state == 'done' and job.source == 'model', job
+    assert first_preview is not None and first_preview < done, "no provisional milestones on the job row"
+    return first_preview, done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=2.0, help="fake full-response latency in seconds")
+    parser.add_argument("--mode", choices=["structured", "two_prompt"], default="structured")
+    args = parser.parse_args()
+
+    model = FakeGenerativeModel(latency=args.latency)
+    planner = AITaskPlanner(model=model, use_cache=False, generation_mode=args.mode)
+    start_date = datetime(2025, 1, 1)
+    end_date = start_date + timedelta(days=7)
+
+    # Warm-up call so one-off import/initialisation cost is not attributed to either path
+    planner.generate_plan("Warm-up task", "Other", start_date, end_date)
+
+    started = time.perf_counter()
+    planner.generate_plan("Learn to make Biryani", "Personal", start_date, end_date)
+    blocking = time.perf_counter() - started
+
+    first_milestone = first_analysis = None
+    started = time.perf_counter()
+    for kind, _ in planner.generate_plan_stream("Learn to make Biryani", "Personal", start_date, end_date):
+        elapsed = time.perf_counter() - started
+        if kind == 'milestone' and first_milestone is None:
+            first_milestone = elapsed
+        elif kind == 'analysis' and first_analysis is None:
+            first_analysis = elapsed
+    streamed_total = time.perf_counter() - started
+
+    first_preview, job_done = job_preview(args.latency, args.mode)
+
+    print(f"blocking: first milestone after {blocking:.3f}s (all at once)")
+    print(f"stream  : first milestone after {first_milestone:.3f}s")
+    print(f"stream  : first analysis  after {first_analysis:.3f}s")
+    print(f"stream  : complete after        {streamed_total:.3f}s")
+    print(f"job row : first preview after   {first_preview:.3f}s (done after {job_done:.3f}s)")
+    print(f"model calls per plan           : {model.calls // 3}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Write latency of one milestone toggle: whole-file JSON rewrite vs the SQLite task store
+
+Run from the repository root:
+
+    python benchmarks/bench_task_store.py --sizes 10 100 1000 5000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task  # noqa: E402
+from task_store import SQLiteTaskStore  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+
+def bench_json(tasks, path, repeats):
+    """Old save_tasks(): flip one flag, re-serialize everything"""
+    started = time.perf_counter()
+    for i in range(repeats):
+        tasks[0]['milestones'][0]['completed'] = bool(i % 2)
+        with open(path, 'w') as f:
+            json.dump(tasks, f, indent=2, default=str)
+    return (time.perf_counter() - started) / repeats
+
+
+def bench_store(tasks, path, repeats):
+    """Row-level update of the same milestone"""
+    store = SQLiteTaskStore(path)
+    for task in tasks:
+        store.add_task("bench", Task.from_dict(task))
+    started = time.perf_counter()
+    for i in range(repeats):
+        store.set_milestone_completed("bench", 1, 0, bool(i % 2))
+    return (time.perf_counter() - started) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    print(f"{'tasks':>7} {'json rewrite':>14} {'sqlite row':>12}")
+    for size in args.sizes:
+        tasks = make_tasks(size)
+        json_ms = bench_json(tasks, os.path.join(workdir, f"tasks_{size}.json"), args.repeats) * 1000
+        store_ms = bench_store(tasks, os.path.join(workdir, f"tasks_{size}.sqlite3"), args.repeats) * 1000
+        print(f"{size:>7} {json_ms:>11.2f} ms {store_ms:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
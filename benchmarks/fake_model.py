@@ -0,0 +1,124 @@
+"""Local stand-in for genai.GenerativeModel used by the benchmarks"""
+import json
+import random
+import threading
+import time
+
+
+MILESTONES_TEXT = """
+1. Research the fundamentals and gather materials - 2 days
+
+2. Practice the core techniques with guided exercises - 3 days
+
+3. Build a small end-to-end project - 1 day
+
+4. Review results and refine the approach - 1 day
+"""
+
+ANALYSIS_TEXT = """
+📚 LEARNING RESOURCES & EXAMPLES:
+- Official guides and a beginner-friendly book
+
+💡 PRACTICAL TIPS & STRATEGIES:
+- Work in short daily sessions and track progress
+"""
+
+STRUCTURED_TEXT = json.dumps({
+    "milestones": [
+        {"name": "Research the fundamentals and gather materials", "description": "Collect guides and ingredients.", "estimated_days": 2},
+        {"name": "Practice the core techniques with guided exercises", "description": "Work through the basics.", "estimated_days": 3},
+        {"name": "Build a small end-to-end project", "description": "Apply everything once.", "estimated_days": 1},
+        {"name": "Review results and refine the approach", "description": "Note what to improve.", "estimated_days": 1},
+    ],
+    "notes": {
+        "learning_resources": ["Official guides and a beginner-friendly book"],
+        "practical_tips": ["Work in short daily sessions and track progress"],
+    },
+}, indent=2)
+
+
+class FakeUsage:
+    """usage_metadata with token counts estimated at four characters per token"""
+
+    def __init__(self, prompt: str, text: str):
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeStream:
+    """Streamed response: iterate for chunks; usage_metadata is set once the stream is exhausted"""
+
+    def __init__(self, chunks, latency: float, usage: FakeUsage):
+        self._chunks = chunks
+        self._latency = latency
+        self._usage = usage
+        self.usage_metadata = None
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            time.sleep(self._latency / len(self._chunks))
+            yield FakeResponse(chunk)
+        self.usage_metadata = self._usage
+
+
+class FakeAPIError(Exception):
+    """Shaped like google.api_core errors: carries the HTTP status in .code"""
+
+    def __init__(self, code: int):
+        super().__init__(f"{code} fake API error")
+        self.code = code
+
+
+class FakeGenerativeModel:
+    """Mimics generate_content with a fixed latency and canned responses.
+
+    With stream=True the response is yielded line by line and the latency is
+    spread evenly across the chunks. error_rate makes that share of calls
+    fail with error_code (429 by default), like a rate-limited or
+    overloaded API: after the latency, or before the first chunk of a stream.
+    """
+
+    def __init__(self, latency: float = 0.5, milestones_text: str = MILESTONES_TEXT, analysis_text: str = ANALYSIS_TEXT, structured_text: str = STRUCTURED_TEXT,
+                 error_rate: float = 0.0, error_code: int = 429, seed: int = 0):
+        self.latency = latency
+        self.milestones_text = milestones_text
+        self.analysis_text = analysis_text
+        self.structured_text = structured_text
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+            self.errors += fail
+        if (generation_config or {}).get('response_mime_type') == 'application/json':
+            text = self.structured_text
+        elif "Break down" in prompt:
+            text = self.milestones_text
+        else:
+            text = self.analysis_text
+        if stream:
+            if fail:
+                raise FakeAPIError(self.error_code)
+            return FakeStream(text.splitlines(keepends=True), self.latency, FakeUsage(prompt, text))
+
+        timeout = (request_options or {}).get('timeout')
+        if timeout is not None and self.latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"fake model exceeded {timeout}s deadline")
+        time.sleep(self.latency)
+        if fail:
+            raise FakeAPIError(self.error_code)
+        return FakeResponse(text, FakeUsage(prompt, text))
@@ -0,0 +1,201 @@
+"""Local stand-in for the Gemini REST API, for driving the real client through slow or failing models
+
+Serves POST /v1beta/models/<model>:generateContent and
+:streamGenerateContent with the canned responses of fake_model.py. Each
+model name gets its own ModelBehaviour (latency, error rate and code,
+hang rate), so a degraded primary and a healthy fallback can run side by
+side. Point the planner at it with:
+
+    GEMINI_TRANSPORT=rest GEMINI_API_ENDPOINT=http://127.0.0.1:<port> GEMINI_API_KEY=fake
+
+or run it on its own:
+
+    python benchmarks/fake_server.py --port 8089 --latency 1.0 --error-rate 0.2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_model import ANALYSIS_TEXT, MILESTONES_TEXT, STRUCTURED_TEXT  # noqa: E402
+
+# google.rpc status names for the error codes the fake returns
+STATUS_NAMES = {400: 'INVALID_ARGUMENT', 404: 'NOT_FOUND', 429: 'RESOURCE_EXHAUSTED', 500: 'INTERNAL',
+                503: 'UNAVAILABLE', 504: 'DEADLINE_EXCEEDED'}
+
+
+class ModelBehaviour:
+    """How one fake model responds: latency, share of errors (with code) and share of hung requests"""
+
+    def __init__(self, latency: float = 0.2, error_rate: float = 0.0, error_code: int = 503, hang_rate: float = 0.0,
+                 hang_seconds: float = 120.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+
+
+class FakeGeminiServer:
+    """Threaded HTTP server speaking enough of the Gemini REST API for generate_content.
+
+    Models without an entry in behaviours get default_behaviour; requests()
+    counts requests per model.
+    """
+
+    def __init__(self, behaviours: dict = None, default_behaviour: ModelBehaviour = None, host: str = '127.0.0.1',
+                 port: int = 0, seed: int = 0):
+        self.behaviours = behaviours or {}
+        self.default_behaviour = default_behaviour or ModelBehaviour()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def requests(self):
+        with self._lock:
+            return dict(self._requests)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-gemini', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _decide(self, model: str):
+        """('error', code) / ('hang', seconds) / ('ok', latency) for one request"""
+        behaviour = self.behaviours.get(model, self.default_behaviour)
+        with self._lock:
+            self._requests[model] = self._requests.get(model, 0) + 1
+            roll = self._random.random()
+        if roll < behaviour.hang_rate:
+            return 'hang', behaviour.hang_seconds
+        if roll < behaviour.hang_rate + behaviour.error_rate:
+            return 'error', behaviour.error_code
+        return 'ok', behaviour.latency
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                path = self.path.split('?')[0]
+                model, _, method = path.rpartition('/')[2].partition(':')
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                outcome, value = server._decide(model)
+                if outcome == 'hang':
+                    time.sleep(value)
+                    return
+                if outcome == 'error':
+                    # Overloaded backends fail fast
+                    time.sleep(0.05)
+                    self._send_json(value, {'error': {'code': value, 'message': f"fake {value} from {model}",
+                                                      'status': STATUS_NAMES.get(value, 'UNKNOWN')}})
+                    return
+
+                text = _response_text(body)
+                if method == 'streamGenerateContent':
+                    self._stream(text, body, value)
+                else:
+                    time.sleep(value)
+                    self._send_json(200, _candidate(text, body, final=True))
+
+            def _send_json(self, status: int, payload: dict):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, text: str, body: dict, latency: float):
+                # A JSON array written one candidate per chunk, as the REST transport expects
+                lines = text.splitlines(keepends=True) or [""]
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for index, line in enumerate(lines):
+                    payload = _candidate(line, body, final=index == len(lines) - 1)
+                    self._chunk((b"[" if index == 0 else b",\r\n") + json.dumps(payload).encode('utf-8'))
+                    time.sleep(latency / len(lines))
+                self._chunk(b"]")
+                self._chunk(b"")
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _prompt_text(body: dict):
+    parts = [part.get('text', '') for content in body.get('contents', []) for part in content.get('parts', [])]
+    parts += [part.get('text', '') for part in (body.get('systemInstruction') or {}).get('parts', [])]
+    return "\n".join(parts)
+
+
+def _response_text(body: dict):
+    config = body.get('generationConfig') or {}
+    if config.get('responseMimeType') == 'application/json':
+        return STRUCTURED_TEXT
+    return MILESTONES_TEXT if "Break down" in _prompt_text(body) else ANALYSIS_TEXT
+
+
+def _candidate(text: str, body: dict, final: bool):
+    payload = {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}, 'index': 0}]}
+    if final:
+        payload['candidates'][0]['finishReason'] = 'STOP'
+        prompt_tokens = len(_prompt_text(body)) // 4
+        payload['usageMetadata'] = {'promptTokenCount': prompt_tokens, 'candidatesTokenCount': len(text) // 4,
+                                    'totalTokenCount': prompt_tokens + len(text) // 4}
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-code", type=int, default=503)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    behaviour = ModelBehaviour(args.latency, args.error_rate, args.error_code, args.hang_rate)
+    server = FakeGeminiServer(default_behaviour=behaviour, port=args.port)
+    print(f"fake Gemini API at {server.endpoint} (Ctrl+C to stop)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
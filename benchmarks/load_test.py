@@ -0,0 +1,159 @@
+"""End-to-end load test: concurrent headless app sessions against a fake model
+
+Each simulated user is a Streamlit AppTest session (the app script run
+headless, without a browser or websocket) in its own thread. Every session
+opens the app, creates tasks, waits for their background plans, opens My
+Tasks, toggles a milestone and opens Analytics. All sessions share one
+process, task store, plan queue and planner, as they would on one server.
+
+AppTest is not thread-safe, so script runs take turns under a lock; a
+step's time includes waiting for other sessions' runs. Reruns are
+CPU-bound Python, which one server process's GIL serializes much the same
+way. Plan jobs and model calls overlap freely. The model is benchmarks/fake_model.py with a configurable latency, and all
+data files go to a temporary directory; no API key is used.
+
+Run from the repository root:
+
+    python benchmarks/load_test.py --sessions 8 --tasks 2 --latency 0.5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep ai_service's load_dotenv() from picking up a real key
+os.environ['GEMINI_API_KEY'] = ""
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import ai_service  # noqa: E402
+import plan_jobs  # noqa: E402
+from metrics import ModelMetrics  # noqa: E402
+from benchmarks.fake_model import FakeGenerativeModel  # noqa: E402
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# AppTest sessions cannot run their scripts at the same time
+_script_lock = threading.Lock()
+
+# Seconds between checks for a finished plan, like the app's job fragment polling
+PLAN_POLL_SECONDS = 0.05
+
+
+def page(at, name):
+    at.sidebar.selectbox[0].set_value(name).run()
+
+
+def run_session(number: int, tasks: int, plan_timeout: float, timings, errors):
+    """One user's visit; step durations are appended to timings[step], failures to errors"""
+    def step(name, action):
+        started = time.perf_counter()
+        with _script_lock:
+            action()
+        timings[name].append(time.perf_counter() - started)
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].value}")
+
+    at = AppTest.from_file(APP_PATH, default_timeout=plan_timeout)
+    try:
+        step('open_app', at.run)
+        user_id = at.session_state.user_id
+        for index in range(tasks):
+            step('open_create_task', lambda: page(at, "Create Task"))
+            at.text_input[0].input(f"Load test task {number}-{index}")
+            step('submit_task', lambda: at.button[0].click().run())
+
+            # Time from submit until the background worker has stored the plan
+            task_id = plan_jobs.get_plan_queue().jobs(user_id, limit=1)[0].task_id
+            started = time.perf_counter()
+            while True:
+                job = plan_jobs.get_plan_queue().job_for_task(user_id, task_id)
+                if not job.active:
+                    break
+                if time.perf_counter() - started > plan_timeout:
+                    raise RuntimeError(f"plan for task {task_id} not ready after {plan_timeout:.0f}s")
+                time.sleep(PLAN_POLL_SECONDS)
+            timings['plan_ready'].append(time.perf_counter() - started)
+            if job.state != 'done':
+                raise RuntimeError(f"plan job {job.id} {job.state}: {job.error}")
+
+        step('open_my_tasks', lambda: page(at, "My Tasks"))
+        toggles = [button for button in at.button if button.label in ("Toggle", "Mark Complete")]
+        if toggles:
+            step('toggle_milestone', lambda: toggles[0].click().run())
+        step('open_analytics', lambda: page(at, "Analytics"))
+    except Exception as e:
+        errors.append(f"session {number}: {e}")
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def run(sessions: int = 8, tasks: int = 2, latency: float = 0.5, workers: int = plan_jobs.PLAN_JOB_WORKERS,
+        plan_timeout: float = 60.0, workdir: str = None):
+    """Run the sessions concurrently; results as dicts (name, value, unit, better, params), see run_suite.py"""
+    previous = os.getcwd()
+    os.chdir(workdir or tempfile.mkdtemp(prefix="planner-load-"))
+    try:
+        # Relative data paths (task store, jobs, caches, metrics) now point into the work directory
+        planner = ai_service.AITaskPlanner(model=FakeGenerativeModel(latency), use_cache=False,
+                                           metrics=ModelMetrics(':memory:'))
+        planner.api_key = ""
+        ai_service._shared_planner = planner
+        plan_jobs._plan_queue = plan_jobs.PlanQueue(workers=workers, poll_seconds=PLAN_POLL_SECONDS)
+
+        timings = defaultdict(list)
+        errors = []
+        threads = [
+            threading.Thread(target=run_session, args=(number, tasks, plan_timeout, timings, errors))
+            for number in range(sessions)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        plan_jobs._plan_queue.stop()
+    finally:
+        os.chdir(previous)
+
+    params = {'sessions': sessions, 'tasks_per_session': tasks, 'model_latency_s': latency, 'workers': workers}
+    results = []
+    for name, values in timings.items():
+        for label, value in (('p50', statistics.median(values)), ('p95', percentile(values, 0.95)), ('max', max(values))):
+            results.append({'name': f"load.{name}.{label}_ms", 'value': value * 1000, 'unit': 'ms', 'better': 'lower',
+                            'params': dict(params, samples=len(values))})
+    results.append({'name': "load.plans_per_minute", 'value': len(timings['plan_ready']) / elapsed * 60,
+                    'unit': 'plans/min', 'better': 'higher', 'params': params})
+    results.append({'name': "load.failed_sessions", 'value': len(errors), 'unit': 'sessions', 'better': 'lower',
+                    'params': dict(params, errors=errors[:5])})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent simulated users")
+    parser.add_argument("--tasks", type=int, default=2, help="tasks each user creates")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model seconds per call")
+    parser.add_argument("--workers", type=int, default=plan_jobs.PLAN_JOB_WORKERS, help="plan job workers")
+    parser.add_argument("--plan-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.tasks, args.latency, args.workers, args.plan_timeout)
+    for result in results:
+        print(f"{result['name']:<36} {result['value']:>10.1f} {result['unit']}")
+    for error in results[-1]['params']['errors']:
+        print(f"  {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Benchmark suite: parser, task store, analytics, cold start and an end-to-end load test, as machine-readable results
+
+Writes one JSON document with run metadata (commit, Python, platform,
+time) and a flat list of results, each with a unique name, value, unit,
+which direction is better and the parameters it was measured with. Pass
+an earlier run as --compare to fail (exit status 1) when any result got
+worse by more than --tolerance, so CI can keep a baseline and catch
+regressions. --quick uses small sizes for a run of a minute or so.
+Load-test latencies depend on the machine's load far more than the
+microbenchmarks do; gate on them with a generous tolerance, or use
+--skip-load-test.
+
+Run from the repository root:
+
+    python benchmarks/run_suite.py --output bench.json
+    python benchmarks/run_suite.py --quick --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics  # noqa: E402
+from models import Task  # noqa: E402
+from task_store import JSONFileTaskStore, SQLiteTaskStore  # noqa: E402
+from benchmarks import bench_parser, bench_startup, load_test  # noqa: E402
+from benchmarks.bench_analytics import frame_analytics  # noqa: E402
+from benchmarks.synthetic import make_tasks  # noqa: E402
+
+FULL = {'parser_repeats': 10, 'store_sizes': [100, 1000, 10000], 'analytics_sizes': [1000, 10000, 100000],
+        'startup_runs': 3, 'load_test': {'sessions': 8, 'tasks': 2, 'latency': 0.5}}
+QUICK = {'parser_repeats': 3, 'store_sizes': [100, 1000], 'analytics_sizes': [1000, 10000],
+         'startup_runs': 1, 'load_test': {'sessions': 4, 'tasks': 1, 'latency': 0.1}}
+
+# Differences below this many milliseconds are timer noise, not regressions
+MIN_DELTA_MS = 0.5
+
+
+def best_of(fn, repeats: int):
+    """Fastest of `repeats` calls in milliseconds; steadier between runs than the mean"""
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def result(name, value, unit, better='lower', **params):
+    return {'name': name, 'value': value, 'unit': unit, 'better': better, 'params': params}
+
+
+def store_results(sizes, repeats: int = 5):
+    """Load (cold and cached) and single-write latency of both task stores against data size"""
+    results = []
+    workdir = tempfile.mkdtemp(prefix="planner-suite-")
+    for size in sizes:
+        tasks = [Task.from_dict(task) for task in make_tasks(size)]
+        stores = {
+            'json': (JSONFileTaskStore(workdir), os.path.join(workdir, "tasks_data_bench.json")),
+            'sqlite': (SQLiteTaskStore(os.path.join(workdir, f"tasks_{size}.sqlite3")),
+                       os.path.join(workdir, f"tasks_{size}.sqlite3")),
+        }
+        for backend, (store, path) in stores.items():
+            store.clear_tasks("bench")
+            store.add_tasks("bench", tasks)
+            toggles = iter(range(1_000_000))
+            params = {'tasks': size, 'file_bytes': os.path.getsize(path)}
+            for kind, fn in (
+                ('load_cold', lambda: store._load_uncached("bench")),
+                ('load_cached', lambda: store.load_tasks("bench")),
+                ('save_one_milestone', lambda: store.set_milestone_completed("bench", 1, 0, next(toggles) % 2 == 0)),
+            ):
+                store.load_tasks("bench")  # warm the load cache, as every rerun after the first finds it
+                results.append(result(f"store.{backend}.{size}.{kind}_ms", best_of(fn, repeats), 'ms', **params))
+    return results
+
+
+def analytics_results(sizes, repeats: int = 3):
+    """Frame build (once per store revision) and the Analytics page's computations (every rerun)"""
+    results = []
+    for size in sizes:
+        tasks = [Task.from_dict(task) for task in make_tasks(size)]
+        task_frame, milestone_frame = analytics.task_frames(tasks)
+        results.append(result(f"analytics.{size}.frame_build_ms", best_of(lambda: analytics.task_frames(tasks), repeats),
+                              'ms', tasks=size))
+        results.append(result(f"analytics.{size}.page_ms",
+                              best_of(lambda: frame_analytics(task_frame, milestone_frame), repeats), 'ms', tasks=size))
+    return results
+
+
+def metadata(config):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': config,
+    }
+
+
+def regressions(results, baseline, tolerance: float):
+    """(name, baseline value, value) of results worse than the baseline by more than tolerance"""
+    previous = {item['name']: item for item in baseline['results']}
+    worse = []
+    for item in results:
+        old = previous.get(item['name'])
+        if old is None or old['value'] == 0:
+            continue
+        change = (item['value'] - old['value']) / old['value']
+        if item['better'] == 'higher':
+            change = -change
+        if change > tolerance and not (item['unit'] == 'ms' and abs(item['value'] - old['value']) < MIN_DELTA_MS):
+            worse.append((item['name'], old['value'], item['value']))
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown, 0.5 = 50%%")
+    parser.add_argument("--quick", action="store_true", help="small sizes, for CI")
+    parser.add_argument("--skip-load-test", action="store_true")
+    args = parser.parse_args()
+
+    config = dict(QUICK if args.quick else FULL)
+    if args.skip_load_test:
+        config['load_test'] = None
+
+    started = time.perf_counter()
+    results = bench_parser.run(config['parser_repeats'])
+    results += store_results(config['store_sizes'])
+    results += analytics_results(config['analytics_sizes'])
+    results += bench_startup.run(config['startup_runs'])
+    if config['load_test']:
+        results += load_test.run(**config['load_test'])
+
+    for item in results:
+        print(f"{item['name']:<48} {item['value']:>12.3f} {item['unit']}")
+    print(f"{len(results)} results in {time.perf_counter() - started:.0f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'metadata': metadata(config), 'results': results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        worse = regressions(results, baseline, args.tolerance)
+        print(f"\nagainst {args.compare} ({baseline['metadata'].get('commit') or 'unknown commit'}): "
+              f"{len(worse)} regression(s) beyond {args.tolerance:.0%}")
+        for name, old, new in worse:
+            print(f"  {name}: {old:.3f} -> {new:.3f}")
+        if worse:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Synthetic task lists shaped like tasks_data.json for the benchmarks"""
+import random
+from datetime import datetime, timedelta
+
+CATEGORIES = ["Personal", "Work", "Health", "Learning", "Finance", "Other"]
+STATUSES = ["pending", "in_progress", "completed"]
+PRIORITIES = ["High", "Medium", "Low"]
+
+
+def make_tasks(count: int, seed: int = 0, milestones_per_task: int = 4):
+    """Return count task dicts with milestones, reproducible for a given seed"""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    tasks = []
+    for task_id in range(1, count + 1):
+        start = base + timedelta(days=rng.randrange(365))
+        duration = rng.randint(3, 120)
+        milestones = []
+        for milestone_id in range(1, milestones_per_task + 1):
+            days = max(1, duration // milestones_per_task)
+            milestones.append({
+                'id': milestone_id,
+                'name': f"Step {milestone_id} of synthetic task {task_id}",
+                'priority': rng.choice(PRIORITIES),
+                'progress': 0,
+                'completed': rng.random() < 0.4,
+                'estimated_days': days,
+                'description': f"Step {milestone_id} of synthetic task {task_id} - {days} days",
+            })
+        tasks.append({
+            'id': task_id,
+            'name': f"Synthetic task {task_id}",
+            'category': rng.choice(CATEGORIES),
+            'start_date': start.strftime('%Y-%m-%d'),
+            'end_date': (start + timedelta(days=duration)).strftime('%Y-%m-%d'),
+            'status': rng.choice(STATUSES),
+            'milestones': milestones,
+            'created_at': start.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+    return tasks
@@ -0,0 +1,162 @@
+"""Bulk task creation: parse a CSV/JSON task list, plan every task concurrently, save in one write"""
+import csv
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+from ai_service import MAX_RETRIES, REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, RateLimiter
+from models import Task, TaskStatus
+
+# Plans generated at once; the rate limiter decides how fast requests actually go out
+BULK_WORKERS = int(os.getenv('BULK_IMPORT_WORKERS', '4'))
+
+# Tasks without an end date or duration get this many days
+DEFAULT_DURATION_DAYS = 7
+
+# Accepted spellings of each column, first match wins
+COLUMN_ALIASES = {
+    'name': ('name', 'task', 'task_name', 'title'),
+    'category': ('category',),
+    'start_date': ('start_date', 'start'),
+    'end_date': ('end_date', 'end', 'due', 'due_date'),
+    'duration_days': ('duration_days', 'duration', 'days'),
+    'context': ('context', 'additional_context', 'notes', 'description'),
+}
+
+
+class BulkTaskSpec:
+    """One row of an import: what to plan, before any AI call"""
+
+    __slots__ = ('row', 'name', 'category', 'start_date', 'end_date', 'context')
+
+    def __init__(self, row: int, name: str, category: str, start_date: date, end_date: date, context: str = ""):
+        self.row = row
+        self.name = name
+        self.category = category
+        self.start_date = start_date
+        self.end_date = end_date
+        self.context = context
+
+
+class BulkResult:
+    """Outcome of planning one spec: a task ready to save (plus its analysis), or the error that stopped it"""
+
+    __slots__ = ('spec', 'task', 'error', 'analysis')
+
+    def __init__(self, spec: BulkTaskSpec, task: Task = None, error: str = None, analysis: str = ""):
+        self.spec = spec
+        self.task = task
+        self.error = error
+        self.analysis = analysis
+
+
+def _pick(record: dict, field: str):
+    for alias in COLUMN_ALIASES[field]:
+        value = record.get(alias)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _spec_from_record(row: int, record: dict, today: date):
+    record = {str(key).strip().lower(): value for key, value in record.items() if key is not None}
+    name = str(_pick(record, 'name') or '').strip()
+    if not name:
+        raise ValueError("missing task name")
+
+    start = _pick(record, 'start_date')
+    start_date = date.fromisoformat(str(start).strip()) if start else today
+    end = _pick(record, 'end_date')
+    if end:
+        end_date = date.fromisoformat(str(end).strip())
+    else:
+        end_date = start_date + timedelta(days=int(_pick(record, 'duration_days') or DEFAULT_DURATION_DAYS))
+    if end_date <= start_date:
+        raise ValueError("end date must be after the start date")
+
+    category = str(_pick(record, 'category') or 'Other').strip().title()
+    return BulkTaskSpec(row, name, category, start_date, end_date, str(_pick(record, 'context') or '').strip())
+
+
+def parse_task_list(text: str, today: date = None):
+    """Specs from CSV (with a header row) or a JSON list of objects, plus one message per rejected row.
+
+    Columns: name (required), category, start_date, end_date or
+    duration_days, context. Dates are ISO (YYYY-MM-DD).
+    """
+    today = today or date.today()
+    text = text.strip()
+    if text.startswith('['):
+        records = json.loads(text)
+        if not all(isinstance(record, dict) for record in records):
+            raise ValueError("JSON import must be a list of objects")
+        first_row = 1
+    else:
+        records = list(csv.DictReader(io.StringIO(text)))
+        first_row = 2  # line 1 is the header
+
+    specs = []
+    errors = []
+    for row, record in enumerate(records, start=first_row):
+        try:
+            specs.append(_spec_from_record(row, record, today))
+        except (TypeError, ValueError) as e:
+            errors.append(f"row {row}: {e}")
+    return specs, errors
+
+
+class BulkImporter:
+    """Plans many tasks on a bounded worker pool under shared rate limits.
+
+    plan() yields results as they finish, on the caller's thread, so a UI
+    can show live progress; save() then writes every planned task in one
+    store transaction. With fallback=True a task the model cannot plan gets
+    the planner's template milestones instead of an error. notify, if
+    given, receives this import's planner notices on the worker threads.
+    """
+
+    def __init__(self, planner, store, workers: int = BULK_WORKERS, requests_per_minute: int = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = TOKENS_PER_MINUTE, max_retries: int = MAX_RETRIES, fallback: bool = False,
+                 notify=None):
+        self.planner = planner.with_limits(RateLimiter(requests_per_minute, tokens_per_minute), max_retries, notify)
+        self.store = store
+        self.workers = workers
+        self.fallback = fallback
+        self._cancelled = threading.Event()
+
+    def plan(self, specs):
+        """Yield a BulkResult per spec, in completion order"""
+        self._cancelled.clear()
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bulk-import")
+        try:
+            futures = [pool.submit(self._plan_one, spec) for spec in specs]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Reached early when the caller stops iterating (e.g. a Streamlit rerun): skip queued specs
+            self._cancelled.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def save(self, user_id: str, results):
+        """Store every successfully planned task, in input order, in one write"""
+        tasks = [result.task for result in sorted(results, key=lambda result: result.spec.row) if result.task is not None]
+        if not tasks:
+            return []
+        return self.store.add_tasks(user_id, tasks)
+
+    def _plan_one(self, spec: BulkTaskSpec):
+        if self._cancelled.is_set():
+            return BulkResult(spec, error="cancelled")
+        generate = self.planner.generate_milestones if self.fallback else self.planner.generate_plan
+        try:
+            milestones, analysis = generate(spec.name, spec.category, spec.start_date, spec.end_date, spec.context)
+        except Exception as e:
+            return BulkResult(spec, error=str(e) or type(e).__name__)
+        task = Task(
+            None, spec.name, spec.category, spec.start_date, spec.end_date, TaskStatus.PENDING,
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 1, milestones,
+        )
+        return BulkResult(spec, task, analysis=analysis)
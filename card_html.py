@@ -0,0 +1,104 @@
+"""HTML for the task and milestone cards, escaped and memoized per task version
+
+Task and milestone names come from users, imports and the model, so every
+value is passed through html.escape() before it goes into markup rendered
+with unsafe_allow_html. RenderCache keeps the finished fragments of
+recently shown tasks; any store mutation bumps the task's version, which
+drops that task's fragments, so a rerun only renders cards that changed.
+"""
+import html
+import os
+from collections import OrderedDict
+
+# Tasks whose rendered cards one session keeps
+RENDER_CACHE_TASKS = int(os.getenv('PLANNER_RENDER_CACHE_TASKS', '500'))
+
+STATUS_EMOJI = {"completed": "✅", "in_progress": "🔄", "pending": "⏳", "planning": "🧠"}
+PRIORITY_EMOJI = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}
+
+
+def _days(estimated_days: int):
+    time_emoji = "⏰" if estimated_days <= 1 else "📅"
+    return f"{time_emoji} {estimated_days} day{'s' if estimated_days > 1 else ''}"
+
+
+def task_card_html(task):
+    """Dashboard card for a task"""
+    category = html.escape(task.category)
+    status = str(task.status)
+    return f"""
+<div class="task-card">
+    <h4>{html.escape(task.name)}</h4>
+    <p><span class="category-badge category-{category.lower()}">{category}</span></p>
+    <p><strong>Status:</strong> {STATUS_EMOJI.get(status, "⏳")} {html.escape(status.title())}</p>
+    <p><strong>Due:</strong> {task.end_date}</p>
+</div>
+"""
+
+
+def milestone_card_html(milestone, slot=None):
+    """My Tasks card for a milestone, with its scheduled dates when slot (a scheduler.MilestoneSlot) is given"""
+    status = "✅ Completed" if milestone.completed else "⏳ Pending"
+    priority = html.escape(str(milestone.priority))
+    scheduled = ""
+    if slot is not None:
+        scheduled = f" | <strong>Dates:</strong> {slot.start} → {slot.end}{' 🔥 critical' if slot.critical else ''}"
+    return f"""
+<div class="milestone-item {'completed' if milestone.completed else ''}">
+    <h6>📌 {html.escape(milestone.name)}</h6>
+    <p><strong>Priority:</strong> {PRIORITY_EMOJI.get(milestone.priority, "🟡")} {priority} | <strong>Time:</strong> {_days(milestone.estimated_days)} | <strong>Status:</strong> {status}{scheduled}</p>
+</div>
+"""
+
+
+def milestone_preview_html(milestone):
+    """Create Task card for a milestone of a plan still being generated"""
+    return f"""
+<div class="milestone-item">
+    <h5>📌 {html.escape(milestone.name)}</h5>
+    <p><strong>Time:</strong> {_days(milestone.estimated_days)}</p>
+</div>
+"""
+
+
+class RenderCache:
+    """Rendered HTML fragments per task, least recently shown tasks evicted first.
+
+    Fragments are stored under the task's (version, created_at), so any
+    change to the task, or a new task reusing a deleted one's id, renders
+    afresh. key names the fragment within the task and must cover anything
+    else it depends on, e.g. a milestone's position and scheduled dates.
+    """
+
+    def __init__(self, max_tasks: int = RENDER_CACHE_TASKS):
+        self.max_tasks = max_tasks
+        self._tasks = OrderedDict()  # task_id -> ((version, created_at), {key: html})
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def get(self, task, key, render):
+        """Cached fragment key of task, or render() stored for this version of it"""
+        stamp = (task.version, task.created_at)
+        entry = self._tasks.get(task.id)
+        if entry is None or entry[0] != stamp:
+            entry = (stamp, {})
+            self._tasks[task.id] = entry
+            if len(self._tasks) > self.max_tasks:
+                self._tasks.popitem(last=False)
+        else:
+            self._tasks.move_to_end(task.id)
+        fragments = entry[1]
+        fragment = fragments.get(key)
+        if fragment is None:
+            self.misses += 1
+            fragment = fragments[key] = render()
+        else:
+            self.hits += 1
+        return fragment
+
+    def discard(self, task_id):
+        """Drop a task's fragments, e.g. right after changing it"""
+        self._tasks.pop(task_id, None)
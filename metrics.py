@@ -0,0 +1,301 @@
+"""Model call metrics: structured logs, Prometheus-style counters and histograms, daily token spend
+
+Every Gemini request made by AITaskPlanner is recorded here once it
+finishes (or fails), together with cache lookups and fallbacks. Counters
+and histograms live in memory for the process; per-day totals are also
+written to SQLite so token spend survives restarts.
+"""
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('planner.metrics')
+
+# Daily usage table location; ':memory:' keeps nothing on disk
+METRICS_PATH = os.getenv('PLANNER_METRICS_PATH', 'planner_metrics.sqlite3')
+
+# Calls kept for percentiles and the recent-calls table
+RECENT_CALLS = int(os.getenv('PLANNER_METRICS_RECENT', '2000'))
+
+# Upper bounds (seconds) of the call latency histogram buckets
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, math.inf)
+
+
+class CallRecord:
+    """One finished model request"""
+
+    __slots__ = ('timestamp', 'model', 'kind', 'outcome', 'latency', 'prompt_tokens', 'response_tokens',
+                 'attempt', 'stream', 'error')
+
+    def __init__(self, model: str, kind: str, outcome: str, latency: float, prompt_tokens: int = 0,
+                 response_tokens: int = 0, attempt: int = 0, stream: bool = False, error: str = None, timestamp: float = None):
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.model = model
+        self.kind = kind
+        self.outcome = outcome
+        self.latency = latency
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+        self.attempt = attempt
+        self.stream = stream
+        self.error = error
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+def usage_tokens(response):
+    """(prompt, response) token counts from a response's usage_metadata, zeros when absent"""
+    usage = getattr(response, 'usage_metadata', None)
+    return (int(getattr(usage, 'prompt_token_count', 0) or 0),
+            int(getattr(usage, 'candidates_token_count', 0) or 0))
+
+
+def error_reason(error):
+    """Short failure label: the HTTP status when the error carries one, else the exception type"""
+    for attribute in ('code', 'status_code'):
+        code = getattr(error, attribute, None)
+        if isinstance(code, int):
+            return f"http_{code}"
+    return type(error).__name__
+
+
+def _label_text(labels: dict):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+class ModelMetrics:
+    """Thread-safe collector shared by every planner in the process"""
+
+    def __init__(self, path: str = METRICS_PATH, recent: int = RECENT_CALLS):
+        self.path = path
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent)
+        self._calls = defaultdict(int)          # (model, kind, outcome) -> count
+        self._tokens = defaultdict(int)         # (model, direction) -> tokens
+        self._retries = defaultdict(int)        # model -> retried attempts
+        self._cache = defaultdict(int)          # 'hit' / 'miss' -> lookups
+        self._similar = defaultdict(int)        # 'hit' / 'miss' -> similar-plan lookups
+        self._fallbacks = defaultdict(int)      # reason -> plans served from fallback milestones
+        self._buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))  # (model, kind) -> per-bucket counts
+        self._latency_sum = defaultdict(float)  # (model, kind) -> seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage_daily ("
+                "day TEXT NOT NULL, model TEXT NOT NULL, calls INTEGER NOT NULL DEFAULT 0, "
+                "errors INTEGER NOT NULL DEFAULT 0, prompt_tokens INTEGER NOT NULL DEFAULT 0, "
+                "response_tokens INTEGER NOT NULL DEFAULT 0, latency_seconds REAL NOT NULL DEFAULT 0, "
+                "cache_hits INTEGER NOT NULL DEFAULT 0, fallbacks INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (day, model))"
+            )
+
+    def record_call(self, record: CallRecord):
+        """Count one finished request, add it to the daily totals and log it as JSON"""
+        failed = record.outcome != 'ok'
+        with self._lock:
+            self._recent.append(record)
+            self._calls[(record.model, record.kind, record.outcome)] += 1
+            self._tokens[(record.model, 'prompt')] += record.prompt_tokens
+            self._tokens[(record.model, 'response')] += record.response_tokens
+            if record.attempt:
+                self._retries[record.model] += 1
+            buckets = self._buckets[(record.model, record.kind)]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if record.latency <= bound:
+                    buckets[index] += 1
+                    break
+            self._latency_sum[(record.model, record.kind)] += record.latency
+            self._add_daily(record.model, record.timestamp, calls=1, errors=int(failed),
+                            prompt_tokens=record.prompt_tokens, response_tokens=record.response_tokens,
+                            latency_seconds=record.latency)
+        logger.log(logging.WARNING if failed else logging.INFO, json.dumps({'event': 'model_call', **record.to_dict()}))
+
+    def record_cache(self, model: str, hit: bool):
+        """Count one response cache lookup"""
+        with self._lock:
+            self._cache['hit' if hit else 'miss'] += 1
+            if hit:
+                self._add_daily(model, time.time(), cache_hits=1)
+
+    def record_similar(self, model: str, hit: bool):
+        """Count one similar-plan lookup; a hit reused a past plan instead of calling the model"""
+        with self._lock:
+            self._similar['hit' if hit else 'miss'] += 1
+            if hit:
+                self._add_daily(model, time.time(), cache_hits=1)
+
+    def record_fallback(self, model: str, reason: str):
+        """Count a plan that fell back to template milestones, and why"""
+        with self._lock:
+            self._fallbacks[reason] += 1
+            self._add_daily(model, time.time(), fallbacks=1)
+        logger.warning(json.dumps({'event': 'fallback', 'model': model, 'reason': reason, 'timestamp': time.time()}))
+
+    def _add_daily(self, model: str, timestamp: float, **amounts):
+        # Caller holds self._lock
+        columns = ", ".join(amounts)
+        updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in amounts)
+        with self._conn:
+            self._conn.execute(
+                f"INSERT INTO usage_daily (day, model, {columns}) VALUES (?, ?{', ?' * len(amounts)}) "
+                f"ON CONFLICT (day, model) DO UPDATE SET {updates}",
+                (date.fromtimestamp(timestamp).isoformat(), model, *amounts.values())
+            )
+
+    def recent_calls(self):
+        """Recorded calls still in the window, oldest first"""
+        with self._lock:
+            return list(self._recent)
+
+    def latency_percentiles(self, percentiles=(50, 95)):
+        """{kind: {'calls': n, 'p50': s, 'p95': s}} over successful calls in the recent window"""
+        by_kind = defaultdict(list)
+        for record in self.recent_calls():
+            if record.outcome == 'ok':
+                by_kind[record.kind].append(record.latency)
+        summary = {}
+        for kind, latencies in sorted(by_kind.items()):
+            latencies.sort()
+            summary[kind] = {'calls': len(latencies)}
+            for percentile in percentiles:
+                # Nearest-rank percentile
+                rank = max(1, math.ceil(percentile / 100 * len(latencies)))
+                summary[kind][f'p{percentile}'] = latencies[rank - 1]
+        return summary
+
+    def daily_usage(self, days: int = 30):
+        """Per-day, per-model totals for the last `days` days, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, model, calls, errors, prompt_tokens, response_tokens, latency_seconds, cache_hits, fallbacks "
+                "FROM usage_daily WHERE day >= date('now', 'localtime', ?) ORDER BY day, model",
+                (f'-{days - 1} days',)
+            ).fetchall()
+        columns = ('day', 'model', 'calls', 'errors', 'prompt_tokens', 'response_tokens', 'latency_seconds',
+                   'cache_hits', 'fallbacks')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def totals(self):
+        """Process-wide counters since start, for the diagnostics summary"""
+        with self._lock:
+            calls = sum(self._calls.values())
+            errors = sum(count for (_, _, outcome), count in self._calls.items() if outcome != 'ok')
+            return {
+                'calls': calls,
+                'errors': errors,
+                'retries': sum(self._retries.values()),
+                'prompt_tokens': sum(count for (_, direction), count in self._tokens.items() if direction == 'prompt'),
+                'response_tokens': sum(count for (_, direction), count in self._tokens.items() if direction == 'response'),
+                'cache_hits': self._cache['hit'],
+                'cache_misses': self._cache['miss'],
+                'similar_hits': self._similar['hit'],
+                'similar_misses': self._similar['miss'],
+                'fallbacks': dict(self._fallbacks),
+                'errors_by_reason': self._error_reasons(),
+            }
+
+    def _error_reasons(self):
+        reasons = defaultdict(int)
+        for record in self._recent:
+            if record.error:
+                reasons[record.error] += 1
+        return dict(reasons)
+
+    def prometheus_text(self):
+        """Counters and histograms in the Prometheus text exposition format"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family('planner_model_calls_total', 'counter', "Gemini requests by model, call kind and outcome")
+            for (model, kind, outcome), count in sorted(self._calls.items()):
+                lines.append(f"planner_model_calls_total{{{_label_text({'model': model, 'kind': kind, 'outcome': outcome})}}} {count}")
+
+            family('planner_model_tokens_total', 'counter', "Tokens reported in usage metadata, by direction")
+            for (model, direction), count in sorted(self._tokens.items()):
+                lines.append(f"planner_model_tokens_total{{{_label_text({'model': model, 'direction': direction})}}} {count}")
+
+            family('planner_model_retries_total', 'counter', "Requests that were retries of a failed attempt")
+            for model, count in sorted(self._retries.items()):
+                lines.append(f"planner_model_retries_total{{{_label_text({'model': model})}}} {count}")
+
+            family('planner_cache_lookups_total', 'counter', "Response cache lookups by result")
+            for result in ('hit', 'miss'):
+                lines.append(f'planner_cache_lookups_total{{result="{result}"}} {self._cache[result]}')
+
+            family('planner_similar_lookups_total', 'counter', "Similar-plan lookups after a cache miss, by result")
+            for result in ('hit', 'miss'):
+                lines.append(f'planner_similar_lookups_total{{result="{result}"}} {self._similar[result]}')
+
+            family('planner_fallbacks_total', 'counter', "Plans served from fallback milestones, by reason")
+            for reason, count in sorted(self._fallbacks.items()):
+                lines.append(f"planner_fallbacks_total{{{_label_text({'reason': reason})}}} {count}")
+
+            family('planner_model_call_seconds', 'histogram', "Gemini request latency")
+            for (model, kind), buckets in sorted(self._buckets.items()):
+                labels = _label_text({'model': model, 'kind': kind})
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, buckets):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f'planner_model_call_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"planner_model_call_seconds_sum{{{labels}}} {self._latency_sum[(model, kind)]:.6f}")
+                lines.append(f"planner_model_call_seconds_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Process-wide metrics collector, opened on first use"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = ModelMetrics()
+        return _metrics
+
+
+_metrics_server = None
+
+
+def serve_metrics(port: int, host: str = '0.0.0.0'):
+    """Serve prometheus_text() at /metrics from a daemon thread; later calls reuse the running server"""
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is not None:
+            return _metrics_server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = get_metrics().prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        _metrics_server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=_metrics_server.serve_forever, name='metrics-server', daemon=True).start()
+        return _metrics_server
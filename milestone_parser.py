@@ -0,0 +1,135 @@
+"""Milestone extraction from the model's numbered-list replies
+
+Each line is read in one pass with precompiled patterns: a numbered (or
+bulleted) item prefix, one keyword matcher for prompt echoes and metadata,
+and a duration such as "- 3 days", "(2 weeks)" or ": 3-5 days". Markdown
+emphasis is stripped from names, so "**1. Research** - 2 days" and
+"1. **Research**: 2 days" both give "Research", 2 days.
+"""
+import math
+import re
+
+from models import Milestone, Priority
+
+# Lines containing these are prompt echoes or metadata, not steps
+SKIP_WORDS = ('example', 'total:', 'requirements', 'important:', 'format', 'critical', 'for your',
+              'distribute the time', 'break down', 'task details', 'additional context')
+METADATA_KEYWORDS = ('category:', 'duration:', 'date:', 'context:', 'details:')
+
+# Names that are a heading the model repeated rather than a step
+BAD_NAMES = frozenset({'category', 'total duration', 'start date', 'end date', 'additional context', 'task details',
+                       'requirements', 'examples', 'important', 'format', 'critical'})
+
+_KEYWORDS = re.compile("|".join(re.escape(word) for word in SKIP_WORDS + METADATA_KEYWORDS))
+
+# "1. ", "2) ", "- 3. ", "**4. ", "Step 5: " (the number is not the start of a decimal like "1.5")
+_NUMBERED = re.compile(r"""
+    (?:[-*+•]\s+)?                                   # bullet
+    (?:\*\*|__)?\s*                                  # bold opening
+    (?:(?:step|milestone|phase)\s+\d{1,3}\s*[.:)]?   # "Step 5:"
+     | \d{1,3}[.)](?!\d))                            # "1." or "1)"
+    \s*""", re.IGNORECASE | re.VERBOSE)
+
+# Unnumbered bullets count only when they carry a duration
+_BULLET = re.compile(r"[-*+•]\s+")
+
+# "3 days", "2 weeks", "3-5 days", "1 to 2 weeks"; what precedes it is checked in _split_duration()
+_DURATION = re.compile(r"(?<!\d)(?P<low>\d{1,4})(?:(?:[-–]|\s+to\s+)(?P<high>\d{1,4}))?\s*(?P<unit>days?|weeks?|wks?)\b\)?",
+                       re.IGNORECASE)
+
+# A duration without one of these just before it is part of the name ("Read 3 days of logs"), unless a range
+_SEPARATORS = "-–—:,("
+
+_EMPHASIS = re.compile(r"\*\*|__|`")
+
+# Left on either end of a name once the prefix, duration and emphasis are gone
+_TRIM = " \t\r\f\v*_:-–—"
+
+# Punctuation that ended the sentence after a duration ("- 3 days.") rather than being part of the name
+_AFTER_DURATION = " \t.,;:!?"
+
+
+def _split_duration(name: str):
+    """(name without its duration, days) with a range counted as its midpoint rounded up, or (name, None)"""
+    for duration in _DURATION.finditer(name):
+        head = name[:duration.start()].rstrip(" \t*_~")
+        if head.endswith(" for"):
+            head = head[:-4]
+        elif head[-1:] and head[-1] in _SEPARATORS:
+            head = head[:-1]
+        elif duration.group('high') is None:
+            continue
+        low = int(duration.group('low'))
+        high = int(duration.group('high') or low)
+        per_unit = 7 if duration.group('unit')[0] in 'wW' else 1
+        return f"{head.rstrip()} {name[duration.end():].lstrip(_AFTER_DURATION)}", max(1, math.ceil((low + high) / 2 * per_unit))
+    return name, None
+
+
+def parse_milestone_line(line: str):
+    """The milestone on one line of a reply (id unset), or None if the line is not a step"""
+    line = line.strip()
+    if not line or line[0] == '#':
+        return None
+
+    numbered = _NUMBERED.match(line)
+    item = numbered or _BULLET.match(line)
+    if item is None or _KEYWORDS.search(line.lower()):
+        return None
+
+    name, estimated_days = _split_duration(line[item.end():])
+    if estimated_days is None:
+        if numbered is None:
+            return None
+        estimated_days = 1
+
+    if '*' in name or '_' in name or '`' in name:
+        name = _EMPHASIS.sub("", name)
+    name = name.strip(_TRIM)
+    if len(name) < 3 or name.lower() in BAD_NAMES:
+        return None
+    return Milestone(None, name, Priority.MEDIUM, estimated_days=estimated_days)
+
+
+class MilestoneStreamParser:
+    """Incremental line-by-line milestone parser.
+
+    Text can be fed in arbitrary chunks (e.g. from a streamed response); a
+    milestone is emitted as soon as its line is complete.
+    """
+
+    def __init__(self):
+        self.milestones = []
+        self._pending = []  # chunks of the current, unfinished line
+
+    def feed(self, chunk: str):
+        """Consume a chunk of text and return the milestones completed by it"""
+        self._pending.append(chunk)
+        if '\n' not in chunk:
+            return []
+        *lines, tail = "".join(self._pending).split('\n')
+        self._pending = [tail]
+        return self._parse_lines(lines)
+
+    def close(self):
+        """Flush the trailing partial line and return any final milestone"""
+        lines, self._pending = ["".join(self._pending)], []
+        return self._parse_lines(lines)
+
+    def _parse_lines(self, lines):
+        parsed = []
+        for line in lines:
+            milestone = parse_milestone_line(line)
+            if milestone is not None:
+                milestone.id = len(self.milestones) + 1
+                self.milestones.append(milestone)
+                parsed.append(milestone)
+        return parsed
+
+
+def parse_milestones(text: str):
+    """All milestones in a complete reply, numbered from 1"""
+    parser = MilestoneStreamParser()
+    parser.feed(text)
+    parser.close()
+    return parser.milestones
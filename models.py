@@ -0,0 +1,299 @@
+import json
+from datetime import date
+from enum import Enum
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _StrEnum(str, Enum):
+    """String-valued enum that compares, hashes, formats and serializes as its value"""
+
+    def __str__(self):
+        return self.value
+
+    def __format__(self, spec):
+        return format(self.value, spec)
+
+
+class TaskStatus(_StrEnum):
+    # Saved, milestones still being generated by a background job (see plan_jobs.py)
+    PLANNING = 'planning'
+    PENDING = 'pending'
+    IN_PROGRESS = 'in_progress'
+    COMPLETED = 'completed'
+
+
+class Priority(_StrEnum):
+    HIGH = 'High'
+    MEDIUM = 'Medium'
+    LOW = 'Low'
+
+
+# Plain dict lookups; calling the enum class is several times slower per row
+STATUS_BY_VALUE = {status.value: status for status in TaskStatus}
+PRIORITY_BY_VALUE = {priority.value: priority for priority in Priority}
+
+
+def _parse_date(value, field: str):
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise ValueError(f"invalid {field}: {value!r}") from None
+
+
+class Milestone:
+    """One step of a task.
+
+    description is optional and only kept when it says more than the name;
+    milestones saved before time estimates existed load as one day.
+    depends_on lists the ids of earlier milestones of the same task that
+    must finish first; None (the default) means just the one before it.
+    """
+
+    __slots__ = ('id', 'name', 'priority', 'progress', 'completed', 'estimated_days', 'description', 'depends_on')
+
+    def __init__(self, id, name: str, priority=Priority.MEDIUM, progress: int = 0, completed: bool = False,
+                 estimated_days: int = 1, description: str = "", depends_on=None):
+        self.id = id
+        self.name = name
+        self.priority = priority
+        self.progress = progress
+        self.completed = completed
+        self.estimated_days = estimated_days
+        self.description = description
+        self.depends_on = depends_on
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Build a milestone from its JSON form, validating and normalizing fields"""
+        name = str(data.get('name') or '').strip()
+        if not name:
+            raise ValueError("milestone without a name")
+
+        estimated_days = max(1, int(data.get('estimated_days') or 1))
+        depends_on = data.get('depends_on')
+
+        return cls(
+            data.get('id'),
+            name,
+            PRIORITY_BY_VALUE.get(data.get('priority'), Priority.MEDIUM),
+            int(data.get('progress') or 0),
+            bool(data.get('completed', False)),
+            estimated_days,
+            data.get('description') or "",
+            [int(milestone_id) for milestone_id in depends_on] if depends_on is not None else None,
+        )
+
+    def to_dict(self):
+        """JSON form, in the same layout as the old tasks_data.json entries"""
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'priority': self.priority.value,
+            'progress': self.progress,
+            'completed': self.completed,
+            'estimated_days': self.estimated_days,
+        }
+        if self.description:
+            data['description'] = self.description
+        if self.depends_on is not None:
+            data['depends_on'] = list(self.depends_on)
+        return data
+
+    def __eq__(self, other):
+        return isinstance(other, Milestone) and all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"Milestone(id={self.id!r}, name={self.name!r}, estimated_days={self.estimated_days!r}, completed={self.completed!r})"
+
+
+class Task:
+    """A planned task with its milestones and an optimistic-concurrency version"""
+
+    __slots__ = ('id', 'name', 'category', 'start_date', 'end_date', 'status', 'created_at', 'version', 'milestones')
+
+    def __init__(self, id, name: str, category: str, start_date: date, end_date: date,
+                 status=TaskStatus.PENDING, created_at: str = None, version: int = 1, milestones=None):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.start_date = start_date
+        self.end_date = end_date
+        self.status = status
+        self.created_at = created_at
+        self.version = version
+        self.milestones = milestones if milestones is not None else []
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Build a task from its JSON form, validating and normalizing fields"""
+        name = str(data.get('name') or '').strip()
+        if not name:
+            raise ValueError("task without a name")
+        status = data.get('status') or 'pending'
+        if status not in STATUS_BY_VALUE:
+            raise ValueError(f"invalid status: {status!r}")
+
+        return cls(
+            data.get('id'),
+            name,
+            str(data.get('category') or 'Other'),
+            _parse_date(data.get('start_date'), 'start_date'),
+            _parse_date(data.get('end_date'), 'end_date'),
+            STATUS_BY_VALUE[status],
+            data.get('created_at'),
+            int(data.get('version') or 1),
+            [Milestone.from_dict(milestone) for milestone in data.get('milestones') or []],
+        )
+
+    def to_dict(self):
+        """JSON form, in the same layout as the old tasks_data.json entries"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'category': self.category,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'status': self.status.value,
+            'milestones': [milestone.to_dict() for milestone in self.milestones],
+            'created_at': self.created_at,
+            'version': self.version,
+        }
+
+    @property
+    def duration_days(self):
+        return (self.end_date - self.start_date).days
+
+    def __eq__(self, other):
+        return isinstance(other, Task) and all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, name={self.name!r}, status={self.status.value!r}, milestones={len(self.milestones)})"
+
+
+def dumps_tasks(tasks, indent: bool = True):
+    """Encode tasks to JSON bytes, using orjson when it is installed"""
+    data = [task.to_dict() for task in tasks]
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None).encode('utf-8')
+
+
+def loads_tasks(raw):
+    """Decode and validate tasks from JSON bytes or str"""
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    return [Task.from_dict(item) for item in data]
+
+
+class TaskStats:
+    """Aggregate counters over one user's tasks.
+
+    The stores keep these up to date on every mutation by applying the
+    difference a task makes (see contribution()), so showing them never
+    requires a pass over the task list.
+    """
+
+    __slots__ = ('total', 'by_status', 'by_category', 'estimated_days', 'actual_days',
+                 'milestones', 'milestones_completed')
+
+    def __init__(self):
+        self.total = 0
+        self.by_status = {}
+        self.by_category = {}
+        self.estimated_days = 0
+        self.actual_days = 0
+        self.milestones = 0
+        self.milestones_completed = 0
+
+    @staticmethod
+    def contribution(task: Task):
+        """Counter keys and amounts one task adds to the aggregates"""
+        counters = {
+            'tasks': 1,
+            f'status:{task.status.value}': 1,
+            f'category:{task.category}': 1,
+            'estimated_days': 0,
+            'actual_days': task.duration_days,
+            'milestones': len(task.milestones),
+            'milestones_completed': 0,
+        }
+        for milestone in task.milestones:
+            counters['estimated_days'] += milestone.estimated_days
+            counters['milestones_completed'] += milestone.completed
+        return counters
+
+    @classmethod
+    def from_counters(cls, counters):
+        """Build stats from (key, value) pairs as stored by the backends"""
+        stats = cls()
+        for key, value in counters:
+            if not value:
+                continue
+            kind, _, name = key.partition(':')
+            if kind == 'status':
+                stats.by_status[name] = value
+            elif kind == 'category':
+                stats.by_category[name] = value
+            elif kind == 'tasks':
+                stats.total = value
+            elif key in cls.__slots__:
+                setattr(stats, key, value)
+        return stats
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        """Recount from scratch; used to backfill and to cross-check the counters"""
+        totals = {}
+        for task in tasks:
+            for key, value in cls.contribution(task).items():
+                totals[key] = totals.get(key, 0) + value
+        return cls.from_counters(totals.items())
+
+    def counters(self):
+        """Inverse of from_counters()"""
+        counters = {
+            'tasks': self.total,
+            'estimated_days': self.estimated_days,
+            'actual_days': self.actual_days,
+            'milestones': self.milestones,
+            'milestones_completed': self.milestones_completed,
+        }
+        counters.update((f'status:{status}', count) for status, count in self.by_status.items())
+        counters.update((f'category:{category}', count) for category, count in self.by_category.items())
+        return counters
+
+    @property
+    def completed(self):
+        return self.by_status.get(TaskStatus.COMPLETED.value, 0)
+
+    @property
+    def in_progress(self):
+        return self.by_status.get(TaskStatus.IN_PROGRESS.value, 0)
+
+    @property
+    def pending(self):
+        return self.by_status.get(TaskStatus.PENDING.value, 0)
+
+    @property
+    def planning(self):
+        return self.by_status.get(TaskStatus.PLANNING.value, 0)
+
+    @property
+    def completion_rate(self):
+        """Completed tasks in percent"""
+        return self.completed / self.total * 100 if self.total else 0
+
+    def __eq__(self, other):
+        return isinstance(other, TaskStats) and self.counters() == other.counters()
+
+    def __repr__(self):
+        return f"TaskStats(total={self.total}, by_status={self.by_status!r}, milestones={self.milestones_completed}/{self.milestones})"
@@ -0,0 +1,361 @@
+"""Background plan generation: tasks are saved as 'planning' and a worker pool fills in their milestones
+
+Jobs are rows in a SQLite table (PLAN_JOBS_PATH), so they outlive the
+Streamlit session that submitted them and the server process itself. A
+worker claims a job with a lease; if the process dies mid-job the lease
+runs out and the next worker that polls picks the job up again. Several
+server processes can share one jobs file.
+
+A job that cannot get a plan from the model (no model configured, or
+every attempt failed) gives its task the planner's template milestones,
+spread over the task's dates, and is recorded with source 'fallback' so
+the UI does not present them as AI-generated.
+
+While a plan streams in, the job row's milestones hold the provisional
+milestones parsed so far, for the UI's polling fragment to preview.
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+from ai_service import get_shared_planner, log_notice
+from metrics import error_reason
+from models import Milestone, Task, TaskStatus
+from task_store import ConcurrentModificationError, get_task_store
+
+PLAN_JOBS_PATH = os.getenv('PLAN_JOBS_PATH', 'plan_jobs.sqlite3')
+
+# Jobs run at once per server process
+PLAN_JOB_WORKERS = int(os.getenv('PLAN_JOB_WORKERS', '2'))
+
+# Claims per job before it is given up (a crash mid-job also uses one)
+PLAN_JOB_ATTEMPTS = 3
+
+# Seconds a claimed job stays reserved; must exceed one plan's worst case (the planner's call budget)
+PLAN_JOB_LEASE_SECONDS = int(os.getenv('PLAN_JOB_LEASE_SECONDS', '300'))
+
+# Idle workers look for jobs from other processes and expired leases this often
+PLAN_JOB_POLL_SECONDS = 2.0
+
+# Finished jobs are kept this long, for the UI to show their analysis
+PLAN_JOB_RETENTION_SECONDS = 7 * 24 * 3600
+
+# A 'planning' task without a job is only re-queued once it is this old, so a submit() in flight is left alone
+PLAN_JOB_RECOVERY_SECONDS = 60
+
+JOB_FIELDS = ['id', 'user_id', 'task_id', 'task_name', 'category', 'start_date', 'end_date', 'context',
+              'state', 'attempts', 'milestones', 'analysis', 'error', 'created_at', 'finished_at', 'source',
+              'task_version', 'task_created_at']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plan_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    task_name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    context TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    milestones TEXT,
+    analysis TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    source TEXT NOT NULL DEFAULT 'model',
+    task_version INTEGER,
+    task_created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS plan_jobs_by_state ON plan_jobs (state, id);
+CREATE INDEX IF NOT EXISTS plan_jobs_by_user ON plan_jobs (user_id, id);
+"""
+
+
+class PlanJob:
+    """One task's plan generation: queued, running, done or failed.
+
+    milestones holds the provisional milestones while the job runs and,
+    with analysis, the plan once it is done; source is
+    'model', or 'fallback' for template milestones, with error saying why.
+    task_version and task_created_at identify the task as it was queued: the
+    plan is only written onto that version of that task, not onto one that
+    changed meanwhile or a new task reusing its id.
+    """
+
+    __slots__ = JOB_FIELDS
+
+    def __init__(self, id, user_id, task_id, task_name, category, start_date, end_date, context, state, attempts,
+                 milestones, analysis, error, created_at, finished_at, source,
+                 task_version, task_created_at):
+        self.id = id
+        self.user_id = user_id
+        self.task_id = task_id
+        self.task_name = task_name
+        self.category = category
+        self.start_date = date.fromisoformat(start_date)
+        self.end_date = date.fromisoformat(end_date)
+        self.context = context
+        self.state = state
+        self.attempts = attempts
+        self.milestones = [Milestone.from_dict(item) for item in json.loads(milestones)] if milestones else []
+        self.analysis = analysis or ""
+        self.error = error
+        self.created_at = created_at
+        self.finished_at = finished_at
+        self.source = source
+        self.task_version = task_version
+        self.task_created_at = task_created_at
+
+    @property
+    def active(self):
+        return self.state in ('queued', 'running')
+
+    @property
+    def fallback(self):
+        return self.source == 'fallback'
+
+    def __repr__(self):
+        return f"PlanJob(id={self.id!r}, task_id={self.task_id!r}, state={self.state!r}, attempts={self.attempts!r})"
+
+
+class PlanQueue:
+    """SQLite-backed queue of plan jobs with an in-process worker pool.
+
+    submit() saves the task in the 'planning' state and returns at once;
+    a worker generates the plan with the shared planner and writes the
+    milestones through store.set_plan(). Workers start on the first
+    submit() or start() call.
+    """
+
+    def __init__(self, path: str = PLAN_JOBS_PATH, store=None, planner=None, workers: int = PLAN_JOB_WORKERS,
+                 lease_seconds: float = PLAN_JOB_LEASE_SECONDS, poll_seconds: float = PLAN_JOB_POLL_SECONDS):
+        self.path = path
+        self.store = store if store is not None else get_task_store()
+        self.planner = planner
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        # Older jobs files lack the later columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(plan_jobs)")}
+        if 'source' not in columns:
+            self._conn.execute("ALTER TABLE plan_jobs ADD COLUMN source TEXT NOT NULL DEFAULT 'model'")
+        if 'task_version' not in columns:
+            self._conn.execute("ALTER TABLE plan_jobs ADD COLUMN task_version INTEGER")
+            self._conn.execute("ALTER TABLE plan_jobs ADD COLUMN task_created_at TEXT")
+
+    def submit(self, user_id: str, task_name: str, category: str, start_date: date, end_date: date, additional_context: str = ""):
+        """Save the task as 'planning', queue its plan and return the task (with its id)"""
+        task = self.store.add_task(user_id, Task(
+            None, task_name, category, start_date, end_date, TaskStatus.PLANNING,
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        ))
+        try:
+            self._queue(user_id, task, additional_context)
+        except BaseException:
+            # The task and its job live in different databases; without the job nothing would ever plan it
+            self.store.update_task_status(user_id, task.id, TaskStatus.PENDING)
+            raise
+        self.start()
+        self._wake.set()
+        return task
+
+    def recover(self, user_id: str):
+        """Queue jobs for the user's 'planning' tasks that have none, e.g. after a crash inside submit(); returns how many"""
+        tasks, _ = self.store.query_tasks(user_id, [TaskStatus.PLANNING])
+        cutoff = datetime.fromtimestamp(time.time() - PLAN_JOB_RECOVERY_SECONDS).strftime('%Y-%m-%d %H:%M:%S')
+        orphans = []
+        for task in tasks:
+            if task.created_at < cutoff:
+                job = self.job_for_task(user_id, task.id)
+                if job is None or not job.active:
+                    orphans.append(task)
+        for task in orphans:
+            self._queue(user_id, task, "")
+        if orphans:
+            self.start()
+            self._wake.set()
+        return len(orphans)
+
+    def _queue(self, user_id: str, task: Task, additional_context: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO plan_jobs (user_id, task_id, task_name, category, start_date, end_date, context, created_at, "
+                "task_version, task_created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, task.id, task.name, task.category, task.start_date.isoformat(), task.end_date.isoformat(),
+                 additional_context or "", time.time(), task.version, task.created_at)
+            )
+
+    def jobs(self, user_id: str, active_only: bool = False, limit: int = 20):
+        """A user's most recent jobs, newest first"""
+        sql = f"SELECT {', '.join(JOB_FIELDS)} FROM plan_jobs WHERE user_id = ?"
+        if active_only:
+            sql += " AND state IN ('queued', 'running')"
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id DESC LIMIT ?", (user_id, limit)).fetchall()
+        return [PlanJob(*row) for row in rows]
+
+    def job_for_task(self, user_id: str, task_id: int):
+        """The latest job of a task, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(JOB_FIELDS)} FROM plan_jobs WHERE user_id = ? AND task_id = ? ORDER BY id DESC LIMIT 1",
+                (user_id, task_id)
+            ).fetchone()
+        return PlanJob(*row) if row is not None else None
+
+    def start(self):
+        """Start the worker threads once; they also pick up jobs left over from earlier runs"""
+        with self._lock:
+            if self._threads:
+                return
+            self._conn.execute(
+                "DELETE FROM plan_jobs WHERE state IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - PLAN_JOB_RETENTION_SECONDS,)
+            )
+            self._threads = [
+                threading.Thread(target=self._work, name=f"plan-job-{index}", daemon=True)
+                for index in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Let the workers exit after their current job; unfinished jobs stay queued"""
+        self._stopped.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while not self._stopped.is_set():
+            job = self._claim()
+            if job is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _claim(self):
+        """Reserve the oldest queued job, or one whose worker's lease ran out"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(JOB_FIELDS)} FROM plan_jobs "
+                    "WHERE state = 'queued' OR (state = 'running' AND lease_until < ?) ORDER BY id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE plan_jobs SET state = 'running', attempts = attempts + 1, lease_until = ?, milestones = NULL "
+                        "WHERE id = ?",
+                        (now + self.lease_seconds, row[0])
+                    )
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        if row is None:
+            return None
+        job = PlanJob(*row)
+        job.attempts += 1
+        return job
+
+    def _finish(self, job: PlanJob, state: str, milestones=(), analysis: str = "", error: str = None,
+                source: str = 'model'):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE plan_jobs SET state = ?, milestones = ?, analysis = ?, error = ?, finished_at = ?, "
+                "lease_until = NULL, source = ? WHERE id = ?",
+                (state, json.dumps([milestone.to_dict() for milestone in milestones]), analysis, error, time.time(),
+                 source, job.id)
+            )
+
+    def _run(self, job: PlanJob):
+        # Workers have no Streamlit session to show notices in
+        planner = copy.copy(self.planner or get_shared_planner())
+        planner.notify = log_notice
+        if job.attempts > PLAN_JOB_ATTEMPTS:
+            self._fall_back(job, planner, 'interrupted', "gave up after repeated interruptions")
+            return
+
+        try:
+            # generate_plan_stream raises where generate_milestones would quietly return template milestones
+            provisional = []
+            for kind, value in planner.generate_plan_stream(
+                job.task_name, job.category, job.start_date, job.end_date, job.context
+            ):
+                if kind == 'milestone':
+                    provisional.append(value)
+                    self._preview(job, provisional)
+                elif kind == 'reset':
+                    provisional = []
+                    self._preview(job, provisional)
+                elif kind == 'done':
+                    milestones, analysis = value
+            self.store.set_plan(job.user_id, job.task_id, milestones, expected_version=job.task_version,
+                                expected_created_at=job.task_created_at)
+        except ConcurrentModificationError:
+            # The task was changed or deleted (e.g. Clear All Tasks, after which a new task may reuse its id)
+            self._finish(job, 'failed', error="task changed or deleted while it was being planned")
+            return
+        except Exception as e:
+            # Without a model every attempt would fail the same way
+            if planner.model is None:
+                self._fall_back(job, planner, 'no_model', planner.init_error or "AI model not available")
+            elif job.attempts >= PLAN_JOB_ATTEMPTS:
+                self._fall_back(job, planner, error_reason(e), str(e) or type(e).__name__)
+            else:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE plan_jobs SET state = 'queued', lease_until = NULL, milestones = NULL WHERE id = ?", (job.id,)
+                    )
+            return
+        self._finish(job, 'done', milestones, analysis)
+
+    def _preview(self, job: PlanJob, milestones):
+        """Publish the milestones streamed so far on the job row"""
+        with self._lock:
+            self._conn.execute("UPDATE plan_jobs SET milestones = ? WHERE id = ? AND state = 'running'",
+                               (json.dumps([milestone.to_dict() for milestone in milestones]), job.id))
+
+    def _fall_back(self, job: PlanJob, planner, reason: str, error: str):
+        """Give the task the template plan over its own dates and finish the job as a fallback"""
+        milestones, analysis = planner.fallback_plan(reason, job.task_name, job.category,
+                                                     (job.end_date - job.start_date).days)
+        try:
+            self.store.set_plan(job.user_id, job.task_id, milestones, expected_version=job.task_version,
+                                expected_created_at=job.task_created_at)
+        except ConcurrentModificationError:
+            self._finish(job, 'failed', error="task changed or deleted while it was being planned")
+            return
+        self._finish(job, 'done', milestones, analysis, error=error, source='fallback')
+
+
+_plan_queue = None
+_plan_queue_lock = threading.Lock()
+
+
+def get_plan_queue():
+    """Process-wide plan queue over the shared task store, with its workers running"""
+    global _plan_queue
+    with _plan_queue_lock:
+        if _plan_queue is None:
+            _plan_queue = PlanQueue()
+            _plan_queue.start()
+        return _plan_queue
@@ -0,0 +1,202 @@
+"""Versioned prompt templates for AITaskPlanner
+
+A prompt is split into static instructions, identical for every task, and
+a short per-task part. When the planner owns the Gemini client the
+instructions go in the model's system_instruction, so each request only
+repeats a handful of fields after a stable prefix; an injected model (the
+benchmark fakes) receives both parts joined into one string.
+
+Bump a set's version whenever its text changes: the version is part of
+the response cache key, so plans made with other prompts are not reused.
+
+Explicit context caching (genai.caching.CachedContent) is not used:
+Gemini only caches content above a minimum size (32,768 tokens on the
+1.5 models, 1,024-4,096 on 2.x), and these instructions are a few hundred
+tokens. Keeping them as an unchanging prefix is what lets the 2.x models'
+implicit caching apply instead.
+"""
+import os
+
+# Analysis sections of a plan, in display order: structured JSON key and heading
+NOTE_SECTIONS = [
+    ('learning_resources', '📚 LEARNING RESOURCES & EXAMPLES'),
+    ('useful_resources', '🔗 USEFUL RESOURCES & REFERENCES'),
+    ('practical_tips', '💡 PRACTICAL TIPS & STRATEGIES'),
+    ('tools_and_equipment', '🛠️ TOOLS & EQUIPMENT'),
+    ('additional_notes', '📋 ADDITIONAL CONTEXT & NOTES'),
+]
+
+# Prompt kinds a PromptSet provides
+PROMPT_KINDS = ('milestones', 'analysis', 'structured')
+
+
+class Prompt:
+    """One request: static instructions plus the per-task content"""
+
+    __slots__ = ('kind', 'instruction', 'content')
+
+    def __init__(self, kind: str, instruction: str, content: str):
+        self.kind = kind
+        self.instruction = instruction
+        self.content = content
+
+    @property
+    def text(self):
+        """Instructions and content as a single prompt string"""
+        return f"{self.instruction}\n\n{self.content}" if self.instruction else self.content
+
+    def __len__(self):
+        return len(self.instruction) + len(self.content)
+
+
+def task_block(task_name: str, category: str, duration_days: int, additional_context: str = ""):
+    """The per-task fields, one per line; context is left out when empty"""
+    lines = [f'Task: "{task_name}"', f"Category: {category}", f"Total days: {duration_days}"]
+    if additional_context and additional_context.strip():
+        lines.append(f"Context: {additional_context.strip()}")
+    return "\n".join(lines)
+
+
+class PromptSet:
+    """Instructions and content templates for each prompt kind under one version.
+
+    Templates are str.format strings over task_name, category,
+    duration_days, additional_context and task_block.
+    """
+
+    __slots__ = ('version', 'instructions', 'templates')
+
+    def __init__(self, version: str, instructions: dict, templates: dict):
+        self.version = version
+        self.instructions = instructions
+        self.templates = templates
+
+    def build(self, kind: str, task_name: str, category: str, duration_days: int, additional_context: str = ""):
+        content = self.templates[kind].format(
+            task_name=task_name,
+            category=category,
+            duration_days=duration_days,
+            additional_context=additional_context,
+            task_block=task_block(task_name, category, duration_days, additional_context),
+        )
+        return Prompt(kind, self.instructions.get(kind, ""), content)
+
+
+# The original prompts, everything inline and resent on every request
+LEGACY_PROMPTS = PromptSet('2', {}, {
+    'milestones': """
+        Break down this task into 3-5 specific, actionable steps: "{task_name}"
+
+        🚨 CRITICAL REQUIREMENT: You have exactly {duration_days} days total to complete this task. You MUST distribute ALL {duration_days} days across your milestones. DO NOT leave any days unallocated.
+
+        Task Details:
+        - Category: {category}
+        - Total time available: {duration_days} days (MUST USE ALL {duration_days} DAYS)
+        - Additional context: {additional_context}
+
+        Create specific action steps that someone would actually do to complete this task. Each step should be a concrete action, not a category or date.
+
+        Format your response EXACTLY like this:
+
+        1. [Specific action step] - [X days]
+
+        2. [Specific action step] - [X days]
+
+        3. [Specific action step] - [X days]
+
+        4. [Specific action step] - [X days]
+
+        5. [Specific action step] - [X days]
+
+        🚨 MANDATORY: The sum of all milestone days MUST equal exactly {duration_days} days. NO EXCEPTIONS.
+
+        For your {duration_days}-day task, distribute the time appropriately across milestones. The total MUST equal {duration_days} days.
+        """,
+    'analysis': """
+        Provide a comprehensive, helpful analysis for this task: "{task_name}"
+
+        Task Details:
+        - Category: {category}
+        - Duration: {duration_days} days
+        - Additional context: {additional_context}
+
+        Create a detailed analysis that includes:
+
+        📚 LEARNING RESOURCES & EXAMPLES:
+        - Recommended books, articles, or guides
+        - Real-world examples and case studies
+        - Best practices and success stories
+
+        🔗 USEFUL RESOURCES & REFERENCES:
+        - Helpful websites and tools
+        - Online courses or tutorials
+        - Professional communities or forums
+
+        💡 PRACTICAL TIPS & STRATEGIES:
+        - Time management techniques
+        - Productivity hacks
+        - Motivation strategies
+        - Common challenges and solutions
+
+        🛠️ TOOLS & EQUIPMENT (if applicable):
+        - Software tools needed
+        - Physical equipment required
+        - Budget considerations
+        - Where to buy/access resources
+
+        📋 ADDITIONAL CONTEXT & NOTES:
+        - Prerequisites and background knowledge
+        - Skill requirements
+        - Timeline considerations
+        - Legal/regulatory requirements (if applicable)
+
+        Make this analysis practical, actionable, and valuable for someone starting this task. Focus on providing real value beyond just the basic steps.
+        """,
+    'structured': """
+        Plan this task: "{task_name}"
+
+        Task Details:
+        - Category: {category}
+        - Duration: {duration_days} days
+        - Additional context: {additional_context}
+
+        Respond with JSON containing:
+        - "milestones": 3-5 specific, actionable steps in the order they should be done. Each has a short "name", a one-sentence "description" and "estimated_days". The estimated_days of all milestones MUST add up to exactly {duration_days}.
+        - "notes": practical, specific guidance for someone starting this task, as short bullet strings under "learning_resources" (books, guides, real-world examples), "useful_resources" (websites, courses, communities), "practical_tips" (time management, motivation, common challenges), "tools_and_equipment" (software, equipment, budget) and "additional_notes" (prerequisites, skills, timeline, legal requirements).
+        """,
+})
+
+# Compact prompts: each requirement stated once, static text in the instructions
+COMPACT_PROMPTS = PromptSet('3', {
+    'milestones': (
+        "Break down the given task into 3-5 concrete action steps, in order. Each step is something the person "
+        "does, not a category or a date. Give each step whole days; the days must add up exactly to Total days.\n"
+        "Reply with only the steps, one per line:\n"
+        "1. <step> - <N> days"
+    ),
+    'analysis': (
+        "Give practical guidance for someone starting the given task: 3-5 short, specific bullets (name real "
+        "books, sites, courses and tools) under each of these headings, skipping any that do not apply:\n"
+        + "\n".join(title for _, title in NOTE_SECTIONS)
+    ),
+    'structured': (
+        "Plan the given task as JSON. \"milestones\": 3-5 concrete steps in order, each with a short \"name\", a "
+        "one-sentence \"description\" and \"estimated_days\"; the days add up exactly to Total days. \"notes\": "
+        "short, specific bullet strings under learning_resources (books, guides, examples), useful_resources "
+        "(sites, courses, communities), practical_tips (time management, motivation, pitfalls), "
+        "tools_and_equipment (software, equipment, budget) and additional_notes (prerequisites, skills, legal)."
+    ),
+}, {kind: "{task_block}" for kind in PROMPT_KINDS})
+
+PROMPT_SETS = {prompts.version: prompts for prompts in (LEGACY_PROMPTS, COMPACT_PROMPTS)}
+
+# Prompt set used unless a planner is given another
+PROMPT_VERSION = os.getenv('PLANNER_PROMPT_VERSION', COMPACT_PROMPTS.version)
+
+
+def get_prompt_set(version: str = None):
+    """The PromptSet for a version (default PROMPT_VERSION); ValueError for an unknown one"""
+    version = version or PROMPT_VERSION
+    if version not in PROMPT_SETS:
+        raise ValueError(f"Unknown prompt version {version!r}; known: {', '.join(sorted(PROMPT_SETS))}")
+    return PROMPT_SETS[version]
@@ -0,0 +1,351 @@
+"""Milestone scheduling: concrete dates, critical paths and projected finishes
+
+A WorkCalendar numbers working days (weekdays it works, minus holidays) so
+that "the 12th working day after X" and "working days between X and Y" are
+arithmetic plus a binary search over holidays, never a day-by-day walk.
+
+schedule_task() lays a task's milestones onto its start_date..end_date
+window: a forward pass over the dependency graph gives each milestone its
+earliest start in estimated days, the whole plan is scaled so its longest
+chain fills the window exactly (proportional rebalancing), and a backward
+pass finds the zero-slack milestones, the task's critical path. It also
+projects when the remaining work will finish: open milestones start no
+earlier than today, completed ones no longer hold anything up.
+
+UserSchedule keeps the schedules of all of a user's tasks and recomputes
+only tasks whose version changed, so a milestone toggle costs one task's
+milestones plus a heap push. The task finishing last and the tasks running
+late are read from heaps, not by scanning every task.
+"""
+import heapq
+import math
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from models import TaskStatus
+
+WEEKDAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+# Working weekdays, e.g. "mon,tue,wed,thu,fri"; every day by default, which keeps estimates in calendar days
+WORKDAYS = os.getenv('PLANNER_WORKDAYS', ",".join(WEEKDAY_NAMES))
+
+# Days off on top of the weekly pattern, as ISO dates: "2025-12-25,2026-01-01"
+HOLIDAYS = os.getenv('PLANNER_HOLIDAYS', '')
+
+
+class WorkCalendar:
+    """Working weekdays and holidays, with O(log holidays) conversions between dates and working-day numbers.
+
+    rank(day) is the number of working days before day since 0001-01-01;
+    consecutive working days have consecutive ranks, so working-day
+    arithmetic is integer arithmetic on ranks.
+    """
+
+    def __init__(self, weekdays=range(7), holidays=()):
+        self.weekdays = frozenset(weekdays)
+        if not self.weekdays:
+            raise ValueError("a work calendar needs at least one working weekday")
+        # Only holidays on working weekdays change anything
+        self.holidays = sorted({day.toordinal() for day in holidays if day.weekday() in self.weekdays})
+        self._per_week = len(self.weekdays)
+        # Working days among the first n weekdays (Monday first), and the weekday of the n-th working one
+        self._before = [sum(1 for weekday in range(n) if weekday in self.weekdays) for n in range(8)]
+        self._nth = sorted(self.weekdays)
+
+    @classmethod
+    def from_env(cls, workdays: str = WORKDAYS, holidays: str = HOLIDAYS):
+        """Calendar from comma-separated weekday names and ISO dates"""
+        names = [name.strip().lower()[:3] for name in workdays.split(',') if name.strip()]
+        unknown = [name for name in names if name not in WEEKDAY_NAMES]
+        if unknown:
+            raise ValueError(f"unknown weekday(s) in PLANNER_WORKDAYS: {', '.join(unknown)}")
+        return cls([WEEKDAY_NAMES.index(name) for name in names],
+                   [date.fromisoformat(day.strip()) for day in holidays.split(',') if day.strip()])
+
+    def is_workday(self, day: date):
+        return day.weekday() in self.weekdays and not self._holiday(day.toordinal())
+
+    def rank(self, day: date):
+        """Working days before day; a day off has the rank of the next working day"""
+        weeks, weekday = divmod(day.toordinal() - 1, 7)  # ordinal 1 is a Monday
+        return weeks * self._per_week + self._before[weekday] - bisect_left(self.holidays, day.toordinal())
+
+    def day(self, rank: int):
+        """The working day with this rank"""
+        skipped = 0
+        while True:
+            weeks, nth = divmod(rank + skipped, self._per_week)
+            ordinal = weeks * 7 + self._nth[nth] + 1
+            # Holidays up to the candidate push it later; repeat until no new ones are passed
+            holidays = bisect_right(self.holidays, ordinal)
+            if holidays == skipped:
+                return date.fromordinal(ordinal)
+            skipped = holidays
+
+    def workdays_between(self, start: date, end: date):
+        """Working days in [start, end)"""
+        return max(0, self.rank(end) - self.rank(start))
+
+    def _holiday(self, ordinal: int):
+        index = bisect_left(self.holidays, ordinal)
+        return index < len(self.holidays) and self.holidays[index] == ordinal
+
+
+def rebalance_days(estimates, total_days: int):
+    """Integer estimates scaled proportionally to add up to total_days, each at least one day.
+
+    Rounds cumulative sums rather than each estimate, so the rounding error
+    never builds up on one step. Only when there are more steps than days
+    does the total come out higher than asked.
+    """
+    estimates = [max(1, estimate) for estimate in estimates]
+    planned = sum(estimates)
+    if not estimates or planned == total_days:
+        return estimates
+    total_days = max(total_days, len(estimates))
+    scale = total_days / planned
+    rebalanced, cumulative, boundary = [], 0, 0
+    for remaining, estimate in enumerate(estimates, 1 - len(estimates)):
+        cumulative += estimate
+        # At least a day for this step, and one left for each step after it
+        next_boundary = min(max(boundary + 1, round(cumulative * scale)), total_days + remaining)
+        rebalanced.append(next_boundary - boundary)
+        boundary = next_boundary
+    return rebalanced
+
+
+def predecessors(milestones):
+    """Per position, the positions that must finish first.
+
+    depends_on may only name earlier milestones (anything else is ignored),
+    so the milestone order is always a valid order to schedule in.
+    """
+    position_of = {}
+    result = []
+    for position, milestone in enumerate(milestones):
+        if milestone.depends_on is None:
+            result.append([position - 1] if position else [])
+        else:
+            result.append(sorted({position_of[milestone_id] for milestone_id in milestone.depends_on
+                                  if milestone_id in position_of}))
+        if milestone.id is not None:
+            position_of.setdefault(milestone.id, position)
+    return result
+
+
+class MilestoneSlot:
+    """Where one milestone sits in its task's schedule; end is its last working day"""
+
+    __slots__ = ('position', 'start', 'end', 'slack_days', 'critical')
+
+    def __init__(self, position: int, start: date, end: date, slack_days: int, critical: bool):
+        self.position = position
+        self.start = start
+        self.end = end
+        self.slack_days = slack_days
+        self.critical = critical
+
+    def __repr__(self):
+        return f"MilestoneSlot(position={self.position!r}, start={self.start}, end={self.end}, critical={self.critical!r})"
+
+
+class TaskSchedule:
+    """One task's milestone dates, critical path and projected finish.
+
+    projected_finish is the last working day of the remaining work (None
+    once every milestone is done); late_days is how many working days that
+    lies past the task's window (negative: days to spare). chain holds the
+    positions of the open milestones that decide projected_finish, in order.
+    """
+
+    __slots__ = ('task_id', 'task_name', 'version', 'milestone_names', 'slots', 'projected_finish', 'late_days', 'chain')
+
+    def __init__(self, task_id, task_name: str, version: int, milestone_names, slots, projected_finish,
+                 late_days: int, chain):
+        self.task_id = task_id
+        self.task_name = task_name
+        self.version = version
+        self.milestone_names = milestone_names
+        self.slots = slots
+        self.projected_finish = projected_finish
+        self.late_days = late_days
+        self.chain = chain
+
+    @property
+    def critical_path(self):
+        """Positions of the milestones with no slack in the plan"""
+        return [slot.position for slot in self.slots if slot.critical]
+
+    def __repr__(self):
+        return (f"TaskSchedule(task_id={self.task_id!r}, projected_finish={self.projected_finish}, "
+                f"late_days={self.late_days!r})")
+
+
+def schedule_task(task, calendar: WorkCalendar, today: date = None):
+    """Lay a task's milestones onto its working days and project its finish"""
+    milestones = task.milestones
+    preds = predecessors(milestones)
+    durations = [max(1, milestone.estimated_days) for milestone in milestones]
+
+    # Forward pass in estimated days
+    early_start, early_finish = [], []
+    for position, duration in enumerate(durations):
+        start = max((early_finish[pred] for pred in preds[position]), default=0)
+        early_start.append(start)
+        early_finish.append(start + duration)
+    length = max(early_finish, default=0)
+
+    # Backward pass: a milestone may finish as late as its earliest successor's latest start
+    late_finish = [length] * len(milestones)
+    for position in range(len(milestones) - 1, -1, -1):
+        late_start = late_finish[position] - durations[position]
+        for pred in preds[position]:
+            late_finish[pred] = min(late_finish[pred], late_start)
+
+    # Scale so the longest chain fills the task's working days; every milestone keeps at least one day
+    first = calendar.rank(task.start_date)
+    window = max(1, calendar.workdays_between(task.start_date, task.end_date))
+    scale = window / length if length else 1.0
+    starts = [first + round(start * scale) for start in early_start]
+    ends = [max(start + 1, first + round(finish * scale)) for start, finish in zip(starts, early_finish)]
+    slots = [
+        MilestoneSlot(position, calendar.day(starts[position]), calendar.day(ends[position] - 1),
+                      math.floor((late_finish[position] - early_finish[position]) * scale),
+                      late_finish[position] == early_finish[position])
+        for position in range(len(milestones))
+    ]
+
+    # Projection: open milestones wait for their planned start, today and their open predecessors
+    now = calendar.rank(today or date.today())
+    finish, decided_by = {}, {}
+    for position, milestone in enumerate(milestones):
+        if milestone.completed:
+            continue
+        start, blocker = max(starts[position], now), None
+        for pred in preds[position]:
+            if pred in finish and finish[pred] > start:
+                start, blocker = finish[pred], pred
+        finish[position] = start + ends[position] - starts[position]
+        decided_by[position] = blocker
+
+    names = [milestone.name for milestone in milestones]
+    if not finish:
+        return TaskSchedule(task.id, task.name, task.version, names, slots, None, 0, [])
+    last = max(finish, key=finish.get)
+    chain = [last]
+    while decided_by[chain[-1]] is not None:
+        chain.append(decided_by[chain[-1]])
+    return TaskSchedule(task.id, task.name, task.version, names, slots, calendar.day(finish[last] - 1),
+                        finish[last] - (first + window), chain[::-1])
+
+
+class UserSchedule:
+    """Schedules of one user's tasks, updated incrementally.
+
+    update() takes the full task list (e.g. from TaskStore.load_tasks) and
+    reschedules only new tasks and tasks whose version changed;
+    update_task() does the same for one task. sync() calls update() only
+    when the store's revision token or the day has changed since it last
+    did, so a rerun with nothing new costs one revision read instead of a
+    pass over every task. last_to_finish() and late_tasks() read
+    lazily-invalidated heaps, so neither scans all tasks.
+    """
+
+    def __init__(self, calendar: WorkCalendar = None, today: date = None):
+        self.calendar = calendar or WorkCalendar.from_env()
+        self.today = today
+        self._day = None
+        self._schedules = {}   # task_id -> TaskSchedule
+        self._finish_heap = []  # (-finish ordinal, task_id, version) of open tasks
+        self._late_heap = []    # (-late_days, task_id, version) of late tasks
+        self.revision = None    # store revision token of the last sync()
+
+    def __len__(self):
+        return len(self._schedules)
+
+    def get(self, task_id):
+        return self._schedules.get(task_id)
+
+    def update(self, tasks):
+        """Bring the schedules in line with the user's current task list"""
+        self._roll_day()
+        seen = set()
+        for task in tasks:
+            seen.add(task.id)
+            current = self._schedules.get(task.id)
+            if current is None or current.version != task.version:
+                self.update_task(task)
+        for task_id in [task_id for task_id in self._schedules if task_id not in seen]:
+            self.remove_task(task_id)
+
+    def sync(self, store, user_id: str):
+        """update() from store.load_tasks(user_id) if the user's tasks or the day changed since the last sync"""
+        # Read the token before the tasks: a write in between only causes one extra sync
+        revision = store.revision(user_id)
+        if revision is None or revision != self.revision or (self.today or date.today()) != self._day:
+            self.update(store.load_tasks(user_id))
+            self.revision = revision
+
+    def update_task(self, task):
+        """Reschedule one task after it was created or changed"""
+        self._roll_day()
+        if not task.milestones or task.status in (TaskStatus.COMPLETED, TaskStatus.PLANNING):
+            self._schedules.pop(task.id, None)
+            return None
+        schedule = schedule_task(task, self.calendar, self._day)
+        self._schedules[task.id] = schedule
+        if schedule.projected_finish is not None:
+            heapq.heappush(self._finish_heap, (-schedule.projected_finish.toordinal(), task.id, task.version))
+            if schedule.late_days > 0:
+                heapq.heappush(self._late_heap, (-schedule.late_days, task.id, task.version))
+        self._compact()
+        return schedule
+
+    def remove_task(self, task_id):
+        self._schedules.pop(task_id, None)
+
+    def last_to_finish(self):
+        """The open task whose remaining work finishes last: the user's critical path runs through it"""
+        heap = self._finish_heap
+        while heap and not self._current(heap[0]):
+            heapq.heappop(heap)
+        return self._schedules[heap[0][1]] if heap else None
+
+    def late_tasks(self, limit: int = 5):
+        """Up to limit tasks projected to finish after their end date, latest first"""
+        heap = self._late_heap
+        found, seen, frontier = [], set(), [(heap[0], 0)] if heap else []
+        # Walk the heap tree best-first, skipping stale entries, instead of sorting it; a task
+        # rescheduled without a version change (or removed and re-added) has several current entries
+        while frontier and len(found) < limit:
+            entry, index = heapq.heappop(frontier)
+            if self._current(entry) and entry[1] not in seen and self._schedules[entry[1]].late_days > 0:
+                seen.add(entry[1])
+                found.append(self._schedules[entry[1]])
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return found
+
+    def _current(self, entry):
+        schedule = self._schedules.get(entry[1])
+        return schedule is not None and schedule.version == entry[2]
+
+    def _compact(self):
+        # Stale heap entries pile up with every update; rebuild once they outnumber the live tasks
+        for name in ('_finish_heap', '_late_heap'):
+            heap = getattr(self, name)
+            if len(heap) > 2 * len(self._schedules) + 16:
+                heap = list({entry for entry in heap if self._current(entry)})
+                heapq.heapify(heap)
+                setattr(self, name, heap)
+
+    def _roll_day(self):
+        # Projections start from today, so a new day invalidates all of them
+        today = self.today or date.today()
+        if today != self._day:
+            self._day = today
+            self._schedules.clear()
+            self._finish_heap.clear()
+            self._late_heap.clear()
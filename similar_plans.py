@@ -0,0 +1,246 @@
+"""Reuse of plans made for similar tasks ("Learn GenAI" after "Learn Generative AI")
+
+Past plans are indexed by TF-IDF vectors of their task name and context:
+whole words plus character trigrams within words, so inflections and small
+spelling differences still overlap. Abbreviations are matched by expanding
+query words that the index does not know into word pairs it does know,
+by initials ("ml" -> "machine learning") or by prefix and second word
+("genai" -> "generative ai").
+
+Lookups walk an inverted index from the query's words to the plans that
+contain them and score only those candidates by cosine similarity, so a
+lookup touches a handful of plans, not the whole index. Plans are kept in
+SQLite next to the response cache and loaded into memory on first use.
+"""
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+
+from models import Milestone
+from scheduler import rebalance_days
+
+SIMILAR_PATH = os.getenv('PLANNER_SIMILAR_PATH', 'ai_response_cache.sqlite3')
+
+# Cosine similarity at or above which a past plan is reused; 1.0 means identical wording
+SIMILARITY_THRESHOLD = float(os.getenv('PLANNER_SIMILARITY_THRESHOLD', '0.8'))
+
+# Plans kept in the index, oldest dropped first
+SIMILAR_MAX_ENTRIES = int(os.getenv('PLANNER_SIMILAR_MAX_ENTRIES', '2000'))
+
+# Words that say nothing about what the task is
+STOPWORDS = frozenset({'a', 'an', 'and', 'for', 'in', 'my', 'of', 'on', 'our', 'some', 'the', 'to', 'with'})
+
+# Weight of character trigrams and of context words relative to task name words
+TRIGRAM_WEIGHT = 0.5
+CONTEXT_WEIGHT = 0.5
+
+
+def words(text: str):
+    """Lowercase alphanumeric words of a text, without stopwords"""
+    return [word for word in re.findall(r"[a-z0-9]+", (text or "").lower()) if word not in STOPWORDS]
+
+
+def _term_counts(name_words, context_words):
+    counts = Counter()
+    for weight, tokens in ((1.0, name_words), (CONTEXT_WEIGHT, context_words)):
+        for word in tokens:
+            counts['w:' + word] += weight
+            padded = f" {word} "
+            for index in range(len(padded) - 2):
+                counts['c:' + padded[index:index + 3]] += weight * TRIGRAM_WEIGHT
+    return counts
+
+
+def _plan_key(task_name: str, category: str, context: str, prompt_version: str):
+    """Plans with the same key are rewordings only in case, punctuation or stopwords"""
+    return " ".join(words(task_name)), category, " ".join(words(context)), prompt_version
+
+
+def _abbreviations(tokens):
+    """Short forms a word pair may be written as: initials and first three letters + second word"""
+    for first, second in zip(tokens, tokens[1:]):
+        yield first[0] + second[0], (first, second)
+        yield first[:3] + second, (first, second)
+
+
+class SimilarPlan:
+    """A past plan close enough to reuse, with its similarity score"""
+
+    __slots__ = ('score', 'task_name', 'duration_days', 'milestones', 'analysis')
+
+    def __init__(self, score: float, task_name: str, duration_days: int, milestones, analysis: str):
+        self.score = score
+        self.task_name = task_name
+        self.duration_days = duration_days
+        self.milestones = milestones
+        self.analysis = analysis
+
+    def __repr__(self):
+        return f"SimilarPlan(task_name={self.task_name!r}, score={self.score:.2f})"
+
+
+class SimilarPlanIndex:
+    """In-memory TF-IDF nearest-neighbour index over past plans, persisted to SQLite"""
+
+    def __init__(self, path: str = SIMILAR_PATH, threshold: float = SIMILARITY_THRESHOLD,
+                 max_entries: int = SIMILAR_MAX_ENTRIES):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS similar_plans ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, task_name TEXT NOT NULL, category TEXT NOT NULL, "
+                "context TEXT NOT NULL, duration_days INTEGER NOT NULL, prompt_version TEXT NOT NULL, "
+                "milestones TEXT NOT NULL, analysis TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+        self._plans = {}                     # id -> (category, prompt_version, term counts, row fields, key)
+        self._postings = defaultdict(set)    # word term -> plan ids
+        self._document_frequency = Counter()
+        self._abbreviations = {}             # short form -> word pair
+        self._keys = {}                      # (normalized name, category, context, version) -> id
+        for row in self._conn.execute(
+            "SELECT id, task_name, category, context, duration_days, prompt_version, milestones, analysis "
+            "FROM similar_plans ORDER BY id"
+        ):
+            self._index(*row)
+
+    def __len__(self):
+        return len(self._plans)
+
+    def add(self, task_name: str, category: str, duration_days: int, additional_context: str, milestones, analysis: str,
+            prompt_version: str):
+        """Index a generated plan, replacing an earlier plan for the same wording"""
+        context = " ".join((additional_context or "").split())
+        with self._lock:
+            with self._conn:
+                old_id = self._keys.get(_plan_key(task_name, category, context, prompt_version))
+                if old_id is not None:
+                    self._unindex(old_id)
+                    self._conn.execute("DELETE FROM similar_plans WHERE id = ?", (old_id,))
+                encoded = json.dumps([milestone.to_dict() for milestone in milestones])
+                plan_id = self._conn.execute(
+                    "INSERT INTO similar_plans (task_name, category, context, duration_days, prompt_version, milestones, "
+                    "analysis, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (task_name, category, context, duration_days, prompt_version, encoded, analysis, time.time())
+                ).lastrowid
+                self._index(plan_id, task_name, category, context, duration_days, prompt_version, encoded, analysis)
+
+                # Oldest plans go first once the index is full
+                for old_id in sorted(self._plans)[:max(0, len(self._plans) - self.max_entries)]:
+                    self._unindex(old_id)
+                    self._conn.execute("DELETE FROM similar_plans WHERE id = ?", (old_id,))
+
+    def find(self, task_name: str, category: str, additional_context: str = "", prompt_version: str = None):
+        """The most similar past plan of the same category at or above the threshold, or None"""
+        with self._lock:
+            if not self._plans:
+                return None
+            query = self._weights(_term_counts(self._expand(words(task_name)), self._expand(words(additional_context))))
+            if not query:
+                return None
+
+            candidates = set()
+            for term in query:
+                candidates.update(self._postings.get(term, ()))
+
+            best_id, best_score = None, 0.0
+            for plan_id in candidates:
+                plan_category, plan_version, counts, _, _ = self._plans[plan_id]
+                if plan_category != category or (prompt_version is not None and plan_version != prompt_version):
+                    continue
+                score = sum(weight * query.get(term, 0.0) for term, weight in self._weights(counts).items())
+                if score > best_score:
+                    best_id, best_score = plan_id, score
+            if best_id is None or best_score < self.threshold:
+                return None
+            name, duration_days, milestones, analysis = self._plans[best_id][3]
+
+        return SimilarPlan(min(best_score, 1.0), name, duration_days,
+                           [Milestone.from_dict(item) for item in json.loads(milestones)], analysis)
+
+    def clear(self):
+        """Forget every indexed plan"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM similar_plans")
+            self._plans.clear()
+            self._postings.clear()
+            self._document_frequency.clear()
+            self._abbreviations.clear()
+            self._keys.clear()
+
+    def _expand(self, tokens):
+        """Replace words the index has never seen by the word pair they abbreviate, when known"""
+        expanded = []
+        for word in tokens:
+            if 'w:' + word not in self._document_frequency and word in self._abbreviations:
+                expanded.extend(self._abbreviations[word])
+            else:
+                expanded.append(word)
+        return expanded
+
+    def _weights(self, counts):
+        """L2-normalized TF-IDF weights (smoothed IDF) under the current document frequencies"""
+        total = len(self._plans)
+        weights = {
+            term: count * (math.log((1 + total) / (1 + self._document_frequency.get(term, 0))) + 1)
+            for term, count in counts.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+    def _index(self, plan_id, task_name, category, context, duration_days, prompt_version, milestones, analysis):
+        # Caller holds self._lock (or is __init__)
+        name_words = words(task_name)
+        counts = _term_counts(name_words, words(context))
+        key = _plan_key(task_name, category, context, prompt_version)
+        self._plans[plan_id] = (category, prompt_version, counts, (task_name, duration_days, milestones, analysis), key)
+        self._document_frequency.update(counts.keys())
+        for term in counts:
+            if term.startswith('w:'):
+                self._postings[term].add(plan_id)
+        for short, pair in _abbreviations(name_words):
+            self._abbreviations.setdefault(short, pair)
+        self._keys[key] = plan_id
+
+    def _unindex(self, plan_id):
+        _, _, counts, _, key = self._plans.pop(plan_id)
+        self._document_frequency.subtract(counts.keys())
+        self._document_frequency += Counter()  # drop zero counts
+        for term in counts:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(plan_id)
+                if not postings:
+                    del self._postings[term]
+        del self._keys[key]
+
+
+def rescale_days(milestones, duration_days: int):
+    """Copies of milestones with their days scaled proportionally to a new total (at least one day each)"""
+    days = rebalance_days([milestone.estimated_days for milestone in milestones], duration_days)
+    return [
+        Milestone(milestone.id, milestone.name, milestone.priority, 0, False, estimated_days, milestone.description,
+                  depends_on=milestone.depends_on)
+        for milestone, estimated_days in zip(milestones, days)
+    ]
+
+
+_similar_index = None
+_similar_index_lock = threading.Lock()
+
+
+def get_similar_index():
+    """Process-wide similar-plan index, loaded on first use"""
+    global _similar_index
+    with _similar_index_lock:
+        if _similar_index is None:
+            _similar_index = SimilarPlanIndex()
+        return _similar_index
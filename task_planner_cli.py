@@ -0,0 +1,128 @@
+"""task-planner: plan tasks from CSV/JSON files or stdin without the Streamlit UI
+
+Examples, run from the repository root:
+
+    python task_planner_cli.py tasks.csv > plans.json
+    cat tasks.json | python task_planner_cli.py --jsonl --workers 8
+    python task_planner_cli.py tasks.csv --offline --save my-user-id
+
+Input columns are the Bulk Import ones: name (required), category,
+start_date, end_date or duration_days, context. Output is one JSON
+document with the planned tasks in input order plus the rows that failed,
+or with --jsonl one JSON object per task as soon as it is planned.
+"""
+import argparse
+import json
+import logging
+import sys
+
+from ai_service import MAX_RETRIES, REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, AITaskPlanner, get_shared_planner
+from bulk_import import BULK_WORKERS, BulkImporter, parse_task_list
+
+
+def read_specs(paths):
+    """Specs and rejected-row messages from every input; '-' (the default) reads stdin"""
+    specs = []
+    errors = []
+    for path in paths or ['-']:
+        if path == '-':
+            text = sys.stdin.read()
+        else:
+            with open(path, encoding='utf-8-sig') as f:
+                text = f.read()
+        try:
+            file_specs, file_errors = parse_task_list(text)
+        except ValueError as e:
+            errors.append({'input': path, 'error': f"could not read the list: {e}"})
+            continue
+        specs.extend(file_specs)
+        errors.extend({'input': path, 'error': message} for message in file_errors)
+    return specs, errors
+
+
+def result_record(result):
+    """JSON form of one BulkResult"""
+    record = {'row': result.spec.row, 'name': result.spec.name}
+    if result.error:
+        record['error'] = result.error
+    else:
+        record['task'] = result.task.to_dict()
+        record['analysis'] = result.analysis
+    return record
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='task-planner', description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter, epilog="\n".join(__doc__.splitlines()[2:]),
+    )
+    parser.add_argument('inputs', nargs='*', metavar='FILE', help="CSV or JSON task lists; '-' or nothing reads stdin")
+    parser.add_argument('-o', '--output', help="write JSON here instead of stdout")
+    parser.add_argument('--jsonl', action='store_true', help="stream one JSON object per task, in completion order")
+    parser.add_argument('--workers', type=int, default=BULK_WORKERS, help="plans generated at once")
+    parser.add_argument('--rpm', type=int, default=REQUESTS_PER_MINUTE, help="model requests per minute")
+    parser.add_argument('--tpm', type=int, default=TOKENS_PER_MINUTE, help="model tokens per minute")
+    parser.add_argument('--retries', type=int, default=MAX_RETRIES, help="retries per call on 429/5xx")
+    parser.add_argument('--fallback', action='store_true', help="use template milestones when the model fails")
+    parser.add_argument('--offline', action='store_true', help="never call the model; template milestones only")
+    parser.add_argument('--save', metavar='USER_ID', help="also store the planned tasks for this user (TASK_STORE_URL)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log planner notices to stderr")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format="%(levelname)s %(message)s")
+
+    specs, errors = read_specs(args.inputs)
+    if not specs:
+        print(json.dumps({'tasks': [], 'errors': errors}), file=sys.stderr)
+        return 1
+
+    if args.offline:
+        planner = AITaskPlanner(api_key='')
+    else:
+        planner = get_shared_planner()
+        if planner.model is None and not args.fallback:
+            print(f"task-planner: AI model not available ({planner.init_error}); use --offline or --fallback",
+                  file=sys.stderr)
+            return 2
+
+    store = None
+    if args.save:
+        from task_store import get_task_store
+        store = get_task_store()
+
+    importer = BulkImporter(planner, store, args.workers, args.rpm, args.tpm, args.retries,
+                            fallback=args.fallback or args.offline)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        results = []
+        for result in importer.plan(specs):
+            results.append(result)
+            if args.jsonl:
+                out.write(json.dumps(result_record(result), ensure_ascii=False) + "\n")
+                out.flush()
+
+        saved = importer.save(args.save, results) if args.save else []
+        if args.jsonl:
+            for error in errors:
+                out.write(json.dumps(error, ensure_ascii=False) + "\n")
+        else:
+            records = [result_record(result) for result in sorted(results, key=lambda result: result.spec.row)]
+            json.dump({
+                'tasks': [record for record in records if 'task' in record],
+                'errors': errors + [record for record in records if 'error' in record],
+                'saved': [task.id for task in saved],
+            }, out, ensure_ascii=False, indent=2)
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    return 0 if not errors and all(result.task is not None for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())